@@ -13,9 +13,59 @@ class Settings(BaseSettings):
     # Reminder posting delay (seconds) between first reminder and posting channel-wide missing users list
     # In production this should be 3600 (1 hour). For local testing you can set to 120 (2 minutes).
     reminder_post_delay_seconds: int = 3600
-    
+    # Reminder DM fan-out: max DMs in flight, and retries per user for transient failures
+    reminder_dm_concurrency: int = 20
+    reminder_dm_max_retries: int = 2
+    reminder_dm_retry_backoff_seconds: float = 1.0
+    # Run the scheduled jobs inside the web app; disable when deploying `python -m app.worker`
+    run_scheduler_in_web: bool = True
+    # Only the elected leader process runs scheduled jobs (Postgres advisory lock, lease row elsewhere);
+    # a lease not renewed within scheduler_lease_seconds can be taken over
+    scheduler_leader_election: bool = True
+    scheduler_lease_seconds: int = 60
+    scheduler_lease_renew_seconds: int = 20
+    # Threads for the scheduler's blocking DB and file work, kept off the event loop
+    scheduler_db_workers: int = 4
+    # Ack interactions first and run Slack side effects (DMs, message/view updates, reports)
+    # on a bounded background queue; a full queue makes submit wait, then run the job inline
+    interaction_ack_first: bool = True
+    work_queue_max_size: int = 1000
+    work_queue_workers: int = 8
+    work_queue_enqueue_timeout_seconds: float = 0.5
+    # Interaction idempotency keys: in-process LRU size, and how long keys are kept
+    idempotency_cache_size: int = 10000
+    idempotency_retention_seconds: int = 24 * 3600
+    # Hot-path dumps (payloads, views, raw bodies), logged at INFO when sampled: per-route sample rates as
+    # "route:rate" pairs (routes: events, interactions, commands), the rate for anything
+    # else, and the max bytes one request may log
+    hot_log_sample_rates: str = "events:0,interactions:0.01,commands:0.01"
+    hot_log_default_sample_rate: float = 0.0
+    hot_log_budget_bytes: int = 16384
+    # Slack Web API base URL; point at app.devtools.fake_slack for offline load tests
+    slack_api_base_url: str = "https://slack.com/api/"
+    # Shared Slack HTTP transport: max pooled connections, idle keep-alive and request timeout
+    slack_http_pool_size: int = 100
+    slack_http_keepalive_seconds: float = 30.0
+    slack_http_timeout_seconds: int = 30
+    # Process-wide Slack rate governor (per-method tier token buckets, honours Retry-After)
+    slack_rate_limit_enabled: bool = True
+    slack_rate_limit_max_retries: int = 3
+    # Page size for cursor-paginated Slack list calls (users.conversations, conversations.members)
+    slack_page_size: int = 1000
+    # Process-wide user directory cache (users.info results)
+    user_cache_ttl_seconds: int = 6 * 3600
+    user_cache_max_size: int = 10000
+    # Stored channel membership, kept current between listings by /slack/events membership events;
+    # longer than the weekly reminder interval so reminders rarely re-list channels
+    channel_members_ttl_seconds: int = 8 * 24 * 3600
+    # Local roster (slack_users table) synced in bulk from users.list
+    roster_page_size: int = 1000
+    roster_max_age_seconds: int = 12 * 3600
+
     # Database
     database_url: str
+    # Async driver URL for request handlers; derived from database_url when empty
+    async_database_url: str = ""
     
     # Application
     app_env: str = "development"
@@ -1,14 +1,35 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
 
 settings = get_settings()
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (asyncpg for Postgres, aiosqlite for SQLite)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Request handlers use the async engine so DB round-trips don't block the event loop;
+# the sync engine stays for background threads, the scheduler and startup
+async_engine = create_async_engine(
+    settings.async_database_url or to_async_url(settings.database_url),
+    pool_pre_ping=True
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -18,5 +39,30 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# Serialises migrations when several workers start at once (Postgres only)
+MIGRATION_LOCK_KEY = 7306221
+
+
+def run_migrations(bind=None, revision: str = "head"):
+    """Upgrade the schema with the Alembic chain in app/migrations (the app's engine by default)."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    with (bind or engine).begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    run_migrations()
@@ -0,0 +1,164 @@
+"""
+Benchmark of the hot timesheet_entries queries as the table grows.
+
+For every table size, seeds a throwaway SQLite database migrated to head
+twice, once as migrated and once with the hot-path indexes dropped, and
+reports the median latency of the report and duplicate-check queries on each.
+
+    python -m app.devtools.benchmark_queries --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+# Dropped for the "unindexed" variant
+HOT_PATH_INDEXES = (
+    "ix_timesheet_entries_type_period",
+    "ix_timesheet_entries_user_type_day",
+    "ix_timesheet_entries_user_date",
+    "ix_timesheet_entries_submission_id",
+    "ix_timesheet_submissions_user_date",
+)
+VARIANTS = ("indexed", "unindexed")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark timesheet queries against table size, with and without indexes")
+    parser.add_argument("--sizes", default="10000,100000,500000", help="Comma-separated table sizes")
+    parser.add_argument("--users", type=int, default=0, help="Distinct users (default: one per 20 entries)")
+    parser.add_argument("--days", type=int, default=365, help="Spread submissions over this many past days")
+    parser.add_argument("--repeat", type=int, default=30, help="Timed calls per query")
+    return parser.parse_args()
+
+
+def configure_environment(db_path: str) -> None:
+    """Must run before any app module reads its settings."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-fake")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "fake")
+    os.environ.setdefault("SLACK_MANAGER_USER_ID", "U00000000")
+
+
+def seed(bench_engine, size: int, users: int, days: int, seed_value: int = 42) -> list:
+    """Insert `size` entries, grouped into submissions of 1-5 lines, at most one per user, type and day."""
+    from sqlalchemy import insert, text
+    from app.models.timesheet import TimesheetEntry, submission_keys
+    from app.models.timesheet_submission import TimesheetSubmission
+    from app.utils.timezone import get_ist_now
+
+    rng = random.Random(seed_value)
+    user_ids = [f"U{i:08d}" for i in range(users)]
+    now = get_ist_now().replace(tzinfo=None)
+    submissions, entries = [], []
+    seen = set()
+    with bench_engine.begin() as connection:
+        created = 0
+        while created < size:
+            submitted = now - timedelta(seconds=rng.randint(0, days * 86400))
+            user_id = rng.choice(user_ids)
+            timesheet_type = "weekly" if rng.random() < 0.8 else "monthly"
+            keys = submission_keys(timesheet_type, submitted)
+            if (user_id, timesheet_type, keys['submission_day']) in seen:
+                continue
+            seen.add((user_id, timesheet_type, keys['submission_day']))
+            submission_id = len(submissions) + 1
+            submissions.append({
+                "id": submission_id,
+                "user_id": user_id,
+                "username": user_id,
+                "channel_id": "C00000001",
+                "timesheet_type": timesheet_type,
+                "created_at": submitted,
+                **keys
+            })
+            for _ in range(min(rng.randint(1, 5), size - created)):
+                entries.append({
+                    "submission_id": submission_id,
+                    "user_id": user_id,
+                    "username": user_id,
+                    "channel_id": "C00000001",
+                    "client_name": f"Client {rng.randint(1, 50)}",
+                    "hours": float(rng.randint(1, 40)),
+                    "timesheet_type": timesheet_type,
+                    "created_at": submitted,
+                    **keys
+                })
+                created += 1
+        for i in range(0, len(submissions), 10000):
+            connection.execute(insert(TimesheetSubmission), submissions[i:i + 10000])
+        for i in range(0, len(entries), 10000):
+            connection.execute(insert(TimesheetEntry), entries[i:i + 10000])
+        connection.execute(text("ANALYZE"))
+    return user_ids
+
+
+def time_query(func, repeat: int) -> float:
+    """Median latency in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_size(args, tmp_dir: str, size: int, variant: str) -> dict:
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+    from app.database import run_migrations
+    from app.services.timesheet_service import TimesheetService
+
+    db_path = os.path.join(tmp_dir, f"bench_{size}_{variant}.db")
+    bench_engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        run_migrations(bind=bench_engine)
+        if variant == "unindexed":
+            with bench_engine.begin() as connection:
+                for index_name in HOT_PATH_INDEXES:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        users = args.users or max(1, size // 20)
+        user_ids = seed(bench_engine, size, users, args.days)
+
+        rng = random.Random(7)
+        db = sessionmaker(bind=bench_engine)()
+        try:
+            return {
+                "weekly report": time_query(lambda: TimesheetService.get_weekly_entries_grouped_by_user(db), args.repeat),
+                "monthly report": time_query(lambda: TimesheetService.get_monthly_entries_grouped_by_user(db), args.repeat),
+                "has_submitted_today": time_query(
+                    lambda: TimesheetService.has_submitted_today(db, rng.choice(user_ids), "weekly"), args.repeat
+                ),
+                "latest entries": time_query(
+                    lambda: TimesheetService.get_latest_timesheet_entries(db, rng.choice(user_ids)), args.repeat
+                ),
+            }
+        finally:
+            db.close()
+    finally:
+        bench_engine.dispose()
+        os.remove(db_path)
+
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    if args.users and max(sizes) > args.users * args.days * 5:
+        raise SystemExit("Too few --users/--days for one submission per user, type and day at that size")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_environment(os.path.join(tmp_dir, "app.db"))
+
+        print(f"{'rows':>10}  {'schema':<10}  {'query':<20}  {'median ms':>10}")
+        for size in sizes:
+            for variant in VARIANTS:
+                results = run_size(args, tmp_dir, size, variant)
+                for query, median_ms in results.items():
+                    print(f"{size:>10}  {variant:<10}  {query:<20}  {median_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Offline benchmark of the weekly reminder run against the fake Slack API.
+
+Starts app.devtools.fake_slack in a background thread, points the bot's Slack
+transport at it, and times TaskScheduler.send_weekly_reminder() end to end
+against a throwaway SQLite database.
+
+    python -m app.devtools.benchmark_reminders --users 10000 --latency-ms 50
+
+Runs after the first reuse the persisted DM channels and warm caches, so
+--runs 2 shows cold versus warm cost.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the weekly reminder against a fake Slack API")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit-per-minute", type=int, default=0,
+                        help="Per-method calls per minute before the fake server answers 429 (0 disables)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a random 429")
+    parser.add_argument("--concurrency", type=int, default=None, help="Override REMINDER_DM_CONCURRENCY")
+    parser.add_argument("--governor", action="store_true",
+                        help="Keep the client-side rate governor on (real Slack tiers make 10k DMs take hours)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8081)
+    return parser.parse_args()
+
+
+def configure_environment(args, db_path: str) -> None:
+    """Must run before any app module reads its settings."""
+    os.environ["SLACK_API_BASE_URL"] = f"http://127.0.0.1:{args.port}/api/"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["SLACK_RATE_LIMIT_ENABLED"] = "true" if args.governor else "false"
+    os.environ["EXCLUDED_USER_IDS"] = ""
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-fake")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "fake")
+    os.environ.setdefault("SLACK_MANAGER_USER_ID", "U00000000")
+    if args.concurrency:
+        os.environ["REMINDER_DM_CONCURRENCY"] = str(args.concurrency)
+
+
+def start_fake_slack(args):
+    import uvicorn
+    from app.devtools.fake_slack import FakeSlackSettings, create_app
+
+    fake_app = create_app(FakeSlackSettings(
+        users=args.users,
+        channels=args.channels,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        rate_limit_per_minute=args.rate_limit_per_minute,
+        error_rate=args.error_rate
+    ))
+    server = uvicorn.Server(uvicorn.Config(
+        fake_app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, fake_app.state.api
+
+
+async def run_benchmark(args, api) -> None:
+    from app.database import init_db
+    from app.services.slack_clients import slack_transport
+    from app.utils.rate_limiter import rate_governor
+    from app.utils.scheduler import TaskScheduler
+
+    init_db()
+    scheduler = TaskScheduler()
+    try:
+        for run in range(1, args.runs + 1):
+            api.reset_stats()
+            start = time.perf_counter()
+            await scheduler.send_weekly_reminder()
+            elapsed = time.perf_counter() - start
+
+            calls = api.stats()["calls"]
+            dms = calls.get("chat.postMessage", 0)
+            print(f"Run {run}: {elapsed:.2f}s, {dms} DMs ({dms / elapsed if elapsed else 0:.1f}/s)")
+            print(f"  Slack calls: {calls}")
+            if api.rate_limited:
+                print(f"  429 responses: {dict(api.rate_limited)}")
+        if args.governor:
+            print(f"Rate governor: throttled {rate_governor.throttled_seconds:.1f}s, "
+                  f"{rate_governor.rate_limited_responses} rate-limited responses")
+    finally:
+        await slack_transport.aclose()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_environment(args, os.path.join(tmp_dir, "benchmark.db"))
+        server, thread, api = start_fake_slack(args)
+        try:
+            print(f"Fake Slack: {args.users} users in {args.channels} channels, "
+                  f"{args.latency_ms}±{args.latency_jitter_ms}ms latency")
+            asyncio.run(run_benchmark(args, api))
+        finally:
+            server.should_exit = True
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
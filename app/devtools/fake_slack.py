@@ -0,0 +1,272 @@
+"""
+Local stand-in for the Slack Web API, for load and latency testing.
+
+Implements the methods the bot calls (users.conversations, conversations.members,
+users.info, users.list, conversations.open, chat.postMessage, chat.update,
+views.open, views.update) against a synthetic workspace, with injected latency
+and Slack-style HTTP 429 responses.
+
+Run it with:
+    uvicorn app.devtools.fake_slack:app --port 8081
+
+and point the bot at it with SLACK_API_BASE_URL=http://127.0.0.1:8081/api/
+Workspace size, latency and rate limiting are configured via FAKE_SLACK_* env vars.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic_settings import BaseSettings
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import json
+import random
+import time
+
+BOT_USER_ID = "UBOT0000001"
+
+
+class FakeSlackSettings(BaseSettings):
+    # Workspace shape: human users, extra bot users, and channels the bot is in
+    users: int = 10000
+    bot_users: int = 5
+    deleted_users: int = 0
+    channels: int = 5
+    # Latency added to every call: base plus uniform random jitter
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    # Per-method calls allowed per minute before answering 429 (0 disables)
+    rate_limit_per_minute: int = 0
+    # Probability of an unprovoked 429 on any call, and the Retry-After it carries
+    error_rate: float = 0.0
+    retry_after_seconds: int = 1
+    # Default page size when the caller does not pass `limit`
+    default_page_size: int = 200
+
+    class Config:
+        env_prefix = "FAKE_SLACK_"
+        case_sensitive = False
+
+
+class FakeWorkspace:
+    """Deterministic synthetic workspace; user N is a member of channel N % channels."""
+
+    def __init__(self, config: FakeSlackSettings):
+        self.config = config
+        self.user_ids = [f"U{n:08d}" for n in range(config.users)]
+        self.bot_ids = [BOT_USER_ID] + [f"UBOT{n:07d}" for n in range(2, config.bot_users + 1)]
+        self.channel_ids = [f"C{n:08d}" for n in range(max(config.channels, 1))]
+        self.deleted = set(self.user_ids[:config.deleted_users])
+        self._ts = itertools.count(1)
+
+    def user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        if user_id not in self.bot_ids and user_id not in self.user_ids:
+            return None
+        name = user_id.lower()
+        return {
+            "id": user_id,
+            "name": name,
+            "real_name": f"User {user_id}",
+            "deleted": user_id in self.deleted,
+            "is_bot": user_id in self.bot_ids,
+            "tz": "Asia/Kolkata",
+            "profile": {"real_name": f"User {user_id}", "display_name": name}
+        }
+
+    def channel_members(self, channel_id: str) -> Optional[List[str]]:
+        if channel_id not in self.channel_ids:
+            return None
+        index = self.channel_ids.index(channel_id)
+        members = self.user_ids[index::len(self.channel_ids)]
+        # Bots (including this app's bot user) sit in every channel
+        return self.bot_ids + members
+
+    def next_ts(self) -> str:
+        return f"{int(time.time())}.{next(self._ts):06d}"
+
+
+class FakeSlackAPI:
+    def __init__(self, config: FakeSlackSettings = None):
+        self.config = config or FakeSlackSettings()
+        self.workspace = FakeWorkspace(self.config)
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self.handlers = {
+            "auth.test": self.auth_test,
+            "users.conversations": self.users_conversations,
+            "conversations.members": self.conversations_members,
+            "users.info": self.users_info,
+            "users.list": self.users_list,
+            "conversations.open": self.conversations_open,
+            "chat.postMessage": self.chat_post_message,
+            "chat.update": self.chat_update,
+            "views.open": self.views_open,
+            "views.update": self.views_update,
+        }
+
+    def reset_stats(self) -> None:
+        self.calls.clear()
+        self.rate_limited.clear()
+        self._windows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": dict(self.calls), "rate_limited": dict(self.rate_limited)}
+
+    def _check_rate_limit(self, method: str) -> Optional[int]:
+        """Return a Retry-After in seconds if this call should get a 429, else None."""
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            return self.config.retry_after_seconds
+
+        limit = self.config.rate_limit_per_minute
+        if limit <= 0:
+            return None
+        now = time.monotonic()
+        window_start, count = self._windows.get(method, (now, 0))
+        if now - window_start >= 60:
+            window_start, count = now, 0
+        if count >= limit:
+            return max(1, int(60 - (now - window_start)) + 1)
+        self._windows[method] = (window_start, count + 1)
+        return None
+
+    def _page(self, items: List[Any], args: Dict[str, Any]) -> Tuple[List[Any], str]:
+        """Slice a list the way Slack cursor pagination does; cursors are plain offsets."""
+        limit = int(args.get("limit") or self.config.default_page_size)
+        offset = int(args.get("cursor") or 0)
+        end = offset + limit
+        return items[offset:end], (str(end) if end < len(items) else "")
+
+    async def dispatch(self, method: str, args: Dict[str, Any]) -> JSONResponse:
+        self.calls[method] += 1
+
+        delay = self.config.latency_ms + random.uniform(0, self.config.latency_jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+        retry_after = self._check_rate_limit(method)
+        if retry_after is not None:
+            self.rate_limited[method] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"ok": False, "error": "ratelimited"},
+                headers={"Retry-After": str(retry_after)}
+            )
+
+        handler = self.handlers.get(method)
+        if handler is None:
+            return JSONResponse(content={"ok": False, "error": "unknown_method"})
+        return JSONResponse(content=handler(args))
+
+    def auth_test(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "user_id": BOT_USER_ID, "team_id": "TFAKE0001"}
+
+    def users_conversations(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        channels = [{"id": channel_id, "is_archived": False} for channel_id in self.workspace.channel_ids]
+        page, next_cursor = self._page(channels, args)
+        return {"ok": True, "channels": page, "response_metadata": {"next_cursor": next_cursor}}
+
+    def conversations_members(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        members = self.workspace.channel_members(args.get("channel"))
+        if members is None:
+            return {"ok": False, "error": "channel_not_found"}
+        page, next_cursor = self._page(members, args)
+        return {"ok": True, "members": page, "response_metadata": {"next_cursor": next_cursor}}
+
+    def users_info(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        user = self.workspace.user(args.get("user"))
+        if user is None:
+            return {"ok": False, "error": "user_not_found"}
+        return {"ok": True, "user": user}
+
+    def users_list(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        # Materialise only the requested page of user objects
+        user_ids, next_cursor = self._page(self.workspace.bot_ids + self.workspace.user_ids, args)
+        members = [self.workspace.user(user_id) for user_id in user_ids]
+        return {"ok": True, "members": members, "response_metadata": {"next_cursor": next_cursor}}
+
+    def conversations_open(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = (args.get("users") or "").split(",")[0]
+        user = self.workspace.user(user_id)
+        if user is None:
+            return {"ok": False, "error": "user_not_found"}
+        if user["deleted"]:
+            return {"ok": False, "error": "user_disabled"}
+        return {"ok": True, "channel": {"id": "D" + user_id[1:]}}
+
+    def chat_post_message(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        channel = args.get("channel")
+        if not channel:
+            return {"ok": False, "error": "channel_not_found"}
+        ts = self.workspace.next_ts()
+        return {"ok": True, "channel": channel, "ts": ts, "message": {"text": args.get("text"), "ts": ts}}
+
+    def chat_update(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        if not args.get("channel") or not args.get("ts"):
+            return {"ok": False, "error": "message_not_found"}
+        return {"ok": True, "channel": args["channel"], "ts": args["ts"], "text": args.get("text")}
+
+    def views_open(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        if not args.get("trigger_id"):
+            return {"ok": False, "error": "invalid_trigger_id"}
+        if not _is_view(args.get("view")):
+            return {"ok": False, "error": "invalid_arguments"}
+        return {"ok": True, "view": {"id": f"V{self.calls['views.open']:08d}", "hash": self.workspace.next_ts()}}
+
+    def views_update(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        view_id = args.get("view_id")
+        if not view_id:
+            return {"ok": False, "error": "not_found"}
+        if not _is_view(args.get("view")):
+            return {"ok": False, "error": "invalid_arguments"}
+        return {"ok": True, "view": {"id": view_id, "hash": self.workspace.next_ts()}}
+
+
+def _is_view(view: Any) -> bool:
+    return isinstance(view, dict) and view.get("type") == "modal" and isinstance(view.get("blocks"), list)
+
+
+async def _read_args(request: Request) -> Dict[str, Any]:
+    """
+    Merge query string, form and JSON arguments; slack_sdk uses all three.
+    Like Slack, a form-encoded `view` is a JSON string, while a JSON body must carry the view object itself.
+    """
+    args: Dict[str, Any] = dict(request.query_params)
+    content_type = request.headers.get("content-type", "")
+    if "application/json" in content_type:
+        body = await request.json()
+        if isinstance(body, dict):
+            args.update(body)
+    elif content_type:
+        form = await request.form()
+        args.update(form)
+        if isinstance(args.get("view"), str):
+            try:
+                args["view"] = json.loads(args["view"])
+            except ValueError:
+                pass
+    return args
+
+
+def create_app(config: FakeSlackSettings = None) -> FastAPI:
+    api = FakeSlackAPI(config)
+    fake_app = FastAPI(title="Fake Slack Web API")
+    fake_app.state.api = api
+
+    @fake_app.api_route("/api/{method}", methods=["GET", "POST"])
+    async def call_method(method: str, request: Request):
+        return await api.dispatch(method, await _read_args(request))
+
+    @fake_app.get("/stats")
+    async def get_stats():
+        return api.stats()
+
+    @fake_app.post("/stats/reset")
+    async def reset_stats():
+        api.reset_stats()
+        return {"status": "ok"}
+
+    return fake_app
+
+
+app = create_app()
@@ -1,10 +1,13 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.slack_service import SlackService
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.services.slack_service import SlackService, SlackListingIncomplete, get_slack_service
+from app.services.async_slack_service import AsyncSlackService, get_async_slack_service
 from app.services.timesheet_service import TimesheetService
 from app.services.exemption_service import get_all_exempted_users
 from app.utils.block_builder import BlockBuilder
+from app.utils.work_queue import background_jobs
 from app.config import get_settings
 from typing import Dict, Any, List
 import logging
@@ -17,9 +20,16 @@ settings = get_settings()
 
 
 class CommandHandler:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_async_db),
+        slack_service: AsyncSlackService = None,
+        sync_slack_service: SlackService = None
+    ):
         self.db = db
-        self.slack_service = SlackService()
+        self.slack_service = slack_service or get_async_slack_service()
+        # Manager reports are built in background threads, which use the blocking client
+        self.sync_slack_service = sync_slack_service or get_slack_service()
         self.block_builder = BlockBuilder()
     
     # async def handle_timesheet_command(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,7 +48,7 @@ class CommandHandler:
         blocks = self.block_builder.build_initial_form()
 
         # Open modal with the full form and channel_id in metadata
-        self.slack_service.open_modal(
+        await self.slack_service.open_modal(
             trigger_id=trigger_id,
             blocks=blocks,
             private_metadata=json.dumps({"channel_id": channel_id})
@@ -54,20 +64,13 @@ class CommandHandler:
         logger.info(f"📍 Weekly command - trigger_id: {trigger_id}")
         logger.info(f"📍 Weekly command - channel_id: {channel_id}")
         
-        blocks = self.block_builder.build_weekly_form()
-
         # Store channel_id in metadata
         metadata = json.dumps({"channel_id": channel_id})
         logger.info(f"📍 Weekly command - metadata to store: {metadata}")
 
-        # Open modal with the weekly form - use specific callback_id and include metadata
-        success = self.slack_service.open_modal(
-            trigger_id=trigger_id,
-            blocks=blocks,
-            title="Weekly Timesheet",
-            callback_id="submit_weekly_timesheet",
-            private_metadata=metadata
-        )
+        # Open the pre-rendered weekly form (callback_id submit_weekly_timesheet) with the metadata spliced in
+        view = self.block_builder.modal_template('weekly').render(private_metadata=metadata)
+        success = await self.slack_service.open_view(trigger_id, view)
         
         logger.info(f"📍 Weekly command - modal open success: {success}")
 
@@ -84,20 +87,13 @@ class CommandHandler:
         logger.info(f"📍 Monthly command - trigger_id: {trigger_id}")
         logger.info(f"📍 Monthly command - channel_id: {channel_id}")
         
-        blocks = self.block_builder.build_monthly_form()
-
         # Store channel_id in metadata
         metadata = json.dumps({"channel_id": channel_id})
         logger.info(f"📍 Monthly command - metadata to store: {metadata}")
 
-        # Open modal with the monthly form - use specific callback_id and include metadata
-        success = self.slack_service.open_modal(
-            trigger_id=trigger_id,
-            blocks=blocks,
-            title="Monthly Timesheet",
-            callback_id="submit_monthly_timesheet",
-            private_metadata=metadata
-        )
+        # Open the pre-rendered monthly form (callback_id submit_monthly_timesheet) with the metadata spliced in
+        view = self.block_builder.modal_template('monthly').render(private_metadata=metadata)
+        success = await self.slack_service.open_view(trigger_id, view)
         
         logger.info(f"📍 Monthly command - modal open success: {success}")
 
@@ -117,7 +113,7 @@ class CommandHandler:
             # If caller is manager, generate full report with missing users
             if user_id in manager_ids:
                 # Schedule background job to generate full report with missing users
-                self._schedule_full_weekly_report(user_id)
+                await self._schedule_full_weekly_report(user_id)
                 
                 return {
                     "response_type": "ephemeral",
@@ -125,7 +121,7 @@ class CommandHandler:
                 }
 
             # Non-manager: show only the caller's weekly entries for last 7 days
-            entries = TimesheetService.get_user_entries(self.db, user_id, days=7, timesheet_type='weekly')
+            entries = await TimesheetService.get_user_entries_async(self.db, user_id, days=7, timesheet_type='weekly')
             entry_dicts = [
                 {
                     'username': e.username,
@@ -160,7 +156,7 @@ class CommandHandler:
             # If caller is manager, generate full report with missing users
             if user_id in manager_ids:
                 # Schedule background job to generate full report with missing users
-                self._schedule_full_monthly_report(user_id)
+                await self._schedule_full_monthly_report(user_id)
                 
                 return {
                     "response_type": "ephemeral",
@@ -168,7 +164,7 @@ class CommandHandler:
                 }
 
             # Non-manager: show only the caller's monthly entries for last ~31 days
-            entries = TimesheetService.get_user_entries(self.db, user_id, days=31, timesheet_type='monthly')
+            entries = await TimesheetService.get_user_entries_async(self.db, user_id, days=31, timesheet_type='monthly')
             entry_dicts = [
                 {
                     'username': e.username,
@@ -225,7 +221,7 @@ class CommandHandler:
         exempt_user_id = match.group(1)
         
         # Get username for logging
-        user_info = self.slack_service.get_user_info(exempt_user_id)
+        user_info = await self.slack_service.get_user_info(exempt_user_id)
         username = user_info.get('profile', {}).get('real_name', 'Unknown') if user_info else 'Unknown'
         
         # Add to exemption list
@@ -303,7 +299,7 @@ class CommandHandler:
             }
 
         # Get user's latest timesheet entries
-        latest_entries = TimesheetService.get_latest_timesheet_entries(self.db, user_id)
+        latest_entries = await TimesheetService.get_latest_timesheet_entries_async(self.db, user_id)
         
         if not latest_entries:
             return {
@@ -311,17 +307,11 @@ class CommandHandler:
                 "text": "No previous timesheet found to edit. Please submit a new timesheet first."
             }
 
-        # Build blocks with pre-filled values for all entries
-        initial_values = [{
-            'client_name': entry.client_name,
-            'hours': entry.hours
-        } for entry in latest_entries]
-
-        blocks = self.block_builder.build_entry_forms(
-            num_entries=len(latest_entries),
-            timesheet_type=latest_entries[0].timesheet_type,
-            initial_values=initial_values
-        )
+        # Pre-filled values for all entries, spliced into the pre-rendered edit form
+        initial_values = {}
+        for i, entry in enumerate(latest_entries):
+            initial_values[f'client_{i}'] = entry.client_name
+            initial_values[f'hours_{i}'] = str(entry.hours)
 
         # Store all entry IDs and channel ID in private_metadata
         view_metadata = {
@@ -332,29 +322,22 @@ class CommandHandler:
 
         # Get formatted date for display
         submission_date = TimesheetService.format_entry_date(latest_entries)
-        timesheet_type = latest_entries[0].timesheet_type.capitalize()
         
         try:
-            # Open modal with pre-filled form - use shorter title and move date to first block
-            # Add date as first block instead of in title
-            date_block = {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*Date:* {submission_date}"
-                }
-            }
-            blocks.insert(0, {"type": "divider"})
-            blocks.insert(0, date_block)
-            
-            success = self.slack_service.open_modal(
-                trigger_id=trigger_id,
-                blocks=blocks,
-                title=f"Edit {timesheet_type}",  # Shorter title
-                callback_id="edit_timesheet_modal",
-                private_metadata=json.dumps(view_metadata)
+            # Open modal with pre-filled form - the template uses a short "Edit <type>" title
+            # and shows the date in its first block
+            view = self.block_builder.modal_template(
+                'edit',
+                num_entries=len(latest_entries),
+                timesheet_type=latest_entries[0].timesheet_type
+            ).render(
+                date_text=f"*Date:* {submission_date}",
+                private_metadata=json.dumps(view_metadata),
+                **initial_values
             )
             
+            success = await self.slack_service.open_view(trigger_id, view)
+            
             if not success:
                 raise Exception("Failed to open modal")
 
@@ -369,37 +352,43 @@ class CommandHandler:
                 "text": "Error: Unable to open edit form. Please try again."
             }
 
-    def _schedule_full_weekly_report(self, manager_user_id: str):
-        """Schedule a background job to generate full weekly report with missing users."""
+    async def _schedule_report(self, job_name: str, generate_report, manager_user_id: str):
+        """Queue report generation on the background work queue, or a dedicated thread if it is unavailable."""
         try:
-            import threading
-            thread = threading.Thread(
-                target=self._generate_full_weekly_report_sync,
-                args=(manager_user_id,)
-            )
-            thread.daemon = True
-            thread.start()
+            if not await background_jobs.submit(job_name, generate_report, manager_user_id):
+                import threading
+                thread = threading.Thread(
+                    target=generate_report,
+                    args=(manager_user_id,)
+                )
+                thread.daemon = True
+                thread.start()
             
-            logger.info(f"Scheduled full weekly report generation for manager {manager_user_id}")
+            logger.info(f"Scheduled {job_name} generation for manager {manager_user_id}")
             
         except Exception as e:
-            logger.error(f"Error scheduling full weekly report: {str(e)}")
+            logger.error(f"Error scheduling {job_name}: {str(e)}")
+
+    async def _schedule_full_weekly_report(self, manager_user_id: str):
+        """Schedule a background job to generate full weekly report with missing users."""
+        await self._schedule_report("full weekly report", self._generate_full_weekly_report_sync, manager_user_id)
 
-    def _schedule_full_monthly_report(self, manager_user_id: str):
+    async def _schedule_full_monthly_report(self, manager_user_id: str):
         """Schedule a background job to generate full monthly report with missing users."""
-        try:
-            import threading
-            thread = threading.Thread(
-                target=self._generate_full_monthly_report_sync,
-                args=(manager_user_id,)
-            )
-            thread.daemon = True
-            thread.start()
-            
-            logger.info(f"Scheduled full monthly report generation for manager {manager_user_id}")
-            
-        except Exception as e:
-            logger.error(f"Error scheduling full monthly report: {str(e)}")
+        await self._schedule_report("full monthly report", self._generate_full_monthly_report_sync, manager_user_id)
+
+    def _iter_report_channels(self, db: Session):
+        """Stream bot channels; if Slack returns none, fall back to channels with DB history."""
+        found = False
+        for channel_id in self.sync_slack_service.iter_bot_channels():
+            found = True
+            yield channel_id
+        
+        if not found:
+            channel_ids = TimesheetService.get_all_channels(db)
+            valid_channels = [ch for ch in channel_ids if ch != 'unknown']
+            logger.info(f"📊 Fallback - checking channels from DB: {valid_channels}")
+            yield from valid_channels
 
     def _generate_full_weekly_report_sync(self, manager_user_id: str):
         """Generate full weekly report with missing users and send via DM."""
@@ -413,49 +402,46 @@ class CommandHandler:
             logger.info(f"📊 Background Weekly Report: Found {len(grouped_entries)} users with submissions")
             logger.info(f"📊 Submitted user_ids: {list(grouped_entries.keys())}")
             
-            # Get ALL channels where bot is a member (not just channels with submissions)
+            # Stream ALL channels where bot is a member (not just channels with submissions);
+            # member pages are classified as they arrive instead of after the full listing
+            missing_user_ids = []
+            listing_incomplete = False
             try:
-                valid_channels = self.slack_service.get_bot_channels()
-                logger.info(f"📊 Checking ALL bot channels: {valid_channels}")
+                all_user_ids = set(self.sync_slack_service.iter_users_from_channels(
+                    self._iter_report_channels(db), db=db
+                ))
+                logger.info(f"📊 All user_ids from channels: {all_user_ids}")
+                submitted_user_ids = set(grouped_entries.keys())
+                logger.info(f"📊 Submitted user_ids (set): {submitted_user_ids}")
+                
+                # Filter out excluded users (who don't need to fill timesheets)
+                # Combine users from .env and JSON file
+                env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
+                excluded_users = get_all_exempted_users(env_excluded)
+                excluded_user_ids_set = set(excluded_users)
+                if excluded_users:
+                    logger.info(f"📊 Excluded users (won't appear in missing list): {excluded_users}")
+                
+                missing_user_ids = list(all_user_ids - submitted_user_ids - excluded_user_ids_set)
+                logger.info(f"📊 Background Weekly Report: Found {len(missing_user_ids)} missing users")
+                logger.info(f"📊 Missing user_ids: {missing_user_ids}")
+            except SlackListingIncomplete as e:
+                logger.error(f"Channel listing incomplete, leaving missing users out of background report: {str(e)}")
+                listing_incomplete = True
             except Exception as e:
-                logger.error(f"Error getting bot channels: {str(e)}")
-                # Fallback to channels from database
-                channel_ids = TimesheetService.get_all_channels(db)
-                valid_channels = [ch for ch in channel_ids if ch != 'unknown']
-                logger.info(f"📊 Fallback - checking channels from DB: {valid_channels}")
-            
-            missing_user_ids = []
-            if valid_channels:
-                try:
-                    all_user_ids = set(self.slack_service.get_all_users_from_channels(valid_channels))
-                    logger.info(f"📊 All user_ids from channels: {all_user_ids}")
-                    submitted_user_ids = set(grouped_entries.keys())
-                    logger.info(f"📊 Submitted user_ids (set): {submitted_user_ids}")
-                    
-                    # Filter out excluded users (who don't need to fill timesheets)
-                    # Combine users from .env and JSON file
-                    env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
-                    excluded_users = get_all_exempted_users(env_excluded)
-                    excluded_user_ids_set = set(excluded_users)
-                    if excluded_users:
-                        logger.info(f"📊 Excluded users (won't appear in missing list): {excluded_users}")
-                    
-                    missing_user_ids = list(all_user_ids - submitted_user_ids - excluded_user_ids_set)
-                    logger.info(f"📊 Background Weekly Report: Found {len(missing_user_ids)} missing users")
-                    logger.info(f"📊 Missing user_ids: {missing_user_ids}")
-                except Exception as e:
-                    logger.warning(f"Error getting missing users for background report: {str(e)}")
-                    missing_user_ids = []
+                logger.warning(f"Error getting missing users for background report: {str(e)}")
+                missing_user_ids = []
 
             # Build the full report blocks
             blocks = self.block_builder.build_user_grouped_report_blocks(
                 grouped_entries,
                 "📊 Complete Weekly Timesheet Report",
-                missing_user_ids
+                missing_user_ids,
+                missing_users_incomplete=listing_incomplete
             )
 
             # Send via DM to manager
-            success = self.slack_service.send_dm(
+            success = self.sync_slack_service.send_dm(
                 manager_user_id,
                 blocks,
                 "Complete Weekly Timesheet Report"
@@ -483,49 +469,46 @@ class CommandHandler:
             logger.info(f"📊 Background Monthly Report: Found {len(grouped_entries)} users with submissions")
             logger.info(f"📊 Submitted user_ids: {list(grouped_entries.keys())}")
             
-            # Get ALL channels where bot is a member (not just channels with submissions)
+            # Stream ALL channels where bot is a member (not just channels with submissions);
+            # member pages are classified as they arrive instead of after the full listing
+            missing_user_ids = []
+            listing_incomplete = False
             try:
-                valid_channels = self.slack_service.get_bot_channels()
-                logger.info(f"📊 Checking ALL bot channels: {valid_channels}")
+                all_user_ids = set(self.sync_slack_service.iter_users_from_channels(
+                    self._iter_report_channels(db), db=db
+                ))
+                logger.info(f"📊 All user_ids from channels: {all_user_ids}")
+                submitted_user_ids = set(grouped_entries.keys())
+                logger.info(f"📊 Submitted user_ids (set): {submitted_user_ids}")
+                
+                # Filter out excluded users (who don't need to fill timesheets)
+                # Combine users from .env and JSON file
+                env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
+                excluded_users = get_all_exempted_users(env_excluded)
+                excluded_user_ids_set = set(excluded_users)
+                if excluded_users:
+                    logger.info(f"📊 Excluded users (won't appear in missing list): {excluded_users}")
+                
+                missing_user_ids = list(all_user_ids - submitted_user_ids - excluded_user_ids_set)
+                logger.info(f"📊 Background Monthly Report: Found {len(missing_user_ids)} missing users")
+                logger.info(f"📊 Missing user_ids: {missing_user_ids}")
+            except SlackListingIncomplete as e:
+                logger.error(f"Channel listing incomplete, leaving missing users out of background report: {str(e)}")
+                listing_incomplete = True
             except Exception as e:
-                logger.error(f"Error getting bot channels: {str(e)}")
-                # Fallback to channels from database
-                channel_ids = TimesheetService.get_all_channels(db)
-                valid_channels = [ch for ch in channel_ids if ch != 'unknown']
-                logger.info(f"📊 Fallback - checking channels from DB: {valid_channels}")
-            
-            missing_user_ids = []
-            if valid_channels:
-                try:
-                    all_user_ids = set(self.slack_service.get_all_users_from_channels(valid_channels))
-                    logger.info(f"📊 All user_ids from channels: {all_user_ids}")
-                    submitted_user_ids = set(grouped_entries.keys())
-                    logger.info(f"📊 Submitted user_ids (set): {submitted_user_ids}")
-                    
-                    # Filter out excluded users (who don't need to fill timesheets)
-                    # Combine users from .env and JSON file
-                    env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
-                    excluded_users = get_all_exempted_users(env_excluded)
-                    excluded_user_ids_set = set(excluded_users)
-                    if excluded_users:
-                        logger.info(f"📊 Excluded users (won't appear in missing list): {excluded_users}")
-                    
-                    missing_user_ids = list(all_user_ids - submitted_user_ids - excluded_user_ids_set)
-                    logger.info(f"📊 Background Monthly Report: Found {len(missing_user_ids)} missing users")
-                    logger.info(f"📊 Missing user_ids: {missing_user_ids}")
-                except Exception as e:
-                    logger.warning(f"Error getting missing users for background report: {str(e)}")
-                    missing_user_ids = []
+                logger.warning(f"Error getting missing users for background report: {str(e)}")
+                missing_user_ids = []
 
             # Build the full report blocks
             blocks = self.block_builder.build_user_grouped_report_blocks(
                 grouped_entries,
                 "📊 Complete Monthly Timesheet Report",
-                missing_user_ids
+                missing_user_ids,
+                missing_users_incomplete=listing_incomplete
             )
 
             # Send via DM to manager
-            success = self.slack_service.send_dm(
+            success = self.sync_slack_service.send_dm(
                 manager_user_id,
                 blocks,
                 "Complete Monthly Timesheet Report"
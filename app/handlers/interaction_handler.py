@@ -1,25 +1,50 @@
 from fastapi import Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.slack_service import SlackService
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from app.database import get_async_db
+from app.services.async_slack_service import AsyncSlackService, get_async_slack_service
 from app.services.timesheet_service import TimesheetService
 from app.utils.block_builder import BlockBuilder
-from typing import Dict, Any
+from app.utils.work_queue import background_jobs
+from app.utils.hot_path_log import hot_log, LazyJSON
+from app.utils.metrics import record_modal_submission
+from app.config import get_settings
+from typing import Dict, Any, Callable, Optional
 import logging
 import json
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class InteractionHandler:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_async_db), slack_service: AsyncSlackService = None):
         self.db = db
-        self.slack_service = SlackService()
+        self.slack_service = slack_service or get_async_slack_service()
         self.block_builder = BlockBuilder()
     
+    async def _after_ack(self, job_name: str, func: Callable, *args) -> Optional[bool]:
+        """
+        Run a Slack side effect. In ack-first mode it is queued to run after the response
+        is sent and None is returned; otherwise, or if the queue is full, it runs inline.
+        """
+        if settings.interaction_ack_first and await background_jobs.submit(job_name, func, *args):
+            return None
+        return await func(*args)
+    
+    @staticmethod
+    def _already_submitted_text(timesheet_type: str) -> str:
+        return f"You have already submitted a {timesheet_type} timesheet today. Use /edit_timesheet to modify your existing entries."
+    
+    @classmethod
+    def _already_submitted_response(cls, timesheet_type: str) -> Dict[str, Any]:
+        return {
+            "response_action": "errors",
+            "errors": {"client_block_0": cls._already_submitted_text(timesheet_type)}
+        }
+    
     async def handle_interaction(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        logger.info("📥 Received payload:")
-        logger.info(json.dumps(payload, indent=2))
+        hot_log.info(logger, "📥 Received payload: %s", LazyJSON(payload, indent=2))
         
         interaction_type = payload.get('type')
         logger.info(f"📋 Interaction type: {interaction_type}")
@@ -28,14 +53,17 @@ class InteractionHandler:
             # Check callback_id to determine which submission handler to use
             callback_id = payload.get('view', {}).get('callback_id')
             if callback_id == 'edit_timesheet_modal':
-                return await self._handle_edit_timesheet_submission(payload)
-            return await self._handle_modal_submission(payload)
+                response = await self._handle_edit_timesheet_submission(payload)
+            else:
+                response = await self._handle_modal_submission(payload)
+            record_modal_submission(callback_id, response.get('response_action') != 'errors')
+            return response
         elif interaction_type == 'block_actions':
             action = payload.get('actions', [{}])[0]
             action_id = action.get('action_id', '')
             logger.info(f"⚙️ Handling action: {action_id}")
-            logger.info(f"🔍 Action details: {json.dumps(action, indent=2)}")
-            logger.info(f"🖼️ View context: {json.dumps(payload.get('view', {}), indent=2)}")
+            hot_log.info(logger, "🔍 Action details: %s", LazyJSON(action, indent=2))
+            hot_log.info(logger, "🖼️ View context: %s", LazyJSON(payload.get('view', {}), indent=2))
 
             if action_id == 'submit_timesheet':
                 return await self._handle_submit(payload)
@@ -71,37 +99,22 @@ class InteractionHandler:
             if not view_id:
                 raise ValueError("No view ID found in payload")
 
-            # Build blocks
-            logger.info("🏗️ Building new blocks...")
-            new_blocks = self.block_builder.build_entry_forms(num_entries)
-            logger.info(f"📦 Generated {len(new_blocks)} blocks")
-            
-            # Try updating view with preserved metadata
-            logger.info("🔄 Attempting to update view...")
-            success = self.slack_service.update_modal_view(
-                view_id=view_id,
-                blocks=new_blocks,
-                title="Weekly Timesheet",
+            # Pre-rendered form for this entry count, with the view's own callback_id and metadata
+            view_json = self.block_builder.modal_template('entries', num_entries).render(
                 callback_id=callback_id,
                 private_metadata=private_metadata
             )
             
-            if not success:
+            # Try updating view with preserved metadata
+            logger.info("🔄 Attempting to update view...")
+            success = await self._after_ack("update_view", self.slack_service.update_view, view_id, view_json)
+            
+            if success is False:
                 raise Exception("Failed to update modal view")
             
-            logger.info("✅ View update successful!")
-            # For debugging, return both ways - direct update and response
-            return {
-                "response_action": "update",
-                "view": {
-                    "type": "modal",
-                    "callback_id": callback_id,
-                    "title": {"type": "plain_text", "text": "Weekly Timesheet"},
-                    "submit": {"type": "plain_text", "text": "Submit"},
-                    "close": {"type": "plain_text", "text": "Cancel"},
-                    "blocks": new_blocks
-                }
-            }
+            logger.info("✅ View update queued" if success is None else "✅ View update successful!")
+            # Slack ignores the body of block_actions responses; the views.update call does the work
+            return {"status": "ok"}
             
         except Exception as e:
             logger.error(f"❌ Error updating entry count: {str(e)}")
@@ -116,7 +129,7 @@ class InteractionHandler:
         try:
             user_id = payload['user']['id']
             # Get actual username for storage
-            user_name = self.slack_service.get_user_display_name(user_id)
+            user_name = await self.slack_service.get_user_display_name(user_id, db=self.db)
             logger.info(f"Processing submission for user: {user_id} ({user_name})")
             
             # Try to get channel_id from multiple sources with detailed logging
@@ -188,18 +201,31 @@ class InteractionHandler:
                     skipped_entries.append(int(idx) + 1)
                     continue
 
-                # Save entry to DB
-                TimesheetService.create_entry(
+                entries.append({'client': client_name, 'hours': hours})
+
+            # Save the whole submission in one transaction
+            try:
+                await TimesheetService.create_entries_async(
                     db=self.db,
                     user_id=user_id,
                     username=user_name,
                     channel_id=channel_id,
-                    client_name=client_name,
-                    hours=hours,
+                    entries=[{'client_name': e['client'], 'hours': e['hours']} for e in entries],
                     timesheet_type=timesheet_type
                 )
-
-                entries.append({'client': client_name, 'hours': hours})
+            except IntegrityError:
+                logger.warning(f"User {user_id} attempted duplicate {timesheet_type} submission")
+                await self._after_ack(
+                    "send_dm",
+                    self.slack_service.send_dm,
+                    user_id,
+                    [{
+                        "type": "section",
+                        "text": {"type": "mrkdwn", "text": self._already_submitted_text(timesheet_type)}
+                    }],
+                    "Timesheet already submitted"
+                )
+                return self._already_submitted_response(timesheet_type)
 
             # Build confirmation message using mention format for display
             user_mention = self.slack_service.format_user_mention(user_id)
@@ -214,7 +240,9 @@ class InteractionHandler:
                 )
 
             # Send DM confirmation to user
-            self.slack_service.send_dm(
+            await self._after_ack(
+                "send_dm",
+                self.slack_service.send_dm,
                 user_id,
                 [{
                     "type": "section",
@@ -232,7 +260,9 @@ class InteractionHandler:
             ]
 
             if channel_id and message_ts:
-                self.slack_service.update_message(
+                await self._after_ack(
+                    "update_message",
+                    self.slack_service.update_message,
                     channel_id,
                     message_ts,
                     confirmation_blocks,
@@ -253,7 +283,7 @@ class InteractionHandler:
         try:
             user_id = payload['user']['id']
             # Get user's display name in Slack mention format
-            user_name = self.slack_service.get_user_display_name(user_id)
+            user_name = await self.slack_service.get_user_display_name(user_id, db=self.db)
             view = payload['view']
             
             logger.info(f"🔧 Edit timesheet submission for user: {user_id}")
@@ -277,8 +307,7 @@ class InteractionHandler:
             
             # Get values from form for all entries
             values = view['state']['values']
-            updates = []
-            new_entries = []
+            rows = []
             errors = {}
             
             # Count how many form entries we have
@@ -291,13 +320,8 @@ class InteractionHandler:
             
             logger.info(f"📊 Form has {form_entry_count} entries, existing entries: {len(entry_ids)}")
             
-            # Determine which entries to delete (if form has fewer entries than existing)
-            entries_to_delete = []
-            if form_entry_count < len(entry_ids):
-                entries_to_delete = entry_ids[form_entry_count:]  # Entries beyond form count
-                logger.info(f"🗑️ Will delete {len(entries_to_delete)} entries: {entries_to_delete}")
-            
-            # Process all form entries
+            # Desired state, one row per form entry: rows past the existing entries are new,
+            # existing entries past the last row are deleted, and None leaves an entry as is
             for i in range(form_entry_count):
                 client_block = values.get(f'client_block_{i}', {})
                 hours_block = values.get(f'hours_block_{i}', {})
@@ -307,6 +331,7 @@ class InteractionHandler:
                 
                 # Skip empty entries
                 if not client_name and not hours_value:
+                    rows.append(None)
                     continue
                 
                 if not client_name:
@@ -323,19 +348,10 @@ class InteractionHandler:
                     errors[f'hours_block_{i}'] = "Hours must be a valid number"
                     continue
                 
-                # If this is an existing entry, add to updates
-                if i < len(entry_ids):
-                    updates.append({
-                        'entry_id': entry_ids[i],
-                        'client_name': client_name,
-                        'hours': hours
-                    })
-                else:
-                    # This is a new entry, add to new_entries
-                    new_entries.append({
-                        'client_name': client_name,
-                        'hours': hours
-                    })
+                rows.append({
+                    'client_name': client_name,
+                    'hours': hours
+                })
             
             if errors:
                 return {
@@ -343,79 +359,39 @@ class InteractionHandler:
                     "errors": errors
                 }
             
-            # Update existing timesheet entries
-            successful_updates = []
-            logger.info(f"🔄 Attempting to update {len(updates)} existing entries")
-            for update in updates:
-                logger.info(f"🔄 Updating entry {update['entry_id']}: {update['client_name']} - {update['hours']} hours")
-                updated_entry = TimesheetService.update_timesheet_entry(
-                    db=self.db,
-                    entry_id=update['entry_id'],
-                    user_id=user_id,
-                    client_name=update['client_name'],
-                    hours=update['hours'],
-                    channel_id=channel_id  # Include channel_id in update
-                )
-                if updated_entry:
-                    logger.info(f"✅ Successfully updated entry {update['entry_id']}")
-                    successful_updates.append(update)
-                else:
-                    logger.error(f"❌ Failed to update entry {update['entry_id']}")
-            
-            # Create new timesheet entries
-            successful_new_entries = []
-            logger.info(f"🆕 Attempting to create {len(new_entries)} new entries")
-            for new_entry in new_entries:
-                logger.info(f"🆕 Creating new entry: {new_entry['client_name']} - {new_entry['hours']} hours")
-                created_entry = TimesheetService.create_entry(
-                    db=self.db,
-                    user_id=user_id,
-                    username=user_name,
-                    channel_id=channel_id,
-                    client_name=new_entry['client_name'],
-                    hours=new_entry['hours'],
-                    timesheet_type=metadata.get('timesheet_type', 'weekly')
-                )
-                if created_entry:
-                    logger.info(f"✅ Successfully created new entry {created_entry.id}")
-                    successful_new_entries.append(new_entry)
-                else:
-                    logger.error(f"❌ Failed to create new entry")
-            
-            # Delete entries that are no longer needed (when reducing entry count)
-            successful_deletions = []
-            logger.info(f"🗑️ Attempting to delete {len(entries_to_delete)} entries")
-            for entry_id in entries_to_delete:
-                logger.info(f"🗑️ Deleting entry {entry_id}")
-                deleted = TimesheetService.delete_timesheet_entry(
-                    db=self.db,
-                    entry_id=entry_id,
-                    user_id=user_id
-                )
-                if deleted:
-                    logger.info(f"✅ Successfully deleted entry {entry_id}")
-                    successful_deletions.append(entry_id)
-                else:
-                    logger.error(f"❌ Failed to delete entry {entry_id}")
-            
-            logger.info(f"📊 Successfully updated {len(successful_updates)} entries, created {len(successful_new_entries)} new entries, and deleted {len(successful_deletions)} entries")
+            # Apply all updates, inserts and deletes in one transaction
+            edit = await TimesheetService.apply_edit_async(
+                db=self.db,
+                user_id=user_id,
+                username=user_name,
+                channel_id=channel_id,
+                entry_ids=entry_ids,
+                rows=rows,
+                timesheet_type=metadata.get('timesheet_type', 'weekly')
+            )
             
-            if not successful_updates and not successful_new_entries and not successful_deletions:
+            if edit is None:
                 return {
                     "response_action": "errors",
                     "errors": {"client_block_0": "Failed to update timesheet. The entries may have been modified by someone else."}
                 }
             
+            logger.info(f"📊 Updated {len(edit['updated'])} entries, created {len(edit['created'])} new entries, deleted {len(edit['deleted'])} entries, {edit['unchanged']} unchanged")
+            
             # Send DM confirmation with all updated, new, and deleted entries
             update_text = "✅ Your timesheet has been updated:\n"
-            for update in successful_updates:
+            for update in edit['updated']:
                 update_text += f"• {update['client_name']}: {update['hours']} hours (updated)\n"
-            for new_entry in successful_new_entries:
+            for new_entry in edit['created']:
                 update_text += f"• {new_entry['client_name']}: {new_entry['hours']} hours (new)\n"
-            if successful_deletions:
-                update_text += f"\n🗑️ Removed {len(successful_deletions)} entries\n"
-            
-            self.slack_service.send_dm(
+            if edit['deleted']:
+                update_text += f"\n🗑️ Removed {len(edit['deleted'])} entries\n"
+            if not edit['updated'] and not edit['created'] and not edit['deleted']:
+                update_text = "✅ Your timesheet is unchanged.\n"
+            
+            await self._after_ack(
+                "send_dm",
+                self.slack_service.send_dm,
                 user_id,
                 [{
                     "type": "section",
@@ -440,7 +416,7 @@ class InteractionHandler:
         try:
             user_id = payload['user']['id']
             # Get user's display name in Slack mention format
-            user_name = self.slack_service.get_user_display_name(user_id)
+            user_name = await self.slack_service.get_user_display_name(user_id, db=self.db)
             view = payload.get('view', {})
             state_values = view.get('state', {}).get('values', {})
             
@@ -515,14 +491,9 @@ class InteractionHandler:
                 timesheet_type = 'weekly'  # Default to weekly for 'submit_weekly_timesheet' or 'submit_timesheet'
 
             # Check if user has already submitted this timesheet type today
-            if TimesheetService.has_submitted_today(self.db, user_id, timesheet_type):
+            if await TimesheetService.has_submitted_today_async(self.db, user_id, timesheet_type):
                 logger.warning(f"User {user_id} attempted duplicate {timesheet_type} submission")
-                return {
-                    "response_action": "errors",
-                    "errors": {
-                        "client_block_0": f"You have already submitted a {timesheet_type} timesheet today. Use /edit_timesheet to modify your existing entries."
-                    }
-                }
+                return self._already_submitted_response(timesheet_type)
 
             entries = []
             skipped_entries = []
@@ -547,18 +518,23 @@ class InteractionHandler:
                     i += 1
                     continue
 
-                TimesheetService.create_entry(
+                entries.append({'client': client_name, 'hours': hours})
+                i += 1
+
+            # Save the whole submission in one transaction; the unique (user, type, day)
+            # constraint rejects a concurrent duplicate that passed the check above
+            try:
+                await TimesheetService.create_entries_async(
                     db=self.db,
                     user_id=user_id,
                     username=user_name,
                     channel_id=channel_id,
-                    client_name=client_name,
-                    hours=hours,
-                    timesheet_type=timesheet_type  # Add this parameter
+                    entries=[{'client_name': e['client'], 'hours': e['hours']} for e in entries],
+                    timesheet_type=timesheet_type
                 )
-
-                entries.append({'client': client_name, 'hours': hours})
-                i += 1
+            except IntegrityError:
+                logger.warning(f"User {user_id} raced a duplicate {timesheet_type} submission")
+                return self._already_submitted_response(timesheet_type)
 
             confirmation_text = f"✅ {timesheet_type.capitalize()} Timesheet submitted successfully!\n\n"
             for idx, entry in enumerate(entries, 1):
@@ -568,7 +544,9 @@ class InteractionHandler:
                 confirmation_text += f"\n⚠️ Entries #{', '.join(map(str, skipped_entries))} were skipped (Not Applicable - missing required fields)."
 
             # Send confirmation DM
-            self.slack_service.send_dm(
+            await self._after_ack(
+                "send_dm",
+                self.slack_service.send_dm,
                 user_id,
                 [{
                     "type": "section",
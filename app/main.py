@@ -1,9 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.routers import slack_router
-from app.database import init_db
-from app.utils.scheduler import TaskScheduler
+from app.database import init_db, async_engine
+from app.services.slack_clients import slack_transport
+from app.utils.work_queue import background_jobs
+from app.middleware.slack_request import SlackRequestMiddleware
+from app.utils.metrics import MetricsMiddleware, METRICS_CONTENT_TYPE, render_metrics, mark_process_dead
+from app.utils.scheduler import TaskScheduler, create_leader_elector
 from app.utils.logging_config import setup_logging, get_log_files_info
 from app.config import get_settings
 import logging
@@ -16,20 +20,36 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 scheduler = TaskScheduler()
 
+# Web workers and replicas all campaign; only the leader runs the scheduled jobs
+scheduler_elector = create_leader_elector(scheduler)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Slack Timesheet Bot...")
     init_db()
-    scheduler.start()
+    background_jobs.start()
+    # With RUN_SCHEDULER_IN_WEB=false the jobs run in `python -m app.worker` instead
+    if not settings.run_scheduler_in_web:
+        logger.info("In-app scheduler disabled; scheduled jobs run in the worker process")
+    elif settings.scheduler_leader_election:
+        scheduler_elector.start()
+    else:
+        scheduler.start()
     logger.info("Application started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    if settings.run_scheduler_in_web and settings.scheduler_leader_election:
+        await scheduler_elector.stop()
     scheduler.stop()
+    await background_jobs.stop()
+    await slack_transport.aclose()
+    await async_engine.dispose()
+    mark_process_dead()
     logger.info("Application stopped")
 
 
@@ -49,6 +69,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Verify and parse every Slack request once, before routing
+app.add_middleware(SlackRequestMiddleware, signing_secret=settings.slack_signing_secret)
+
+# Outermost, so request timings include signature checks and parsing
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(slack_router.router)
 
@@ -64,15 +90,41 @@ async def root():
     }
 
 
+def _scheduler_status() -> str:
+    if not settings.run_scheduler_in_web:
+        return "disabled"
+    if settings.scheduler_leader_election and not scheduler_elector.is_leader:
+        return "standby"
+    return "running"
+
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "database": "connected",
-        "scheduler": "running"
+        "scheduler": _scheduler_status()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: route, Slack API and DB latencies, DM and submission counters."""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/queue/stats")
+async def queue_stats():
+    """Get depth and throughput of the background work queue."""
+    return background_jobs.stats()
+
+
+@app.get("/scheduler/jobs")
+async def scheduler_jobs():
+    """Get progress of the latest scheduled job runs in this process."""
+    return scheduler.job_status()
+
+
 @app.get("/logs/info")
 async def logs_info():
     """Get information about current log files."""
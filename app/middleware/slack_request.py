@@ -0,0 +1,147 @@
+"""
+ASGI middleware that verifies and parses Slack requests once.
+
+Every POST under /slack/ is read once as raw bytes, checked against the
+X-Slack-Signature HMAC (with the signing key prepared at startup), parsed once
+as form or JSON, and attached to the request as a SlackRequest. Routes take it
+with Depends(get_slack_request) instead of re-reading and re-parsing the body.
+"""
+from fastapi import HTTPException, Request
+from typing import Any, Dict, Optional
+from app.utils.hot_path_log import hot_log
+from urllib.parse import parse_qsl
+import hashlib
+import hmac
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Reject requests whose timestamp is further than this from now (replay protection)
+MAX_REQUEST_AGE_SECONDS = 60 * 5
+
+
+class SlackRequest:
+    """A verified Slack request, parsed once."""
+
+    def __init__(self, body: bytes, form: Dict[str, str], payload: Dict[str, Any], raw_payload: str,
+                 retry_num: Optional[int] = None, retry_reason: Optional[str] = None):
+        # Raw request body, exactly as signed by Slack
+        self.body = body
+        # Form fields for slash commands and interactions (empty for JSON event callbacks)
+        self.form = form
+        # Event callback JSON, decoded interaction `payload` field, or the command form itself
+        self.payload = payload
+        # The undecoded JSON text behind `payload`, for hashing
+        self.raw_payload = raw_payload
+        self.retry_num = retry_num
+        self.retry_reason = retry_reason
+
+
+class SlackRequestMiddleware:
+    def __init__(self, app, signing_secret: str, path_prefix: str = "/slack/"):
+        self.app = app
+        self.path_prefix = path_prefix
+        # Keyed HMAC state computed once; each request works on a copy
+        self._hmac = hmac.new(signing_secret.encode(), digestmod=hashlib.sha256)
+
+    def verify(self, timestamp: bytes, signature: bytes, body: bytes) -> bool:
+        try:
+            if abs(time.time() - int(timestamp)) > MAX_REQUEST_AGE_SECONDS:
+                return False
+        except ValueError:
+            return False
+
+        mac = self._hmac.copy()
+        mac.update(b"v0:" + timestamp + b":" + body)
+        return hmac.compare_digest(b"v0=" + mac.hexdigest().encode(), signature)
+
+    @staticmethod
+    def parse(body: bytes, content_type: bytes, headers: Dict[bytes, bytes]) -> SlackRequest:
+        form: Dict[str, str] = {}
+        if content_type.startswith(b"application/json"):
+            raw_payload = body.decode()
+            payload = json.loads(raw_payload) if raw_payload else {}
+        else:
+            form = dict(parse_qsl(body.decode(), keep_blank_values=True))
+            if "payload" in form:
+                # Interactions arrive as a single JSON-encoded form field
+                raw_payload = form["payload"]
+                payload = json.loads(raw_payload)
+            else:
+                raw_payload = body.decode()
+                payload = form
+
+        retry_num = headers.get(b"x-slack-retry-num")
+        retry_reason = headers.get(b"x-slack-retry-reason")
+        return SlackRequest(
+            body=body,
+            form=form,
+            payload=payload,
+            raw_payload=raw_payload,
+            retry_num=int(retry_num) if retry_num and retry_num.isdigit() else None,
+            retry_reason=retry_reason.decode() if retry_reason else None
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        headers = dict(scope["headers"])
+        if not self.verify(headers.get(b"x-slack-request-timestamp", b""), headers.get(b"x-slack-signature", b""), body):
+            await self._reject(send, 403, "Invalid signature")
+            return
+
+        try:
+            slack_request = self.parse(body, headers.get(b"content-type", b""), headers)
+        except (ValueError, UnicodeDecodeError) as e:
+            logger.warning(f"Malformed Slack request to {scope['path']}: {str(e)}")
+            await self._reject(send, 400, "Malformed request body")
+            return
+
+        scope.setdefault("state", {})["slack_request"] = slack_request
+
+        # Replay the body for anything downstream that still reads it
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        # One sampling decision and log budget per request, keyed on events/interactions/commands
+        route = scope["path"][len(self.path_prefix):].split("/", 1)[0]
+        with hot_log.request(route):
+            await self.app(scope, replay_receive, send)
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str) -> None:
+        content = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())]
+        })
+        await send({"type": "http.response.body", "body": content})
+
+
+def get_slack_request(request: Request) -> SlackRequest:
+    """FastAPI dependency returning the SlackRequest attached by SlackRequestMiddleware."""
+    slack_request = getattr(request.state, "slack_request", None)
+    if slack_request is None:
+        raise HTTPException(status_code=403, detail="Invalid signature")
+    return slack_request
@@ -0,0 +1,42 @@
+"""
+Alembic environment.
+
+Runs against the connection handed over by app.database.run_migrations() when
+there is one (app startup, benchmarks), otherwise against the app's engine
+(`alembic upgrade head` from the repository root).
+"""
+from alembic import context
+from app.database import Base, engine
+from app.models import timesheet, timesheet_submission, slack_user, dm_channel, processed_interaction, scheduler_lease, channel_membership  # noqa: F401
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can only alter tables by copying them
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
+    with engine.connect() as connection:
+        run_migrations(connection)
+
+
+if context.is_offline_mode():
+    context.configure(url=str(engine.url), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+else:
+    run_migrations_online()
@@ -0,0 +1,87 @@
+"""Baseline schema, as previously created by Base.metadata.create_all
+
+Databases that predate migrations already have some or all of these tables,
+so each table is only created when it is missing.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table('timesheet_entries'):
+        op.create_table(
+            'timesheet_entries',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.String(50), nullable=False),
+            sa.Column('username', sa.String(100), nullable=False),
+            sa.Column('channel_id', sa.String(50), nullable=False),
+            sa.Column('client_name', sa.String(200), nullable=False),
+            sa.Column('hours', sa.Float(), nullable=False),
+            sa.Column('timesheet_type', sa.String(20), nullable=False),
+            sa.Column('submission_date', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_timesheet_entries_id', 'timesheet_entries', ['id'])
+        op.create_index('ix_timesheet_entries_user_id', 'timesheet_entries', ['user_id'])
+        op.create_index('ix_timesheet_entries_timesheet_type', 'timesheet_entries', ['timesheet_type'])
+        op.create_index('ix_timesheet_entries_submission_date', 'timesheet_entries', ['submission_date'])
+
+    if not _has_table('slack_users'):
+        op.create_table(
+            'slack_users',
+            sa.Column('user_id', sa.String(50), primary_key=True),
+            sa.Column('name', sa.String(100)),
+            sa.Column('real_name', sa.String(200)),
+            sa.Column('display_name', sa.String(200)),
+            sa.Column('is_bot', sa.Boolean(), nullable=False),
+            sa.Column('deleted', sa.Boolean(), nullable=False),
+            sa.Column('tz', sa.String(64)),
+            sa.Column('slack_updated', sa.Integer(), nullable=False),
+            sa.Column('synced_at', sa.DateTime()),
+        )
+        op.create_index('ix_slack_users_is_bot_deleted', 'slack_users', ['is_bot', 'deleted'])
+
+    if not _has_table('slack_dm_channels'):
+        op.create_table(
+            'slack_dm_channels',
+            sa.Column('user_id', sa.String(50), primary_key=True),
+            sa.Column('channel_id', sa.String(50), nullable=False),
+            sa.Column('updated_at', sa.DateTime()),
+        )
+
+    if not _has_table('processed_interactions'):
+        op.create_table(
+            'processed_interactions',
+            sa.Column('key', sa.String(128), primary_key=True),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_processed_interactions_created_at', 'processed_interactions', ['created_at'])
+
+    if not _has_table('scheduler_leases'):
+        op.create_table(
+            'scheduler_leases',
+            sa.Column('name', sa.String(100), primary_key=True),
+            sa.Column('holder', sa.String(200), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_leases')
+    op.drop_table('processed_interactions')
+    op.drop_table('slack_dm_channels')
+    op.drop_table('slack_users')
+    op.drop_table('timesheet_entries')
@@ -0,0 +1,38 @@
+"""Composite indexes for the timesheet_entries hot paths
+
+Reports, reminders and follow-ups filter on (timesheet_type, submission_date);
+duplicate checks, history and edits filter on (user_id, timesheet_type,
+submission_date). The single-column user_id and timesheet_type indexes are
+prefixes of the new ones and are dropped. On Postgres the indexes INCLUDE the
+columns those queries return, so they can be answered by index-only scans.
+
+Revision ID: 0002_composite_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = '0002_composite_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_timesheet_entries_type_date', 'timesheet_entries', ['timesheet_type', 'submission_date'],
+        postgresql_include=['user_id']
+    )
+    op.create_index(
+        'ix_timesheet_entries_user_type_date', 'timesheet_entries', ['user_id', 'timesheet_type', 'submission_date'],
+        postgresql_include=['id']
+    )
+    op.drop_index('ix_timesheet_entries_user_id', table_name='timesheet_entries')
+    op.drop_index('ix_timesheet_entries_timesheet_type', table_name='timesheet_entries')
+
+
+def downgrade() -> None:
+    op.create_index('ix_timesheet_entries_timesheet_type', 'timesheet_entries', ['timesheet_type'])
+    op.create_index('ix_timesheet_entries_user_id', 'timesheet_entries', ['user_id'])
+    op.drop_index('ix_timesheet_entries_user_type_date', table_name='timesheet_entries')
+    op.drop_index('ix_timesheet_entries_type_date', table_name='timesheet_entries')
@@ -0,0 +1,76 @@
+"""Stored IST day and period keys on timesheet_entries
+
+submission_date is naive IST. submission_day is its calendar day and
+period_start the Monday (weekly) or 1st of the month (monthly) it belongs
+to, both written with the entry. Period reports, reminders and duplicate
+checks become equality lookups on the new indexes. The range-scan indexes
+from 0002 are replaced; (user_id, submission_date) stays for the latest-entry
+lookup and rolling-window history.
+
+Revision ID: 0003_period_keys
+Revises: 0002_composite_indexes
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_period_keys'
+down_revision = '0002_composite_indexes'
+branch_labels = None
+depends_on = None
+
+BACKFILL_SQL = {
+    'postgresql': """
+        UPDATE timesheet_entries SET
+            submission_day = CAST(submission_date AS DATE),
+            period_start = CASE WHEN timesheet_type = 'monthly'
+                THEN CAST(date_trunc('month', submission_date) AS DATE)
+                ELSE CAST(date_trunc('week', submission_date) AS DATE) END
+        WHERE submission_date IS NOT NULL
+    """,
+    'sqlite': """
+        UPDATE timesheet_entries SET
+            submission_day = date(submission_date),
+            period_start = CASE WHEN timesheet_type = 'monthly'
+                THEN date(submission_date, 'start of month')
+                ELSE date(submission_date, '-' || ((CAST(strftime('%w', submission_date) AS INTEGER) + 6) % 7) || ' days') END
+        WHERE submission_date IS NOT NULL
+    """,
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('timesheet_entries') as batch:
+        batch.add_column(sa.Column('submission_day', sa.Date(), nullable=True))
+        batch.add_column(sa.Column('period_start', sa.Date(), nullable=True))
+
+    op.execute(BACKFILL_SQL[op.get_bind().dialect.name])
+
+    op.create_index(
+        'ix_timesheet_entries_type_period', 'timesheet_entries', ['timesheet_type', 'period_start'],
+        postgresql_include=['user_id']
+    )
+    op.create_index(
+        'ix_timesheet_entries_user_type_day', 'timesheet_entries', ['user_id', 'timesheet_type', 'submission_day'],
+        postgresql_include=['id']
+    )
+    op.create_index('ix_timesheet_entries_user_date', 'timesheet_entries', ['user_id', 'submission_date'])
+    op.drop_index('ix_timesheet_entries_user_type_date', table_name='timesheet_entries')
+    op.drop_index('ix_timesheet_entries_type_date', table_name='timesheet_entries')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_timesheet_entries_type_date', 'timesheet_entries', ['timesheet_type', 'submission_date'],
+        postgresql_include=['user_id']
+    )
+    op.create_index(
+        'ix_timesheet_entries_user_type_date', 'timesheet_entries', ['user_id', 'timesheet_type', 'submission_date'],
+        postgresql_include=['id']
+    )
+    op.drop_index('ix_timesheet_entries_user_date', table_name='timesheet_entries')
+    op.drop_index('ix_timesheet_entries_user_type_day', table_name='timesheet_entries')
+    op.drop_index('ix_timesheet_entries_type_period', table_name='timesheet_entries')
+    with op.batch_alter_table('timesheet_entries') as batch:
+        batch.drop_column('period_start')
+        batch.drop_column('submission_day')
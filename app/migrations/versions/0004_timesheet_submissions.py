@@ -0,0 +1,70 @@
+"""timesheet_submissions table referenced by timesheet_entries
+
+A submission groups the client/hours lines of one submitted timesheet, so the
+latest submission with its lines is one indexed lookup instead of a scan of the
+user's whole history. Existing entries are grouped the way
+get_latest_timesheet_entries used to group them: one submission per user,
+timesheet type and IST day.
+
+Revision ID: 0004_timesheet_submissions
+Revises: 0003_period_keys
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_timesheet_submissions'
+down_revision = '0003_period_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'timesheet_submissions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(50), nullable=False),
+        sa.Column('username', sa.String(100), nullable=False),
+        sa.Column('channel_id', sa.String(50), nullable=False),
+        sa.Column('timesheet_type', sa.String(20), nullable=False),
+        sa.Column('submission_date', sa.DateTime(), nullable=False),
+        sa.Column('submission_day', sa.Date(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_timesheet_submissions_user_date', 'timesheet_submissions', ['user_id', 'submission_date'])
+
+    with op.batch_alter_table('timesheet_entries') as batch:
+        batch.add_column(sa.Column('submission_id', sa.Integer(), nullable=True))
+        batch.create_foreign_key(
+            'fk_timesheet_entries_submission_id', 'timesheet_submissions', ['submission_id'], ['id']
+        )
+    op.create_index('ix_timesheet_entries_submission_id', 'timesheet_entries', ['submission_id'])
+
+    op.execute("""
+        INSERT INTO timesheet_submissions
+            (user_id, username, channel_id, timesheet_type, submission_date, submission_day, period_start, created_at)
+        SELECT user_id, MAX(username), MAX(channel_id), timesheet_type,
+               MAX(submission_date), submission_day, MIN(period_start), MIN(created_at)
+        FROM timesheet_entries
+        WHERE submission_day IS NOT NULL
+        GROUP BY user_id, timesheet_type, submission_day
+    """)
+    op.execute("""
+        UPDATE timesheet_entries SET submission_id = (
+            SELECT s.id FROM timesheet_submissions s
+            WHERE s.user_id = timesheet_entries.user_id
+              AND s.timesheet_type = timesheet_entries.timesheet_type
+              AND s.submission_day = timesheet_entries.submission_day
+        )
+        WHERE submission_day IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_timesheet_entries_submission_id', table_name='timesheet_entries')
+    with op.batch_alter_table('timesheet_entries') as batch:
+        batch.drop_constraint('fk_timesheet_entries_submission_id', type_='foreignkey')
+        batch.drop_column('submission_id')
+    op.drop_index('ix_timesheet_submissions_user_date', table_name='timesheet_submissions')
+    op.drop_table('timesheet_submissions')
@@ -0,0 +1,58 @@
+"""One submission per user, timesheet type and IST day
+
+The duplicate check before a submission is written is not atomic, so two
+deliveries of the same form could both pass it. The unique constraint makes
+the database reject the second one. Same-day submissions recorded since 0004
+are merged into the earliest one first, the way 0004 grouped older entries.
+
+Revision ID: 0005_unique_daily_submission
+Revises: 0004_timesheet_submissions
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = '0005_unique_daily_submission'
+down_revision = '0004_timesheet_submissions'
+branch_labels = None
+depends_on = None
+
+SAME_DAY = """
+    o.user_id = s.user_id
+    AND o.timesheet_type = s.timesheet_type
+    AND o.submission_day = s.submission_day
+"""
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        UPDATE timesheet_entries SET submission_id = (
+            SELECT MIN(o.id) FROM timesheet_submissions s
+            JOIN timesheet_submissions o ON {SAME_DAY}
+            WHERE s.id = timesheet_entries.submission_id
+        )
+        WHERE submission_id IS NOT NULL
+    """)
+    op.execute(f"""
+        UPDATE timesheet_submissions SET submission_date = (
+            SELECT MAX(o.submission_date) FROM timesheet_submissions s
+            JOIN timesheet_submissions o ON {SAME_DAY}
+            WHERE s.id = timesheet_submissions.id
+        )
+    """)
+    op.execute(f"""
+        DELETE FROM timesheet_submissions WHERE EXISTS (
+            SELECT 1 FROM timesheet_submissions s
+            JOIN timesheet_submissions o ON {SAME_DAY}
+            WHERE s.id = timesheet_submissions.id AND o.id < s.id
+        )
+    """)
+
+    with op.batch_alter_table('timesheet_submissions') as batch:
+        batch.create_unique_constraint(
+            'uq_timesheet_submissions_user_type_day', ['user_id', 'timesheet_type', 'submission_day']
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('timesheet_submissions') as batch:
+        batch.drop_constraint('uq_timesheet_submissions_user_type_day', type_='unique')
@@ -0,0 +1,38 @@
+"""Channel membership shared by the web and worker processes
+
+The bot's channels and each channel's members were cached per process, and
+only the web processes received the membership events that keep them current.
+Stored here, the scheduler worker reads what the events applied, so reminders
+go back to Slack only when a listing is missing or older than the TTL.
+
+Revision ID: 0006_channel_membership
+Revises: 0005_unique_daily_submission
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_channel_membership'
+down_revision = '0005_unique_daily_submission'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'slack_channels',
+        sa.Column('channel_id', sa.String(50), primary_key=True),
+        sa.Column('bot_member', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('listed_at', sa.DateTime()),
+        sa.Column('members_loaded_at', sa.DateTime()),
+    )
+    op.create_table(
+        'slack_channel_members',
+        sa.Column('channel_id', sa.String(50), primary_key=True),
+        sa.Column('user_id', sa.String(50), primary_key=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('slack_channel_members')
+    op.drop_table('slack_channels')
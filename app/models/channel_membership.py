@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Boolean, DateTime
+from app.database import Base
+
+
+class SlackChannel(Base):
+    """A channel seen in users.conversations listings or membership events."""
+    __tablename__ = "slack_channels"
+
+    channel_id = Column(String(50), primary_key=True)
+    bot_member = Column(Boolean, nullable=False, default=False)
+    listed_at = Column(DateTime)  # Naive IST time of the users.conversations listing that last included it
+    members_loaded_at = Column(DateTime)  # Naive IST time of the last complete conversations.members listing; NULL while unknown
+
+    def __repr__(self):
+        return f"<SlackChannel(id={self.channel_id}, bot_member={self.bot_member})>"
+
+
+class SlackChannelMember(Base):
+    """A member of a channel, as last listed and then updated by membership events."""
+    __tablename__ = "slack_channel_members"
+
+    channel_id = Column(String(50), primary_key=True)
+    user_id = Column(String(50), primary_key=True)
+
+    def __repr__(self):
+        return f"<SlackChannelMember(channel={self.channel_id}, user={self.user_id})>"
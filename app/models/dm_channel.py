@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+from app.utils.timezone import get_ist_now
+
+
+class SlackDMChannel(Base):
+    """Persisted user_id -> IM channel_id mapping so DMs can skip conversations.open."""
+    __tablename__ = "slack_dm_channels"
+
+    user_id = Column(String(50), primary_key=True)
+    channel_id = Column(String(50), nullable=False)
+    updated_at = Column(DateTime, default=lambda: get_ist_now().replace(tzinfo=None))
+
+    def __repr__(self):
+        return f"<SlackDMChannel(user={self.user_id}, channel={self.channel_id})>"
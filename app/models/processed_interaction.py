@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+from app.utils.timezone import get_ist_now
+
+
+class ProcessedInteraction(Base):
+    """Idempotency key of an interaction payload that has already been handled."""
+    __tablename__ = "processed_interactions"
+
+    key = Column(String(128), primary_key=True)
+    created_at = Column(DateTime, default=lambda: get_ist_now().replace(tzinfo=None), index=True)
+
+    def __repr__(self):
+        return f"<ProcessedInteraction(key={self.key})>"
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+
+class SchedulerLease(Base):
+    """Time-limited lease naming the process that owns a singleton job runner (non-Postgres databases)."""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(200), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SchedulerLease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
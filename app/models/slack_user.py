@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from app.database import Base
+from app.utils.timezone import get_ist_now
+
+
+class SlackUser(Base):
+    """Local copy of the workspace roster, synced in bulk from users.list."""
+    __tablename__ = "slack_users"
+
+    user_id = Column(String(50), primary_key=True)
+    name = Column(String(100))
+    real_name = Column(String(200))
+    display_name = Column(String(200))
+    is_bot = Column(Boolean, nullable=False, default=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    tz = Column(String(64))
+    slack_updated = Column(Integer, nullable=False, default=0)  # Slack's "updated" epoch, used to skip unchanged users
+    synced_at = Column(DateTime, default=lambda: get_ist_now().replace(tzinfo=None))
+
+    __table_args__ = (
+        Index('ix_slack_users_is_bot_deleted', 'is_bot', 'deleted'),
+    )
+
+    @property
+    def best_name(self) -> str:
+        return self.real_name or self.display_name or self.name or f"User_{self.user_id}"
+
+    def __repr__(self):
+        return f"<SlackUser(id={self.user_id}, name={self.name}, bot={self.is_bot}, deleted={self.deleted})>"
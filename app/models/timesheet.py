@@ -1,21 +1,55 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Index, ForeignKey
+from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Any, Dict
 from app.database import Base
-from app.utils.timezone import get_ist_now
+from app.utils.timezone import get_ist_now, get_period_start
+from app.models.timesheet_submission import TimesheetSubmission  # noqa: F401  (registers the relationship target)
+
+
+def submission_keys(timesheet_type: str, submitted_at: datetime) -> Dict[str, Any]:
+    """submission_date (naive IST) with the IST day and period keys derived from it."""
+    day = submitted_at.date()
+    return {
+        'submission_date': submitted_at,
+        'submission_day': day,
+        'period_start': get_period_start(timesheet_type, day)
+    }
 
 
 class TimesheetEntry(Base):
     __tablename__ = "timesheet_entries"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(50), nullable=False, index=True)
+    submission_id = Column(Integer, ForeignKey('timesheet_submissions.id', name='fk_timesheet_entries_submission_id'), index=True)  # Null only for unmigrated rows
+    user_id = Column(String(50), nullable=False)
     username = Column(String(100), nullable=False)
     channel_id = Column(String(50), nullable=False)
     client_name = Column(String(200), nullable=False)
     hours = Column(Float, nullable=False)
-    timesheet_type = Column(String(20), nullable=False, default='weekly', index=True)  # 'weekly' or 'monthly'
+    timesheet_type = Column(String(20), nullable=False, default='weekly')  # 'weekly' or 'monthly'
     submission_date = Column(DateTime, default=lambda: get_ist_now().replace(tzinfo=None), index=True)
     created_at = Column(DateTime, default=lambda: get_ist_now().replace(tzinfo=None))
+    # Written together with submission_date (see set_submitted_at) so period queries are equality lookups
+    submission_day = Column(Date)  # IST calendar day of submission_date
+    period_start = Column(Date)  # IST Monday (weekly) or 1st of month (monthly) of the period submitted for
+    
+    submission = relationship("TimesheetSubmission", back_populates="entries")
+    
+    # Schema changes go through app/migrations; these mirror 0003_period_keys
+    __table_args__ = (
+        # Reports, reminders and follow-ups: every entry of one type for one period
+        Index('ix_timesheet_entries_type_period', 'timesheet_type', 'period_start', postgresql_include=['user_id']),
+        # Duplicate checks and the latest submission: one user's entries of one type on one day
+        Index('ix_timesheet_entries_user_type_day', 'user_id', 'timesheet_type', 'submission_day', postgresql_include=['id']),
+        # A user's most recent entry and rolling-window history
+        Index('ix_timesheet_entries_user_date', 'user_id', 'submission_date'),
+    )
+    
+    def set_submitted_at(self, submitted_at: datetime) -> None:
+        """Set submission_date (naive IST) and its day and period keys."""
+        for column, value in submission_keys(self.timesheet_type, submitted_at).items():
+            setattr(self, column, value)
     
     def __repr__(self):
         return f"<TimesheetEntry(user={self.username}, client={self.client_name}, hours={self.hours}, type={self.timesheet_type})>"
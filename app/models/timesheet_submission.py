@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+from app.utils.timezone import get_ist_now, get_period_start
+
+
+class TimesheetSubmission(Base):
+    """One submitted timesheet; its client/hours lines are TimesheetEntry rows."""
+    __tablename__ = "timesheet_submissions"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String(50), nullable=False)
+    username = Column(String(100), nullable=False)
+    channel_id = Column(String(50), nullable=False)
+    timesheet_type = Column(String(20), nullable=False, default='weekly')  # 'weekly' or 'monthly'
+    submission_date = Column(DateTime, nullable=False)  # Naive IST, bumped when the submission is edited
+    submission_day = Column(Date, nullable=False)
+    period_start = Column(Date, nullable=False)
+    created_at = Column(DateTime, default=lambda: get_ist_now().replace(tzinfo=None))
+
+    entries = relationship("TimesheetEntry", back_populates="submission", order_by="TimesheetEntry.id")
+
+    # Schema changes go through app/migrations; these mirror 0004_timesheet_submissions and 0005_unique_daily_submission
+    __table_args__ = (
+        # A user's latest submission
+        Index('ix_timesheet_submissions_user_date', 'user_id', 'submission_date'),
+        # One timesheet of each type per user per day, even when duplicate checks race
+        UniqueConstraint('user_id', 'timesheet_type', 'submission_day', name='uq_timesheet_submissions_user_type_day'),
+    )
+
+    def set_submitted_at(self, submitted_at: datetime) -> None:
+        """Set submission_date (naive IST) and its day and period keys."""
+        self.submission_date = submitted_at
+        self.submission_day = submitted_at.date()
+        self.period_start = get_period_start(self.timesheet_type, self.submission_day)
+
+    def __repr__(self):
+        return f"<TimesheetSubmission(id={self.id}, user={self.username}, type={self.timesheet_type}, day={self.submission_day})>"
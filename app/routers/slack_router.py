@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.handlers.interaction_handler import InteractionHandler
 from app.handlers.command_handler import CommandHandler
 from app.utils.block_builder import BlockBuilder
+from app.services.slack_service import get_slack_service
+from app.services.channel_membership_service import channel_membership
+from app.services.async_slack_service import get_async_slack_service
+from app.services.idempotency_service import processed_interactions, interaction_key
+from app.middleware.slack_request import SlackRequest, get_slack_request
+from app.utils.hot_path_log import hot_log, LazyJSON
 from app.config import get_settings
-import json
-import hmac
-import hashlib
-import time
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,33 +20,9 @@ router = APIRouter(prefix="/slack", tags=["slack"])
 settings = get_settings()
 
 
-def verify_slack_signature(request: Request, body: bytes) -> bool:
-    timestamp = request.headers.get("X-Slack-Request-Timestamp", "")
-    slack_signature = request.headers.get("X-Slack-Signature", "")
-    
-    # Prevent replay attacks
-    if abs(time.time() - int(timestamp)) > 60 * 5:
-        return False
-    
-    sig_basestring = f"v0:{timestamp}:{body.decode()}"
-    my_signature = 'v0=' + hmac.new(
-        settings.slack_signing_secret.encode(),
-        sig_basestring.encode(),
-        hashlib.sha256
-    ).hexdigest()
-    
-    return hmac.compare_digest(my_signature, slack_signature)
-
-
 @router.post("/events")
-async def handle_events(request: Request, db: Session = Depends(get_db)):
-    body = await request.body()
-    
-    # Verify signature
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    payload = await request.json()
+async def handle_events(slack: SlackRequest = Depends(get_slack_request)):
+    payload = slack.payload
     
     # Handle URL verification
     if payload.get("type") == "url_verification":
@@ -55,36 +34,40 @@ async def handle_events(request: Request, db: Session = Depends(get_db)):
     # Log event for debugging
     logger.info(f"Received event: {event.get('type')}")
     
+    # Keep the stored channel membership (read by the scheduler worker too) current; the
+    # bot's own user ID tells "bot joined/left a channel" apart from ordinary member changes
+    authorizations = payload.get("authorizations") or [{}]
+    bot_user_id = authorizations[0].get("user_id")
+    await asyncio.to_thread(channel_membership.apply_event, event, bot_user_id)
+    
     return JSONResponse(content={"status": "ok"})
 
 
 @router.post("/interactions")
-async def handle_interactions(request: Request, db: Session = Depends(get_db)):
-    body = await request.body()
-    
-    # Verify signature
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    # Parse payload
-    form_data = await request.form()
-    payload = json.loads(form_data.get("payload", "{}"))
+async def handle_interactions(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
+    payload = slack.payload
     
     interaction_type = payload.get("type")
+    if interaction_type not in ("block_actions", "view_submission"):
+        return JSONResponse(content={"status": "ok"})
     
-    # Handle different interaction types
-    if interaction_type == "block_actions":
-        handler = InteractionHandler(db)
-        response = await handler.handle_interaction(payload)
-        return JSONResponse(content=response)
+    # A modal submitted again after a slow response is handled once
+    key = interaction_key(payload, slack.raw_payload)
+    if not await processed_interactions.claim_async(key):
+        logger.info(f"Skipping duplicate {interaction_type} delivery (retry {slack.retry_num or 0})")
+        if interaction_type == "view_submission":
+            return JSONResponse(content={"response_action": "clear"})
+        return JSONResponse(content={"status": "ok"})
     
-    elif interaction_type == "view_submission":
-        # Handle modal submission
-        handler = InteractionHandler(db)
-        response = await handler.handle_interaction(payload)
-        return JSONResponse(content=response)
+    # Handle block actions and modal submissions
+    handler = InteractionHandler(db, slack_service=get_async_slack_service())
+    response = await handler.handle_interaction(payload)
     
-    return JSONResponse(content={"status": "ok"})
+    # Nothing was applied, so a retry of this payload should be handled again
+    if response.get("response_action") == "errors":
+        await processed_interactions.release_async(key)
+    
+    return JSONResponse(content=response)
 
 
 # @router.post("/commands/timesheet")
@@ -112,12 +95,8 @@ async def handle_interactions(request: Request, db: Session = Depends(get_db)):
 #     return JSONResponse(content=response)
 
 @router.post("/commands/postTimesheetWeekly")
-async def handle_weekly_timesheet(request: Request, db: Session = Depends(get_db)):
-    body = await request.body()
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-
-    form_data = await request.form()
+async def handle_weekly_timesheet(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
+    form_data = slack.form
     payload = {
         "user_id": form_data.get("user_id"),
         "channel_id": form_data.get("channel_id"),
@@ -125,22 +104,18 @@ async def handle_weekly_timesheet(request: Request, db: Session = Depends(get_db
         "trigger_id": form_data.get("trigger_id"),
     }
 
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_timesheet_weekly_command(payload)
 
-    logger.info(body)
-    logger.info(payload)
-    logger.info(response)
+    hot_log.info(logger, "Command body: %s", slack.body)
+    hot_log.info(logger, "Command payload: %s", payload)
+    hot_log.info(logger, "Command response: %s", LazyJSON(response))
 
     return JSONResponse(content=response)
 
 @router.post("/commands/postTimesheetMonthly")
-async def handle_monthly_timesheet(request: Request, db: Session = Depends(get_db)):
-    body = await request.body()
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-
-    form_data = await request.form()
+async def handle_monthly_timesheet(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
+    form_data = slack.form
     payload = {
         "user_id": form_data.get("user_id"),
         "channel_id": form_data.get("channel_id"),
@@ -148,63 +123,46 @@ async def handle_monthly_timesheet(request: Request, db: Session = Depends(get_d
         "trigger_id": form_data.get("trigger_id"),
     }
 
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_timesheet_monthly_command(payload)
 
-    logger.info(body)
-    logger.info(payload)
-    logger.info(response)
+    hot_log.info(logger, "Command body: %s", slack.body)
+    hot_log.info(logger, "Command payload: %s", payload)
+    hot_log.info(logger, "Command response: %s", LazyJSON(response))
 
     return JSONResponse(content=response)
 
 @router.post("/commands/getTimesheetWeeklyReport")
-async def handle_weekly_report(request: Request, db: Session = Depends(get_db)):
-    body = await request.body()
-    
-    # Verify signature
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    form_data = await request.form()
+async def handle_weekly_report(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
+    form_data = slack.form
     payload = {
         "user_id": form_data.get("user_id"),
         "channel_id": form_data.get("channel_id")
     }
     
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_weekly_report(payload)
     
     return JSONResponse(content=response)
 
 
 @router.post("/commands/getTimesheetMonthlyReport")
-async def handle_monthly_report(request: Request, db: Session = Depends(get_db)):
-    body = await request.body()
-    
-    # Verify signature
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    form_data = await request.form()
+async def handle_monthly_report(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
+    form_data = slack.form
     payload = {
         "user_id": form_data.get("user_id"),
         "channel_id": form_data.get("channel_id")
     }
     
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_monthly_report(payload)
     
     return JSONResponse(content=response)
 
 @router.post("/commands/edit_timesheet")
-async def handle_edit_timesheet(request: Request, db: Session = Depends(get_db)):
+async def handle_edit_timesheet(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
     """Handle the /edit_timesheet command."""
-    body = await request.body()
-    
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    form_data = await request.form()
+    form_data = slack.form
     trigger_id = form_data.get("trigger_id")
     
     if not trigger_id:
@@ -222,47 +180,37 @@ async def handle_edit_timesheet(request: Request, db: Session = Depends(get_db))
         "text": form_data.get("text", "")
     }
     
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_edit_timesheet_command(payload)
     
     return JSONResponse(content=response)
 
 @router.post("/commands/exemptUser")
-async def handle_exempt_user(request: Request, db: Session = Depends(get_db)):
+async def handle_exempt_user(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
     """Handle the /exemptUser command - Manager only."""
-    body = await request.body()
-    
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    form_data = await request.form()
+    form_data = slack.form
     
     payload = {
         "user_id": form_data.get("user_id"),
         "text": form_data.get("text", "")
     }
     
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_exempt_user_command(payload)
     
     return JSONResponse(content=response)
 
 @router.post("/commands/removeExemption")
-async def handle_remove_exemption(request: Request, db: Session = Depends(get_db)):
+async def handle_remove_exemption(slack: SlackRequest = Depends(get_slack_request), db: AsyncSession = Depends(get_async_db)):
     """Handle the /removeExemption command - Manager only."""
-    body = await request.body()
-    
-    if not verify_slack_signature(request, body):
-        raise HTTPException(status_code=403, detail="Invalid signature")
-    
-    form_data = await request.form()
+    form_data = slack.form
     
     payload = {
         "user_id": form_data.get("user_id"),
         "text": form_data.get("text", "")
     }
     
-    handler = CommandHandler(db)
+    handler = CommandHandler(db, get_async_slack_service(), get_slack_service())
     response = await handler.handle_remove_exemption_command(payload)
     
     return JSONResponse(content=response)
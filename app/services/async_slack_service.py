@@ -0,0 +1,405 @@
+from slack_sdk.errors import SlackApiError
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterable, Union, AsyncIterable
+from app.config import get_settings
+from app.utils.metrics import record_dm
+from functools import lru_cache
+from app.services.roster_service import RosterService
+from app.services.dm_channel_service import dm_channels
+from app.services.slack_clients import GovernedAsyncWebClient, slack_transport
+from app.services.channel_membership_service import channel_membership
+from app.services.slack_service import (
+    user_directory,
+    SlackListingIncomplete,
+    BOT_CHANNELS_QUERY,
+    next_cursor,
+    remember_user,
+    remember_users,
+    is_active_human,
+    store_bot_channels,
+    resolve_display_name,
+    is_stale_dm_channel,
+    build_open_modal_view,
+    log_open_modal_response,
+    log_open_modal_error,
+    build_update_modal_view,
+    log_update_modal_response,
+    log_update_modal_error,
+    format_user_mention,
+    format_user_for_display,
+)
+import asyncio
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# DM errors that will not succeed on retry
+PERMANENT_DM_ERRORS = frozenset({
+    "user_not_found",
+    "user_disabled",
+    "account_inactive",
+    "cannot_dm_bot",
+    "not_allowed_token_type",
+    "invalid_auth",
+    "missing_scope",
+})
+
+
+async def _aiter_ids(ids: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    """Iterate a plain or async iterable of IDs uniformly."""
+    if hasattr(ids, '__aiter__'):
+        async for item in ids:
+            yield item
+    else:
+        for item in ids:
+            yield item
+
+
+class AsyncSlackService:
+    """
+    AsyncWebClient-backed twin of SlackService with the same method surface.
+    Use it from async def handlers and AsyncIOScheduler jobs so Slack round-trips
+    do not block the event loop. Shares the process-wide user directory cache.
+    """
+
+    def __init__(self, client: GovernedAsyncWebClient = None):
+        self._client = client
+
+    @property
+    def client(self) -> GovernedAsyncWebClient:
+        # Resolved lazily: the shared pooled client must be created inside the running event loop
+        return self._client or slack_transport.async_client
+
+    async def post_message(self, channel: str, blocks: List[Dict[str, Any]], text: str = "") -> Optional[str]:
+        try:
+            response = await self.client.chat_postMessage(
+                channel=channel,
+                blocks=blocks,
+                text=text
+            )
+            return response['ts']
+        except SlackApiError as e:
+            logger.error(f"Error posting message: {e.response['error']}")
+            return None
+
+    async def update_message(self, channel: str, ts: str, blocks: List[Dict[str, Any]], text: str = "") -> bool:
+        try:
+            await self.client.chat_update(
+                channel=channel,
+                ts=ts,
+                blocks=blocks,
+                text=text
+            )
+            return True
+        except SlackApiError as e:
+            logger.error(f"Error updating message: {e.response['error']}")
+            return False
+
+    async def iter_channel_member_pages(self, channel: str) -> AsyncIterator[List[str]]:
+        """
+        Yield the channel's member IDs one conversations.members page at a time.
+        Served from the stored channel membership when fresh; a complete listing refreshes it.
+        Raises SlackListingIncomplete if a page after the first fails.
+        """
+        cached = await asyncio.to_thread(channel_membership.get_members, channel)
+        if cached is not None:
+            yield cached
+            return
+
+        members = []
+        cursor = None
+        try:
+            while True:
+                response = await self.client.conversations_members(
+                    channel=channel,
+                    limit=settings.slack_page_size,
+                    cursor=cursor
+                )
+                members.extend(response['members'])
+                yield response['members']
+
+                cursor = next_cursor(response)
+                if not cursor:
+                    break
+        except SlackApiError as e:
+            logger.error(f"Error getting channel members: {e.response['error']}")
+            if cursor:
+                raise SlackListingIncomplete(
+                    f"conversations.members for {channel} failed after {len(members)} members: {e.response['error']}"
+                ) from e
+            return
+
+        await asyncio.to_thread(channel_membership.set_members, channel, members)
+
+    async def get_channel_members(self, channel: str) -> List[str]:
+        members = []
+        async for page in self.iter_channel_member_pages(channel):
+            members.extend(page)
+        return members
+
+    async def iter_bot_channels(self) -> AsyncIterator[str]:
+        """
+        Yield IDs of channels where the bot is a member, following users.conversations cursors.
+        Served from the stored channel membership when fresh; a complete listing refreshes it.
+        Raises SlackListingIncomplete if a page after the first fails.
+        """
+        cached = await asyncio.to_thread(channel_membership.get_bot_channels)
+        if cached is not None:
+            for channel_id in cached:
+                yield channel_id
+            return
+
+        channel_ids = []
+        cursor = None
+        try:
+            logger.info("Getting bot channels using users.conversations API...")
+            while True:
+                response = await self.client.users_conversations(
+                    **BOT_CHANNELS_QUERY,
+                    limit=settings.slack_page_size,
+                    cursor=cursor
+                )
+                for ch in response.get('channels', []):
+                    channel_ids.append(ch['id'])
+                    yield ch['id']
+
+                cursor = next_cursor(response)
+                if not cursor:
+                    break
+        except SlackApiError as e:
+            logger.error(f"Error getting bot channels: {e.response['error']}")
+            logger.error(f"Full error response: {e.response}")
+            if cursor:
+                raise SlackListingIncomplete(
+                    f"users.conversations failed after {len(channel_ids)} channels: {e.response['error']}"
+                ) from e
+            return
+
+        await asyncio.to_thread(store_bot_channels, channel_ids)
+
+    async def get_bot_channels(self) -> List[str]:
+        """Get all channels where the bot is a member."""
+        bot_channels = [channel_id async for channel_id in self.iter_bot_channels()]
+        logger.info(f"Bot channels: {bot_channels}")
+        return bot_channels
+
+    async def get_user_info(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's directory record, from the shared cache when fresh, otherwise via users.info."""
+        cached = user_directory.get(user_id)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.client.users_info(user=user_id)
+            return remember_user(response['user'])
+        except SlackApiError as e:
+            logger.error(f"Error getting user info: {e.response['error']}")
+            return None
+
+    async def iter_workspace_users(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Page through users.list, yielding one page of raw user objects at a time."""
+        cursor = None
+        while True:
+            response = await self.client.users_list(limit=settings.roster_page_size, cursor=cursor)
+            members = response.get('members', [])
+            remember_users(members)
+            yield members
+
+            cursor = next_cursor(response)
+            if not cursor:
+                break
+
+    async def get_user_display_name(self, user_id: str, db=None) -> str:
+        """
+        Get user's actual display name for storage in DB.
+        Resolved from the local roster when an async db session is given, falling back to Slack.
+        """
+        if not user_id:
+            logger.error("No user_id provided to get_user_display_name")
+            return "Unknown User"
+
+        if db is not None:
+            try:
+                name = await RosterService.get_display_name_async(db, user_id)
+                if name:
+                    return name
+            except Exception as e:
+                logger.warning(f"Roster lookup failed for {user_id}: {str(e)}")
+
+        try:
+            return resolve_display_name(await self.get_user_info(user_id), user_id)
+        except Exception as e:
+            logger.error(f"Error getting user display name: {str(e)}")
+            return f"User_{user_id}"
+
+    async def get_file_info(self, file_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.client.files_info(file=file_id)
+            return response['file']
+        except SlackApiError as e:
+            logger.error(f"Error getting file info: {e.response['error']}")
+            return None
+
+    async def deliver_dm(self, user_id: str, blocks: List[Dict[str, Any]], text: str = "") -> str:
+        """Send a DM and return "ok" or the Slack error code, so callers can decide whether to retry."""
+        result = await self._deliver_dm(user_id, blocks, text)
+        record_dm(result == "ok")
+        return result
+
+    async def _deliver_dm(self, user_id: str, blocks: List[Dict[str, Any]], text: str = "") -> str:
+        try:
+            if not dm_channels.is_loaded:
+                await asyncio.to_thread(dm_channels.load)
+            channel_id = dm_channels.get(user_id)
+
+            if channel_id:
+                # Known DM channel: skip conversations.open
+                try:
+                    await self.client.chat_postMessage(channel=channel_id, blocks=blocks, text=text)
+                    return "ok"
+                except SlackApiError as e:
+                    if not is_stale_dm_channel(e):
+                        raise
+                    logger.info(f"Cached DM channel {channel_id} for {user_id} is stale, reopening")
+                    await asyncio.to_thread(dm_channels.invalidate, user_id)
+
+            # Open DM channel
+            response = await self.client.conversations_open(users=user_id)
+            channel_id = response['channel']['id']
+            await asyncio.to_thread(dm_channels.put, user_id, channel_id)
+
+            # Send message
+            await self.client.chat_postMessage(
+                channel=channel_id,
+                blocks=blocks,
+                text=text
+            )
+            return "ok"
+        except SlackApiError as e:
+            error = e.response.get('error', 'unknown_error')
+            logger.error(f"Error sending DM: {error}")
+            return error
+
+    async def send_dm(self, user_id: str, blocks: List[Dict[str, Any]], text: str = "") -> bool:
+        return await self.deliver_dm(user_id, blocks, text) == "ok"
+
+    async def open_modal(self, trigger_id: str, blocks: List[Dict[str, Any]], title: str = "Weekly Timesheet",
+                         callback_id: str = "submit_timesheet", private_metadata: str = None):
+        try:
+            view = build_open_modal_view(trigger_id, blocks, title, callback_id, private_metadata)
+            response = await self.client.views_open(trigger_id=trigger_id, view=view)
+            return log_open_modal_response(response)
+        except Exception as e:
+            return log_open_modal_error(e)
+
+    async def open_view(self, trigger_id: str, view_json: str) -> bool:
+        """Open a modal from a pre-rendered view (see BlockBuilder.modal_template)."""
+        try:
+            if not trigger_id:
+                raise ValueError("No trigger_id provided")
+
+            # The rendered view is spliced into the request body as is, not decoded and re-encoded
+            body = f'{{"trigger_id":{json.dumps(trigger_id)},"view":{view_json}}}'
+            response = await self.client.api_call_json("views.open", body)
+
+            if not response["ok"]:
+                logger.error(f"❌ Error in views.open response: {response}")
+                return False
+
+            logger.info(f"✅ Modal opened successfully: {response.get('view', {}).get('id', 'No view ID')}")
+            return True
+
+        except ValueError as ve:
+            logger.error(f"Validation error opening modal: {str(ve)}")
+            return False
+        except SlackApiError as e:
+            logger.error(f"Error opening modal: {e.response['error']}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error opening modal: {str(e)}")
+            return False
+
+    async def iter_users_from_channels(self, channel_ids: Union[Iterable[str], AsyncIterable[str]],
+                                       db=None) -> AsyncIterator[str]:
+        """
+        Yield unique, non-bot, non-deleted user IDs from the given channels as
+        each conversations.members page arrives. Accepts a plain or async
+        iterable of channel IDs, e.g. iter_bot_channels().
+        """
+        seen = set()
+
+        async for channel_id in _aiter_ids(channel_ids):
+            channel_total = 0
+            channel_users = 0
+            try:
+                async for members in self.iter_channel_member_pages(channel_id):
+                    channel_total += len(members)
+
+                    if db is not None:
+                        page_users, unknown = await RosterService.split_active_humans_async(db, members)
+                        if unknown:
+                            logger.info(f"📊 {len(unknown)} members of {channel_id} not in roster, falling back to users.info")
+                    else:
+                        page_users, unknown = [], members
+
+                    # Filter out bots
+                    for member_id in unknown:
+                        if is_active_human(await self.get_user_info(member_id)):
+                            page_users.append(member_id)
+
+                    channel_users += len(page_users)
+                    for user_id in page_users:
+                        if user_id not in seen:
+                            seen.add(user_id)
+                            yield user_id
+            except SlackListingIncomplete:
+                raise
+            except Exception as e:
+                logger.warning(f"Error getting members from channel {channel_id}: {str(e)}")
+                continue
+
+            logger.info(f"📊 Channel {channel_id} has {channel_total} total members, {channel_users} non-bot users")
+
+        logger.info(f"📊 Total unique users from all channels: {len(seen)}")
+
+    async def get_all_users_from_channels(self, channel_ids: Union[Iterable[str], AsyncIterable[str]],
+                                          db=None) -> List[str]:
+        """
+        Get all user IDs from the given channels where bot is present.
+        Excludes bots and deleted users and returns unique user IDs.
+        """
+        return [user_id async for user_id in self.iter_users_from_channels(channel_ids, db=db)]
+
+    def format_user_mention(self, user_id: str) -> str:
+        return format_user_mention(user_id)
+
+    def format_user_for_display(self, user_id: str, stored_username: str) -> str:
+        return format_user_for_display(user_id, stored_username)
+
+    async def update_modal_view(self, view_id: str, blocks: List[Dict[str, Any]], title: str = "Weekly Timesheet",
+                                callback_id: str = "timesheet_modal", private_metadata: str = None) -> bool:
+        """Update an existing modal view"""
+        try:
+            view_payload = build_update_modal_view(view_id, blocks, title, callback_id, private_metadata)
+            response = await self.client.views_update(view_id=view_id, view=view_payload)
+            return log_update_modal_response(response)
+        except SlackApiError as e:
+            return log_update_modal_error(e)
+
+    async def update_view(self, view_id: str, view_json: str) -> bool:
+        """Update an existing modal with a pre-rendered view (see BlockBuilder.modal_template)."""
+        try:
+            body = f'{{"view_id":{json.dumps(view_id)},"view":{view_json}}}'
+            response = await self.client.api_call_json("views.update", body)
+            logger.info(f"✅ View {response.get('view', {}).get('id', view_id)} updated")
+            return True
+        except SlackApiError as e:
+            logger.error(f"❌ Error updating view {view_id}: {e.response.get('error', 'Unknown')}")
+            return False
+
+
+@lru_cache()
+def get_async_slack_service() -> AsyncSlackService:
+    """Process-wide AsyncSlackService on the shared pooled transport."""
+    return AsyncSlackService()
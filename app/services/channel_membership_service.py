@@ -0,0 +1,171 @@
+"""
+The bot's channels and each channel's members, shared by every process.
+
+Listings are stored in slack_channels / slack_channel_members and kept current
+between expiries by Slack Events API membership events (member_joined_channel,
+member_left_channel, channel_left, channel_archive), applied by whichever web
+process receives them. The scheduler worker reads the same rows, so reminders
+only list a channel again once its stored listing is older than the TTL.
+
+Every method blocks on the database; async callers run them with asyncio.to_thread.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.channel_membership import SlackChannel, SlackChannelMember
+from app.utils.timezone import get_ist_now
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _now() -> datetime:
+    return get_ist_now().replace(tzinfo=None)
+
+
+class ChannelMembershipStore:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+
+    def _fresh(self, loaded_at: Optional[datetime]) -> bool:
+        return loaded_at is not None and _now() - loaded_at < timedelta(seconds=self.ttl_seconds)
+
+    def _write(self, description: str, apply) -> None:
+        """Run `apply(db)` in its own transaction; a failed write only costs a refetch later."""
+        db = SessionLocal()
+        try:
+            apply(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Error storing {description}: {str(e)}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _channel(db, channel_id: str) -> SlackChannel:
+        return db.get(SlackChannel, channel_id) or SlackChannel(channel_id=channel_id, bot_member=False)
+
+    def get_members(self, channel_id: str) -> Optional[List[str]]:
+        """The stored member list, or None if it is unknown or older than the TTL."""
+        db = SessionLocal()
+        try:
+            channel = db.get(SlackChannel, channel_id)
+            if channel is None or not self._fresh(channel.members_loaded_at):
+                return None
+            rows = db.query(SlackChannelMember.user_id).filter(SlackChannelMember.channel_id == channel_id).all()
+            return [user_id for (user_id,) in rows]
+        except Exception as e:
+            logger.warning(f"Error reading members of {channel_id}: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def set_members(self, channel_id: str, members: List[str]) -> None:
+        """Replace a channel's member list with a complete listing."""
+        def apply(db):
+            channel = self._channel(db, channel_id)
+            channel.members_loaded_at = _now()
+            db.merge(channel)
+            db.query(SlackChannelMember).filter(SlackChannelMember.channel_id == channel_id).delete()
+            db.bulk_insert_mappings(SlackChannelMember, [
+                {'channel_id': channel_id, 'user_id': user_id} for user_id in set(members)
+            ])
+        self._write(f"members of {channel_id}", apply)
+
+    def get_bot_channels(self) -> Optional[List[str]]:
+        """The bot's channels, or None if the last users.conversations listing is missing or older than the TTL."""
+        db = SessionLocal()
+        try:
+            listed_at = db.query(func.max(SlackChannel.listed_at)).scalar()
+            if not self._fresh(listed_at):
+                return None
+            rows = db.query(SlackChannel.channel_id).filter(SlackChannel.bot_member.is_(True)).all()
+            return [channel_id for (channel_id,) in rows]
+        except Exception as e:
+            logger.warning(f"Error reading bot channels: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def set_bot_channels(self, channel_ids: List[str]) -> None:
+        """Record a complete users.conversations listing."""
+        def apply(db):
+            now = _now()
+            db.query(SlackChannel).filter(SlackChannel.channel_id.notin_(channel_ids)).update(
+                {SlackChannel.bot_member: False}, synchronize_session=False
+            )
+            for channel_id in set(channel_ids):
+                channel = self._channel(db, channel_id)
+                channel.bot_member = True
+                channel.listed_at = now
+                db.merge(channel)
+        self._write("bot channels", apply)
+
+    def add_member(self, channel_id: str, user_id: str) -> None:
+        self._write(f"member {user_id} of {channel_id}", lambda db: db.merge(
+            SlackChannelMember(channel_id=channel_id, user_id=user_id)
+        ))
+
+    def remove_member(self, channel_id: str, user_id: str) -> None:
+        self._write(f"member {user_id} of {channel_id}", lambda db: db.query(SlackChannelMember).filter(
+            SlackChannelMember.channel_id == channel_id,
+            SlackChannelMember.user_id == user_id
+        ).delete())
+
+    def _set_bot_member(self, channel_id: str, bot_member: bool) -> None:
+        def apply(db):
+            channel = self._channel(db, channel_id)
+            channel.bot_member = bot_member
+            # The bot could not see the channel's members while outside it
+            channel.members_loaded_at = None
+            db.merge(channel)
+            db.query(SlackChannelMember).filter(SlackChannelMember.channel_id == channel_id).delete()
+        self._write(f"bot membership of {channel_id}", apply)
+
+    def add_bot_channel(self, channel_id: str) -> None:
+        self._set_bot_member(channel_id, True)
+
+    def remove_bot_channel(self, channel_id: str) -> None:
+        self._set_bot_member(channel_id, False)
+
+    def invalidate_bot_channels(self) -> None:
+        self._write("bot channel invalidation", lambda db: db.query(SlackChannel).update(
+            {SlackChannel.listed_at: None}, synchronize_session=False
+        ))
+
+    def apply_event(self, event: Dict[str, Any], bot_user_id: Optional[str] = None) -> bool:
+        """
+        Apply a Slack membership event. Returns True if the event type was handled.
+        Applying the same event twice is harmless, so Slack retries need no de-duplication.
+        """
+        event_type = event.get("type")
+        channel_id = event.get("channel")
+        user_id = event.get("user")
+
+        if event_type == "member_joined_channel" and channel_id:
+            if bot_user_id and user_id == bot_user_id:
+                self.add_bot_channel(channel_id)
+            else:
+                self.add_member(channel_id, user_id)
+        elif event_type == "member_left_channel" and channel_id:
+            if bot_user_id and user_id == bot_user_id:
+                self.remove_bot_channel(channel_id)
+            else:
+                self.remove_member(channel_id, user_id)
+        elif event_type in ("channel_left", "group_left", "channel_archive", "group_archive") and channel_id:
+            self.remove_bot_channel(channel_id)
+        elif event_type in ("channel_unarchive", "group_unarchive"):
+            self.invalidate_bot_channels()
+        else:
+            return False
+
+        logger.debug(f"Applied {event_type} to channel membership (channel={channel_id}, user={user_id})")
+        return True
+
+
+# Shared by every Slack service instance in the process
+channel_membership = ChannelMembershipStore(ttl_seconds=settings.channel_members_ttl_seconds)
@@ -0,0 +1,87 @@
+"""
+Cache of DM (IM) channel IDs per user.
+
+conversations.open returns the same IM channel for a user every time, so the
+mapping is persisted in slack_dm_channels and fronted by an in-memory dict.
+DMs to known users go straight to chat.postMessage.
+"""
+import logging
+import threading
+from typing import Dict, Optional
+from app.database import SessionLocal
+from app.models.dm_channel import SlackDMChannel
+from app.utils.timezone import get_ist_now
+
+logger = logging.getLogger(__name__)
+
+# Errors from chat.postMessage that mean the cached channel is no longer usable
+STALE_CHANNEL_ERRORS = frozenset({"channel_not_found", "is_archived"})
+
+
+class DMChannelStore:
+    def __init__(self):
+        self._channels: Dict[str, str] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def load(self) -> None:
+        """Load every persisted mapping into memory (once per process)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            db = SessionLocal()
+            try:
+                rows = db.query(SlackDMChannel.user_id, SlackDMChannel.channel_id).all()
+                self._channels.update({user_id: channel_id for user_id, channel_id in rows})
+                logger.info(f"Loaded {len(rows)} cached DM channels")
+            except Exception as e:
+                logger.error(f"Error loading DM channel cache: {str(e)}")
+            finally:
+                db.close()
+            self._loaded = True
+
+    def get(self, user_id: str) -> Optional[str]:
+        """Return the cached channel ID; call load() first to include persisted entries."""
+        return self._channels.get(user_id)
+
+    def put(self, user_id: str, channel_id: str) -> None:
+        if self._channels.get(user_id) == channel_id:
+            return
+        self._channels[user_id] = channel_id
+
+        db = SessionLocal()
+        try:
+            db.merge(SlackDMChannel(
+                user_id=user_id,
+                channel_id=channel_id,
+                updated_at=get_ist_now().replace(tzinfo=None)
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Error persisting DM channel for {user_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def invalidate(self, user_id: str) -> None:
+        self._channels.pop(user_id, None)
+
+        db = SessionLocal()
+        try:
+            db.query(SlackDMChannel).filter(SlackDMChannel.user_id == user_id).delete()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Error invalidating DM channel for {user_id}: {str(e)}")
+        finally:
+            db.close()
+
+
+# Shared by every Slack service instance in the process
+dm_channels = DMChannelStore()
@@ -0,0 +1,106 @@
+"""
+Idempotency keys for Slack interaction payloads.
+
+A user who presses Submit again after a slow response (or double-clicks it)
+sends the same modal twice. The payloads differ (trigger_id), but the view ID
+and view hash do not, so a view_submission is claimed once under those; other
+interactions are keyed on a hash of the raw payload. The processed_interactions
+primary key makes the claim atomic across workers. An in-process LRU remembers
+only the keys this process claimed; a hit is confirmed against the row before
+rejecting, since another worker may have released the key since.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Any, Dict
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from app.config import get_settings
+from app.database import SessionLocal, AsyncSessionLocal
+from app.models.processed_interaction import ProcessedInteraction
+from app.utils.timezone import get_ist_now
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def interaction_key(payload: Dict[str, Any], raw_payload: str) -> str:
+    """
+    Idempotency key for an interaction: view ID and view hash for a modal submission,
+    otherwise type, view ID and a hash of the raw payload.
+    """
+    view = payload.get('view') or {}
+    if payload.get('type') == 'view_submission' and view.get('id'):
+        # The hash only changes when the view is updated, not between submissions of it
+        return f"view_submission:{view['id']}:{view.get('hash') or '-'}"
+    digest = hashlib.sha256(raw_payload.encode()).hexdigest()[:40]
+    return f"{payload.get('type')}:{view.get('id') or '-'}:{digest}"
+
+
+class IdempotencyStore:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._seen = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    async def claim_async(self, key: str) -> bool:
+        """Record `key` as being handled. Returns False if it is currently claimed."""
+        async with AsyncSessionLocal() as db:
+            if self._seen.get(key) is not None:
+                try:
+                    if await db.get(ProcessedInteraction, key) is not None:
+                        return False
+                except Exception as e:
+                    logger.warning(f"Error checking idempotency key {key}: {str(e)}")
+                    return False
+                # Released by whichever worker handled the failed attempt
+                self._seen.delete(key)
+
+            try:
+                db.add(ProcessedInteraction(key=key))
+                await db.commit()
+            except IntegrityError:
+                # Claimed by another worker; not cached, as only that worker learns of a release
+                await db.rollback()
+                return False
+            except Exception as e:
+                # Never block a submission because the key could not be stored
+                await db.rollback()
+                logger.warning(f"Error recording idempotency key {key}: {str(e)}")
+
+        self._seen.set(key, True)
+        return True
+
+    async def release_async(self, key: str) -> None:
+        """Forget a claim, so a retry of a failed interaction is processed again."""
+        self._seen.delete(key)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(delete(ProcessedInteraction).where(ProcessedInteraction.key == key))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.warning(f"Error releasing idempotency key {key}: {str(e)}")
+
+    def purge(self, retention_seconds: int) -> int:
+        """Delete persisted keys older than the retention window."""
+        cutoff = get_ist_now().replace(tzinfo=None) - timedelta(seconds=retention_seconds)
+        db = SessionLocal()
+        try:
+            deleted = db.query(ProcessedInteraction).filter(ProcessedInteraction.created_at < cutoff).delete()
+            db.commit()
+            logger.info(f"🧹 Purged {deleted} processed interaction keys")
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error purging processed interaction keys: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+
+# Shared by every request in the process
+processed_interactions = IdempotencyStore(
+    max_size=settings.idempotency_cache_size,
+    ttl_seconds=settings.idempotency_retention_seconds
+)
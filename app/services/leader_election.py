@@ -0,0 +1,187 @@
+"""
+Leader election so that exactly one process runs the scheduled jobs.
+
+Every web worker (and replica) runs an elector; only the current leader starts
+the TaskScheduler jobs, so HTTP workers can be scaled freely without sending
+each reminder N times.
+
+On Postgres the leader holds a session-level advisory lock on a dedicated
+connection, which the server releases if the process dies. Other databases
+(SQLite locally) use a row in scheduler_leases that the leader renews; another
+process takes over once the lease has expired.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal, engine
+from app.models.scheduler_lease import SchedulerLease
+from app.utils.timezone import get_ist_now
+
+logger = logging.getLogger(__name__)
+
+
+def _advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_try_advisory_lock."""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+class LeaderElector:
+    def __init__(self, name: str, lease_seconds: int, renew_seconds: int,
+                 on_elected: Callable[[], Awaitable[None]], on_demoted: Callable[[], Awaitable[None]]):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = renew_seconds
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._use_advisory_lock = engine.dialect.name == "postgresql"
+        self._lock_connection = None
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Postgres advisory lock ---
+
+    def _try_advisory_lock(self) -> bool:
+        if self._lock_connection is not None:
+            try:
+                # Still holding the lock as long as the session is alive
+                self._lock_connection.execute(text("SELECT 1"))
+                return True
+            except Exception as e:
+                logger.warning(f"Leader lock connection lost: {str(e)}")
+                self._close_lock_connection()
+
+        # Session-level lock, held outside any transaction: an open transaction here
+        # would sit idle for as long as we lead, holding back vacuum and inviting
+        # idle_in_transaction_session_timeout to kill the session
+        connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": _advisory_lock_key(self.name)}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            self._lock_connection = connection
+            return True
+        connection.close()
+        return False
+
+    def _close_lock_connection(self) -> None:
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.close()
+            except Exception:
+                pass
+            self._lock_connection = None
+
+    def _release_advisory_lock(self) -> None:
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": _advisory_lock_key(self.name)}
+                )
+            except Exception as e:
+                logger.warning(f"Error releasing leader lock: {str(e)}")
+        self._close_lock_connection()
+
+    # --- Lease table ---
+
+    def _try_lease(self) -> bool:
+        now = get_ist_now().replace(tzinfo=None)
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        db = SessionLocal()
+        try:
+            # Renew our own lease, or take over an expired one, in a single conditional update
+            result = db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name)
+                .where((SchedulerLease.holder == self.holder_id) | (SchedulerLease.expires_at < now))
+                .values(holder=self.holder_id, expires_at=expires_at)
+            )
+            if result.rowcount:
+                db.commit()
+                return True
+
+            if db.get(SchedulerLease, self.name) is not None:
+                db.rollback()
+                return False
+
+            db.add(SchedulerLease(name=self.name, holder=self.holder_id, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Another process created the lease first
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    def _release_lease(self) -> None:
+        db = SessionLocal()
+        try:
+            db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.name,
+                SchedulerLease.holder == self.holder_id
+            ).delete()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Error releasing scheduler lease: {str(e)}")
+        finally:
+            db.close()
+
+    # --- Election loop ---
+
+    def _try_acquire(self) -> bool:
+        return self._try_advisory_lock() if self._use_advisory_lock else self._try_lease()
+
+    def _release(self) -> None:
+        if self._use_advisory_lock:
+            self._release_advisory_lock()
+        else:
+            self._release_lease()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                acquired = await asyncio.to_thread(self._try_acquire)
+            except Exception as e:
+                logger.error(f"Leader election for {self.name} failed: {str(e)}")
+                acquired = False
+
+            if acquired and not self.is_leader:
+                self.is_leader = True
+                logger.info(f"👑 {self.holder_id} is now leader for {self.name}")
+                await self.on_elected()
+            elif not acquired and self.is_leader:
+                self.is_leader = False
+                logger.warning(f"⚠️ {self.holder_id} lost leadership for {self.name}")
+                await self.on_demoted()
+
+            await asyncio.sleep(self.renew_seconds)
+
+    def start(self) -> None:
+        """Start campaigning in the background; must be called from the running event loop."""
+        mode = "advisory lock" if self._use_advisory_lock else "lease table"
+        logger.info(f"Starting leader election for {self.name} as {self.holder_id} ({mode})")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop campaigning and hand leadership over immediately."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await self.on_demoted()
+        await asyncio.to_thread(self._release)
@@ -0,0 +1,176 @@
+"""
+Service for the local Slack user roster (slack_users table).
+
+The roster is filled in bulk from users.list so that bot/deleted checks and
+display names can be resolved with an indexed local lookup instead of one
+users.info call per user.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.slack_user import SlackUser
+from app.utils.timezone import get_ist_now
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# SQLite allows at most 999 bound parameters in older builds
+LOOKUP_CHUNK_SIZE = 500
+
+
+class RosterService:
+    # Monotonic timestamp of the last successful full sync in this process
+    _last_synced_at: Optional[float] = None
+
+    @staticmethod
+    def _apply_page(db: Session, page: List[Dict[str, Any]], stats: Dict[str, int]) -> None:
+        """Upsert one users.list page, skipping users whose Slack "updated" stamp is unchanged."""
+        page_ids = [u['id'] for u in page if u.get('id')]
+        if not page_ids:
+            return
+
+        existing = {
+            row.user_id: row
+            for row in db.query(SlackUser).filter(SlackUser.user_id.in_(page_ids)).all()
+        }
+        synced_at = get_ist_now().replace(tzinfo=None)
+
+        for user in page:
+            user_id = user.get('id')
+            if not user_id:
+                continue
+            stats["seen"] += 1
+
+            slack_updated = int(user.get('updated') or 0)
+            row = existing.get(user_id)
+            if row is not None and row.slack_updated == slack_updated:
+                stats["unchanged"] += 1
+                continue
+
+            if row is None:
+                row = SlackUser(user_id=user_id)
+                db.add(row)
+                stats["created"] += 1
+            else:
+                stats["updated"] += 1
+
+            profile = user.get('profile') or {}
+            row.name = user.get('name')
+            row.real_name = user.get('real_name') or profile.get('real_name')
+            row.display_name = profile.get('display_name')
+            row.is_bot = bool(user.get('is_bot', False))
+            row.deleted = bool(user.get('deleted', False))
+            row.tz = user.get('tz')
+            row.slack_updated = slack_updated
+            row.synced_at = synced_at
+
+        db.commit()
+
+    @staticmethod
+    def _finish_sync(stats: Dict[str, int], start_time: float) -> Dict[str, int]:
+        RosterService._last_synced_at = time.monotonic()
+        logger.info(
+            f"📇 Roster sync finished in {time.monotonic() - start_time:.2f}s: "
+            f"{stats['seen']} seen, {stats['created']} created, {stats['updated']} updated, {stats['unchanged']} unchanged"
+        )
+        return stats
+
+    @staticmethod
+    def _is_fresh(max_age_seconds: int) -> bool:
+        last = RosterService._last_synced_at
+        return last is not None and time.monotonic() - last < max_age_seconds
+
+    @staticmethod
+    def sync_roster(db: Session, slack_service) -> Dict[str, int]:
+        """
+        Page through users.list and upsert the roster.
+        Only users whose Slack "updated" timestamp changed are written.
+        """
+        start_time = time.monotonic()
+        stats = {"seen": 0, "created": 0, "updated": 0, "unchanged": 0}
+
+        for page in slack_service.iter_workspace_users():
+            RosterService._apply_page(db, page, stats)
+
+        return RosterService._finish_sync(stats, start_time)
+
+    @staticmethod
+    async def sync_roster_async(db: Session, slack_service) -> Dict[str, int]:
+        """Same as sync_roster, paging users.list through an AsyncSlackService; page upserts run in a thread."""
+        start_time = time.monotonic()
+        stats = {"seen": 0, "created": 0, "updated": 0, "unchanged": 0}
+
+        async for page in slack_service.iter_workspace_users():
+            await asyncio.to_thread(RosterService._apply_page, db, page, stats)
+
+        return RosterService._finish_sync(stats, start_time)
+
+    @staticmethod
+    def refresh_if_stale(db: Session, slack_service, max_age_seconds: int) -> bool:
+        """Sync the roster if this process has not synced within max_age_seconds."""
+        if RosterService._is_fresh(max_age_seconds):
+            return False
+
+        try:
+            RosterService.sync_roster(db, slack_service)
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error syncing roster: {str(e)}")
+            return False
+
+    @staticmethod
+    async def refresh_if_stale_async(db: Session, slack_service, max_age_seconds: int) -> bool:
+        if RosterService._is_fresh(max_age_seconds):
+            return False
+
+        try:
+            await RosterService.sync_roster_async(db, slack_service)
+            return True
+        except Exception as e:
+            await asyncio.to_thread(db.rollback)
+            logger.error(f"Error syncing roster: {str(e)}")
+            return False
+
+    @staticmethod
+    def get_user(db: Session, user_id: str) -> Optional[SlackUser]:
+        return db.get(SlackUser, user_id)
+
+    @staticmethod
+    def get_display_name(db: Session, user_id: str) -> Optional[str]:
+        """Return the stored display name, or None if the user is not in the roster."""
+        user = RosterService.get_user(db, user_id)
+        return user.best_name if user else None
+
+    @staticmethod
+    async def get_display_name_async(db: AsyncSession, user_id: str) -> Optional[str]:
+        """Async variant of get_display_name for request handlers."""
+        user = await db.get(SlackUser, user_id)
+        return user.best_name if user else None
+
+    @staticmethod
+    def split_active_humans(db: Session, user_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Classify user IDs using the roster.
+        Returns (active_human_ids, unknown_ids); bots and deleted users are dropped.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        known = {}
+        for i in range(0, len(user_ids), LOOKUP_CHUNK_SIZE):
+            chunk = user_ids[i:i + LOOKUP_CHUNK_SIZE]
+            rows = db.query(SlackUser.user_id, SlackUser.is_bot, SlackUser.deleted).filter(
+                SlackUser.user_id.in_(chunk)
+            ).all()
+            for user_id, is_bot, deleted in rows:
+                known[user_id] = not is_bot and not deleted
+
+        active = [uid for uid in user_ids if known.get(uid)]
+        unknown = [uid for uid in user_ids if uid not in known]
+        return active, unknown
+
+    @staticmethod
+    async def split_active_humans_async(db: Session, user_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """split_active_humans on a worker thread, for callers running on the event loop."""
+        return await asyncio.to_thread(RosterService.split_active_humans, db, list(user_ids))
@@ -0,0 +1,193 @@
+"""
+Slack Web API clients that route every call through the process-wide rate governor,
+and the long-lived transport that owns them.
+"""
+from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
+from slack_sdk.web.async_slack_response import AsyncSlackResponse
+from slack_sdk.errors import SlackApiError
+from typing import Any, Dict, Optional
+from app.config import get_settings
+from app.utils.rate_limiter import rate_governor
+from app.utils.metrics import SLACK_API_SECONDS
+import aiohttp
+import functools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _call_channel(kwargs: Dict[str, Any]) -> Optional[str]:
+    """Find the target channel of an API call, for per-channel rate limits."""
+    for key in ("json", "data", "params"):
+        payload = kwargs.get(key)
+        if isinstance(payload, dict) and payload.get("channel"):
+            return payload["channel"]
+    return None
+
+
+def _retry_after(error: SlackApiError) -> Optional[float]:
+    """Return the Retry-After delay if the error is an HTTP 429, else None."""
+    response = error.response
+    if getattr(response, "status_code", None) != 429 and response.get("error") != "ratelimited":
+        return None
+    headers = getattr(response, "headers", None) or {}
+    for name, value in headers.items():
+        if name.lower() == "retry-after":
+            try:
+                return float(value if not isinstance(value, list) else value[0])
+            except (TypeError, ValueError):
+                break
+    return 1.0
+
+
+class GovernedWebClient(WebClient):
+    def api_call(self, api_method: str, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self._governed_api_call(api_method, **kwargs)
+            outcome = "ok"
+            return response
+        finally:
+            SLACK_API_SECONDS.labels(api_method=api_method, outcome=outcome).observe(time.perf_counter() - start)
+
+    def _governed_api_call(self, api_method: str, **kwargs):
+        if not settings.slack_rate_limit_enabled:
+            return super().api_call(api_method, **kwargs)
+
+        channel = _call_channel(kwargs)
+        attempt = 0
+        while True:
+            rate_governor.acquire(api_method, channel)
+            try:
+                return super().api_call(api_method, **kwargs)
+            except SlackApiError as e:
+                retry_after = _retry_after(e)
+                if retry_after is None or attempt >= settings.slack_rate_limit_max_retries:
+                    raise
+                attempt += 1
+                logger.warning(f"⏳ {api_method} rate limited, retrying after {retry_after}s (attempt {attempt})")
+                rate_governor.penalize(api_method, channel, retry_after)
+
+
+class GovernedAsyncWebClient(AsyncWebClient):
+    async def api_call(self, api_method: str, **kwargs):
+        call = functools.partial(super().api_call, api_method, **kwargs)
+        return await self._timed_call(api_method, _call_channel(kwargs), call)
+
+    async def api_call_json(self, api_method: str, body: str) -> AsyncSlackResponse:
+        """
+        POST an already-serialized JSON request body, such as a pre-rendered view spliced
+        into its request, without slack_sdk decoding and re-encoding it. Rate governed,
+        timed and validated like api_call.
+        """
+        call = functools.partial(self._post_json, api_method, body.encode())
+        return await self._timed_call(api_method, None, call)
+
+    async def _post_json(self, api_method: str, body: bytes) -> AsyncSlackResponse:
+        if self.session is None:
+            # Clients built outside SlackTransport have no pooled session to reuse
+            async with aiohttp.ClientSession() as session:
+                return await self._post_json_on(session, api_method, body)
+        return await self._post_json_on(self.session, api_method, body)
+
+    async def _post_json_on(self, session: aiohttp.ClientSession, api_method: str, body: bytes) -> AsyncSlackResponse:
+        url = f"{self.base_url}{api_method}"
+        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json;charset=utf-8"}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with session.post(url, data=body, headers=headers, timeout=timeout) as response:
+            data = await response.json(content_type=None)
+            return AsyncSlackResponse(
+                client=self,
+                http_verb="POST",
+                api_url=url,
+                req_args={"data": body},
+                data=data,
+                headers=dict(response.headers),
+                status_code=response.status
+            ).validate()
+
+    async def _timed_call(self, api_method: str, channel: Optional[str], call):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._governed_call(api_method, channel, call)
+            outcome = "ok"
+            return response
+        finally:
+            SLACK_API_SECONDS.labels(api_method=api_method, outcome=outcome).observe(time.perf_counter() - start)
+
+    async def _governed_call(self, api_method: str, channel: Optional[str], call):
+        if not settings.slack_rate_limit_enabled:
+            return await call()
+
+        attempt = 0
+        while True:
+            await rate_governor.acquire_async(api_method, channel)
+            try:
+                return await call()
+            except SlackApiError as e:
+                retry_after = _retry_after(e)
+                if retry_after is None or attempt >= settings.slack_rate_limit_max_retries:
+                    raise
+                attempt += 1
+                logger.warning(f"⏳ {api_method} rate limited, retrying after {retry_after}s (attempt {attempt})")
+                rate_governor.penalize(api_method, channel, retry_after)
+
+
+class SlackTransport:
+    """
+    Process-wide Slack clients, created once and reused by every handler and job.
+
+    The async client runs on one shared aiohttp session with a bounded keep-alive
+    connection pool, so interactive requests reuse open TCP/TLS connections instead
+    of paying connection setup on every call. The session is created lazily on
+    first use because it must be bound to the running event loop.
+    """
+
+    def __init__(self):
+        self._sync_client: Optional[GovernedWebClient] = None
+        self._async_client: Optional[GovernedAsyncWebClient] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def sync_client(self) -> GovernedWebClient:
+        # Blocking client for background threads (manager reports)
+        if self._sync_client is None:
+            self._sync_client = GovernedWebClient(
+                token=settings.slack_bot_token,
+                base_url=settings.slack_api_base_url,
+                timeout=settings.slack_http_timeout_seconds
+            )
+        return self._sync_client
+
+    @property
+    def async_client(self) -> GovernedAsyncWebClient:
+        if self._async_client is None or self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.slack_http_pool_size,
+                keepalive_timeout=settings.slack_http_keepalive_seconds,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._async_client = GovernedAsyncWebClient(
+                token=settings.slack_bot_token,
+                base_url=settings.slack_api_base_url,
+                session=self._session,
+                timeout=settings.slack_http_timeout_seconds
+            )
+            logger.info(f"Opened shared Slack HTTP session (pool size {settings.slack_http_pool_size})")
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Closed shared Slack HTTP session")
+        self._session = None
+        self._async_client = None
+
+
+slack_transport = SlackTransport()
@@ -1,18 +1,205 @@
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable
 from app.config import get_settings
+from functools import lru_cache
+from app.services.roster_service import RosterService
+from app.services.dm_channel_service import dm_channels, STALE_CHANNEL_ERRORS
+from app.services.channel_membership_service import channel_membership
+from app.services.slack_clients import GovernedWebClient, slack_transport
+from app.utils.ttl_cache import TTLCache
+from app.utils.block_builder import build_modal_view
+from app.utils.hot_path_log import hot_log, LazyJSON
+from app.utils.metrics import record_dm
 import logging
 import json
-from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Shared by every SlackService instance in the process so a user is fetched
+# from users.info at most once per TTL, no matter which handler asks.
+user_directory = TTLCache(
+    max_size=settings.user_cache_max_size,
+    ttl_seconds=settings.user_cache_ttl_seconds
+)
+
+def to_directory_record(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a Slack user object to the fields the bot actually uses."""
+    profile = user.get('profile') or {}
+    return {
+        'id': user.get('id'),
+        'name': user.get('name'),
+        'real_name': user.get('real_name') or profile.get('real_name'),
+        'is_bot': user.get('is_bot', False),
+        'deleted': user.get('deleted', False),
+        'tz': user.get('tz'),
+        'profile': {
+            'real_name': profile.get('real_name'),
+            'display_name': profile.get('display_name')
+        }
+    }
+
+
+def pick_display_name(user_info: Dict[str, Any], user_id: str) -> str:
+    """Pick the best available name from a user directory record."""
+    return (user_info.get('profile', {}).get('real_name') or  # Real name first
+            user_info.get('profile', {}).get('display_name') or  # Then display name
+            user_info.get('name') or  # Then username
+            f"User_{user_id}")  # Fallback
+
+
+# Shared by SlackService and AsyncSlackService: everything but the Web API calls themselves
+
+class SlackListingIncomplete(Exception):
+    """
+    A paginated listing failed after its first page. The pages already yielded
+    are not the whole listing, so callers must not treat them as complete.
+    """
+
+
+# users.conversations arguments for listing the bot's channels
+BOT_CHANNELS_QUERY = {"types": "public_channel,private_channel", "exclude_archived": True}
+
+
+def next_cursor(response) -> Optional[str]:
+    """Cursor of the next page of a paginated Web API response, or None after the last page."""
+    return (response.get('response_metadata') or {}).get('next_cursor') or None
+
+
+def remember_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a raw Slack user object in the user directory and return its record."""
+    record = to_directory_record(user)
+    user_directory.set(user['id'], record)
+    return record
+
+
+def remember_users(users: List[Dict[str, Any]]) -> None:
+    for user in users:
+        if user.get('id'):
+            remember_user(user)
+
+
+def is_active_human(user_info: Optional[Dict[str, Any]]) -> bool:
+    return bool(user_info) and not user_info.get('is_bot', False) and not user_info.get('deleted', False)
+
+
+def store_bot_channels(channel_ids: List[str]) -> None:
+    """Record a complete users.conversations listing (blocks on the database)."""
+    channel_membership.set_bot_channels(channel_ids)
+    if channel_ids:
+        logger.info(f"✅ Found {len(channel_ids)} channels where bot is a member")
+    else:
+        logger.warning("⚠️ No channels found where bot is a member")
+
+
+def resolve_display_name(user_info: Optional[Dict[str, Any]], user_id: str) -> str:
+    if not user_info:
+        return "Unknown User"
+    # Try to get the best available name in order of preference
+    name = pick_display_name(user_info, user_id)
+    logger.info(f"Retrieved display name for {user_id}: {name}")
+    return name
+
+
+def is_stale_dm_channel(error: SlackApiError) -> bool:
+    return error.response.get('error') in STALE_CHANNEL_ERRORS
+
+
+def build_open_modal_view(trigger_id: str, blocks: List[Dict[str, Any]], title: str,
+                          callback_id: str, private_metadata: Optional[str]) -> Dict[str, Any]:
+    """The views.open payload for open_modal, with its request logging."""
+    logger.info(f"Opening modal with trigger_id: {trigger_id}")
+    logger.info(f"Title: {title}")
+    logger.info(f"Callback ID: {callback_id}")
+    logger.info(f"Number of blocks: {len(blocks)}")
+
+    if not trigger_id:
+        raise ValueError("No trigger_id provided")
+
+    view = build_modal_view(blocks, title, callback_id, private_metadata)
+
+    if private_metadata:
+        logger.info(f"✅ Added private_metadata to view: {private_metadata}")
+    else:
+        logger.warning("⚠️ No private_metadata provided to open_modal")
+
+    hot_log.info(logger, "📤 Sending view to Slack: %s", LazyJSON(view, indent=2))
+    return view
+
+
+def log_open_modal_response(response) -> bool:
+    if not response["ok"]:
+        logger.error(f"❌ Error in views.open response: {response}")
+        return False
+    logger.info("✅ Modal opened successfully")
+    logger.info(f"📨 Slack response: {response.get('view', {}).get('id', 'No view ID')}")
+    return True
+
+
+def log_open_modal_error(error: Exception) -> bool:
+    if isinstance(error, ValueError):
+        logger.error(f"Validation error opening modal: {str(error)}")
+    elif isinstance(error, SlackApiError):
+        logger.error(f"Error opening modal: {error.response['error']}")
+        logger.error(f"Response data: {error.response}")
+    else:
+        logger.error(f"Unexpected error opening modal: {str(error)}")
+    return False
+
+
+def build_update_modal_view(view_id: str, blocks: List[Dict[str, Any]], title: str,
+                            callback_id: str, private_metadata: Optional[str]) -> Dict[str, Any]:
+    """The views.update payload for update_modal_view, with its request logging."""
+    logger.info(f"🔄 Updating modal view {view_id}")
+    logger.info(f"📦 Number of blocks: {len(blocks)}")
+    logger.info(f"🎫 Callback ID: {callback_id}")
+
+    # private_metadata is carried over so it is preserved during update
+    view_payload = build_modal_view(blocks, title, callback_id, private_metadata, emoji=False)
+
+    if private_metadata:
+        logger.info(f"✅ Preserving private_metadata in view update: {private_metadata}")
+    else:
+        logger.warning("⚠️ No private_metadata provided to update_modal_view")
+
+    logger.info("📤 Sending update to Slack...")
+    return view_payload
+
+
+def log_update_modal_response(response) -> bool:
+    logger.info("✅ View update API call successful")
+    # Log only the serializable parts of the response
+    logger.info(f"📨 Slack response: ok={response.get('ok', False)} view={response.get('view', {}).get('id', 'N/A')}")
+    return True
+
+
+def log_update_modal_error(error: SlackApiError) -> bool:
+    logger.error("❌ Slack API Error:")
+    logger.error(f"Error Code: {error.response.get('error', 'Unknown')}")
+    logger.error(f"Error Data: {json.dumps(error.response.get('data', {}), indent=2)}")
+    logger.error(f"Response Headers: {json.dumps(dict(error.response.headers), indent=2)}")
+    return False
+
+
+def format_user_mention(user_id: str) -> str:
+    """Format a user ID as a Slack mention for display purposes only."""
+    return f"<@{user_id}>"
+
+
+def format_user_for_display(user_id: str, stored_username: str) -> str:
+    """
+    Format a user mention for display in Slack messages.
+    Uses user_id for mention and falls back to stored username if needed.
+    """
+    if not user_id:
+        return stored_username
+    return format_user_mention(user_id)
+
 
 class SlackService:
-    def __init__(self):
-        self.client = WebClient(token=settings.slack_bot_token)
+    def __init__(self, client: GovernedWebClient = None):
+        # Defaults to the process-wide client so connections and settings are shared
+        self.client = client or slack_transport.sync_client
     
     def post_message(self, channel: str, blocks: List[Dict[str, Any]], text: str = "") -> Optional[str]:
         try:
@@ -39,67 +226,145 @@ class SlackService:
             logger.error(f"Error updating message: {e.response['error']}")
             return False
     
-    def get_channel_members(self, channel: str) -> List[str]:
+    def iter_channel_member_pages(self, channel: str) -> Iterator[List[str]]:
+        """
+        Yield the channel's member IDs one conversations.members page at a time.
+        Served from the stored channel membership when fresh; a complete listing refreshes it.
+        Raises SlackListingIncomplete if a page after the first fails.
+        """
+        cached = channel_membership.get_members(channel)
+        if cached is not None:
+            yield cached
+            return
+
+        members = []
+        cursor = None
         try:
-            response = self.client.conversations_members(channel=channel)
-            return response['members']
+            while True:
+                response = self.client.conversations_members(
+                    channel=channel,
+                    limit=settings.slack_page_size,
+                    cursor=cursor
+                )
+                members.extend(response['members'])
+                yield response['members']
+
+                cursor = next_cursor(response)
+                if not cursor:
+                    break
         except SlackApiError as e:
             logger.error(f"Error getting channel members: {e.response['error']}")
-            return []
+            if cursor:
+                raise SlackListingIncomplete(
+                    f"conversations.members for {channel} failed after {len(members)} members: {e.response['error']}"
+                ) from e
+            return
+
+        channel_membership.set_members(channel, members)
+
+    def get_channel_members(self, channel: str) -> List[str]:
+        members = []
+        for page in self.iter_channel_member_pages(channel):
+            members.extend(page)
+        return members
     
-    def get_bot_channels(self) -> List[str]:
-        """Get all channels where the bot is a member."""
+    def iter_bot_channels(self) -> Iterator[str]:
+        """
+        Yield IDs of channels where the bot is a member, following users.conversations cursors.
+        Served from the stored channel membership when fresh; a complete listing refreshes it.
+        Raises SlackListingIncomplete if a page after the first fails.
+        """
+        cached = channel_membership.get_bot_channels()
+        if cached is not None:
+            for channel_id in cached:
+                yield channel_id
+            return
+
+        channel_ids = []
+        cursor = None
         try:
-            # Use users.conversations - more reliable and efficient
             logger.info("Getting bot channels using users.conversations API...")
-            response = self.client.users_conversations(
-                types="public_channel,private_channel",
-                exclude_archived=True,
-                limit=1000
-            )
-            
-            bot_channels = [ch['id'] for ch in response.get('channels', [])]
-            
-            if bot_channels:
-                logger.info(f"✅ Found {len(bot_channels)} channels where bot is a member: {bot_channels}")
-            else:
-                logger.warning("⚠️ No channels found where bot is a member")
-            
-            return bot_channels
-            
+            while True:
+                response = self.client.users_conversations(
+                    **BOT_CHANNELS_QUERY,
+                    limit=settings.slack_page_size,
+                    cursor=cursor
+                )
+                for ch in response.get('channels', []):
+                    channel_ids.append(ch['id'])
+                    yield ch['id']
+
+                cursor = next_cursor(response)
+                if not cursor:
+                    break
         except SlackApiError as e:
             logger.error(f"Error getting bot channels: {e.response['error']}")
             logger.error(f"Full error response: {e.response}")
-            return []
+            if cursor:
+                raise SlackListingIncomplete(
+                    f"users.conversations failed after {len(channel_ids)} channels: {e.response['error']}"
+                ) from e
+            return
+
+        store_bot_channels(channel_ids)
+
+    def get_bot_channels(self) -> List[str]:
+        """Get all channels where the bot is a member."""
+        bot_channels = list(self.iter_bot_channels())
+        logger.info(f"Bot channels: {bot_channels}")
+        return bot_channels
     
     def get_user_info(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's directory record (is_bot, deleted, names, tz).
+        Served from the process-wide cache when fresh, otherwise fetched via users.info.
+        """
+        cached = user_directory.get(user_id)
+        if cached is not None:
+            return cached
+
         try:
             response = self.client.users_info(user=user_id)
-            return response['user']
+            return remember_user(response['user'])
         except SlackApiError as e:
             logger.error(f"Error getting user info: {e.response['error']}")
             return None
             
-    def get_user_display_name(self, user_id: str) -> str:
-        """Get user's actual display name from Slack for storage in DB."""
+    def iter_workspace_users(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Page through users.list, yielding one page of raw user objects at a time.
+        Every user seen also refreshes the process-wide user directory cache.
+        """
+        cursor = None
+        while True:
+            response = self.client.users_list(limit=settings.roster_page_size, cursor=cursor)
+            members = response.get('members', [])
+            remember_users(members)
+            yield members
+
+            cursor = next_cursor(response)
+            if not cursor:
+                break
+
+    def get_user_display_name(self, user_id: str, db=None) -> str:
+        """
+        Get user's actual display name for storage in DB.
+        Resolved from the local roster when a db session is given, falling back to Slack.
+        """
         if not user_id:
             logger.error("No user_id provided to get_user_display_name")
             return "Unknown User"
-            
-        try:
-            user_info = self.get_user_info(user_id)
-            if not user_info:
-                return "Unknown User"
-
-            # Try to get the best available name in order of preference
-            name = (user_info.get('profile', {}).get('real_name') or  # Real name first
-                   user_info.get('profile', {}).get('display_name') or  # Then display name
-                   user_info.get('name') or  # Then username
-                   f"User_{user_id}")  # Fallback
-            
-            logger.info(f"Retrieved display name for {user_id}: {name}")
-            return name
 
+        if db is not None:
+            try:
+                name = RosterService.get_display_name(db, user_id)
+                if name:
+                    return name
+            except Exception as e:
+                logger.warning(f"Roster lookup failed for {user_id}: {str(e)}")
+
+        try:
+            return resolve_display_name(self.get_user_info(user_id), user_id)
         except Exception as e:
             logger.error(f"Error getting user display name: {str(e)}")
             return f"User_{user_id}"
@@ -113,10 +378,30 @@ class SlackService:
             return None
     
     def send_dm(self, user_id: str, blocks: List[Dict[str, Any]], text: str = "") -> bool:
+        sent = self._send_dm(user_id, blocks, text)
+        record_dm(sent)
+        return sent
+
+    def _send_dm(self, user_id: str, blocks: List[Dict[str, Any]], text: str = "") -> bool:
         try:
+            dm_channels.load()
+            channel_id = dm_channels.get(user_id)
+
+            if channel_id:
+                # Known DM channel: skip conversations.open
+                try:
+                    self.client.chat_postMessage(channel=channel_id, blocks=blocks, text=text)
+                    return True
+                except SlackApiError as e:
+                    if not is_stale_dm_channel(e):
+                        raise
+                    logger.info(f"Cached DM channel {channel_id} for {user_id} is stale, reopening")
+                    dm_channels.invalidate(user_id)
+
             # Open DM channel
             response = self.client.conversations_open(users=user_id)
             channel_id = response['channel']['id']
+            dm_channels.put(user_id, channel_id)
             
             # Send message
             self.client.chat_postMessage(
@@ -132,137 +417,80 @@ class SlackService:
     def open_modal(self, trigger_id: str, blocks: List[Dict[str, Any]], title: str = "Weekly Timesheet", 
                   callback_id: str = "submit_timesheet", private_metadata: str = None):
         try:
-            logger.info(f"Opening modal with trigger_id: {trigger_id}")
-            logger.info(f"Title: {title}")
-            logger.info(f"Callback ID: {callback_id}")
-            logger.info(f"Number of blocks: {len(blocks)}")
-            
-            if not trigger_id:
-                raise ValueError("No trigger_id provided")
-            
-            view = {
-                "type": "modal",
-                "callback_id": callback_id,
-                "title": {"type": "plain_text", "text": title, "emoji": True},
-                "submit": {"type": "plain_text", "text": "Submit", "emoji": True},
-                "close": {"type": "plain_text", "text": "Cancel", "emoji": True},
-                "blocks": blocks
-            }
-            
-            # Add private_metadata if provided
-            if private_metadata:
-                view["private_metadata"] = private_metadata
-                logger.info(f"✅ Added private_metadata to view: {private_metadata}")
-            else:
-                logger.warning("⚠️ No private_metadata provided to open_modal")
-
-            logger.info(f"📤 Sending view to Slack: {json.dumps(view, indent=2)}")
-            
-            response = self.client.views_open(
-                trigger_id=trigger_id,
-                view=view
-            )
-            
-            if not response["ok"]:
-                logger.error(f"❌ Error in views.open response: {response}")
-                return False
-                
-            logger.info("✅ Modal opened successfully")
-            logger.info(f"📨 Slack response: {response.get('view', {}).get('id', 'No view ID')}")
-            return True
-            
-        except ValueError as ve:
-            logger.error(f"Validation error opening modal: {str(ve)}")
-            return False
-        except SlackApiError as e:
-            logger.error(f"Error opening modal: {e.response['error']}")
-            logger.error(f"Response data: {e.response}")
-            return False
+            view = build_open_modal_view(trigger_id, blocks, title, callback_id, private_metadata)
+            response = self.client.views_open(trigger_id=trigger_id, view=view)
+            return log_open_modal_response(response)
         except Exception as e:
-            logger.error(f"Unexpected error opening modal: {str(e)}")
-            return False
+            return log_open_modal_error(e)
 
-    def get_all_users_from_channels(self, channel_ids: List[str]) -> List[str]:
+    def iter_users_from_channels(self, channel_ids: Iterable[str], db=None) -> Iterator[str]:
         """
-        Get all user IDs from the given channels where bot is present.
-        Excludes bots and returns unique user IDs.
+        Yield unique, non-bot, non-deleted user IDs from the given channels as
+        each conversations.members page arrives, so callers can start work
+        before the last page has been fetched.
+        When a db session is given, each page is classified with one roster query
+        and only users missing from the roster are looked up in Slack.
         """
-        all_user_ids = set()
+        seen = set()
         
         for channel_id in channel_ids:
+            channel_total = 0
+            channel_users = 0
             try:
-                members = self.get_channel_members(channel_id)
-                logger.info(f"📊 Channel {channel_id} has {len(members)} total members")
-                # Filter out bots
-                channel_users = []
-                for member_id in members:
-                    user_info = self.get_user_info(member_id)
-                    if user_info and not user_info.get('is_bot', False) and not user_info.get('deleted', False):
-                        all_user_ids.add(member_id)
-                        channel_users.append(member_id)
-                        logger.debug(f"📊 Added user {member_id} ({user_info.get('name', 'unknown')}) from channel {channel_id}")
-                logger.info(f"📊 Channel {channel_id} has {len(channel_users)} non-bot users: {channel_users}")
+                for members in self.iter_channel_member_pages(channel_id):
+                    channel_total += len(members)
+
+                    if db is not None:
+                        page_users, unknown = RosterService.split_active_humans(db, members)
+                        if unknown:
+                            logger.info(f"📊 {len(unknown)} members of {channel_id} not in roster, falling back to users.info")
+                    else:
+                        page_users, unknown = [], members
+
+                    # Filter out bots
+                    for member_id in unknown:
+                        if is_active_human(self.get_user_info(member_id)):
+                            page_users.append(member_id)
+
+                    channel_users += len(page_users)
+                    for user_id in page_users:
+                        if user_id not in seen:
+                            seen.add(user_id)
+                            yield user_id
+            except SlackListingIncomplete:
+                raise
             except Exception as e:
                 logger.warning(f"Error getting members from channel {channel_id}: {str(e)}")
                 continue
+
+            logger.info(f"📊 Channel {channel_id} has {channel_total} total members, {channel_users} non-bot users")
         
-        logger.info(f"📊 Total unique users from all channels: {len(all_user_ids)} - {list(all_user_ids)}")
-        return list(all_user_ids)
+        logger.info(f"📊 Total unique users from all channels: {len(seen)}")
+
+    def get_all_users_from_channels(self, channel_ids: Iterable[str], db=None) -> List[str]:
+        """
+        Get all user IDs from the given channels where bot is present.
+        Excludes bots and deleted users and returns unique user IDs.
+        """
+        return list(self.iter_users_from_channels(channel_ids, db=db))
 
     def format_user_mention(self, user_id: str) -> str:
-        """Format a user ID as a Slack mention for display purposes only."""
-        return f"<@{user_id}>"
+        return format_user_mention(user_id)
 
     def format_user_for_display(self, user_id: str, stored_username: str) -> str:
-        """
-        Format a user mention for display in Slack messages.
-        Uses user_id for mention and falls back to stored username if needed.
-        """
-        if not user_id:
-            return stored_username
-        return self.format_user_mention(user_id)
+        return format_user_for_display(user_id, stored_username)
 
     def update_modal_view(self, view_id: str, blocks: List[Dict[str, Any]], title: str = "Weekly Timesheet", callback_id: str = "timesheet_modal", private_metadata: str = None) -> bool:
         """Update an existing modal view"""
         try:
-            logger.info(f"🔄 Updating modal view {view_id}")
-            logger.info(f"📦 Number of blocks: {len(blocks)}")
-            logger.info(f"🎫 Callback ID: {callback_id}")
-            
-            view_payload = {
-                "type": "modal",
-                "callback_id": callback_id,
-                "title": {"type": "plain_text", "text": title},
-                "submit": {"type": "plain_text", "text": "Submit"},
-                "close": {"type": "plain_text", "text": "Cancel"},
-                "blocks": blocks
-            }
-            
-            # Add private_metadata if provided to preserve it during update
-            if private_metadata:
-                view_payload["private_metadata"] = private_metadata
-                logger.info(f"✅ Preserving private_metadata in view update: {private_metadata}")
-            else:
-                logger.warning("⚠️ No private_metadata provided to update_modal_view")
-            
-            logger.info("📤 Sending update to Slack...")
-            response = self.client.views_update(
-                view_id=view_id,
-                view=view_payload
-            )
-            
-            logger.info("✅ View update API call successful")
-            # Log only the serializable parts of the response
-            response_data = {
-                "ok": response.get("ok", False),
-                "view": response.get("view", {}).get("id", "N/A")
-            }
-            logger.info(f"📨 Slack response: {json.dumps(response_data, indent=2)}")
-            return True
-            
+            view_payload = build_update_modal_view(view_id, blocks, title, callback_id, private_metadata)
+            response = self.client.views_update(view_id=view_id, view=view_payload)
+            return log_update_modal_response(response)
         except SlackApiError as e:
-            logger.error("❌ Slack API Error:")
-            logger.error(f"Error Code: {e.response.get('error', 'Unknown')}")
-            logger.error(f"Error Data: {json.dumps(e.response.get('data', {}), indent=2)}")
-            logger.error(f"Response Headers: {json.dumps(dict(e.response.headers), indent=2)}")
-            return False
\ No newline at end of file
+            return log_update_modal_error(e)
+
+
+@lru_cache()
+def get_slack_service() -> SlackService:
+    """Process-wide blocking SlackService."""
+    return SlackService()
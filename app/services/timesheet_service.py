@@ -1,32 +1,55 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, desc
-from app.models.timesheet import TimesheetEntry
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, extract, desc, select, insert
+from sqlalchemy.exc import IntegrityError
+from app.models.timesheet import TimesheetEntry, submission_keys
+from app.models.timesheet_submission import TimesheetSubmission
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from app.utils.timezone import get_ist_now, utc_to_ist, format_ist_date, get_ist_date
+from typing import List, Dict, Any, Optional, Tuple
+from app.utils.timezone import get_ist_now, utc_to_ist, format_ist_date, get_ist_today, get_period_start
+from app.utils.metrics import timed_query
 
 
 class TimesheetService:
     @staticmethod
+    def current_period_start(timesheet_type: str):
+        """period_start of the current IST week or month."""
+        return get_period_start(timesheet_type, get_ist_today())
+
+    @staticmethod
+    @timed_query
     def has_submitted_today(
         db: Session,
         user_id: str,
         timesheet_type: str
     ) -> bool:
         """Check if user has already submitted a timesheet of this type today."""
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        existing_entry = db.query(TimesheetEntry).filter(
+        existing_entry = db.query(TimesheetEntry.id).filter(
             TimesheetEntry.user_id == user_id,
             TimesheetEntry.timesheet_type == timesheet_type,
-            TimesheetEntry.submission_date >= today_start,
-            TimesheetEntry.submission_date < today_end
+            TimesheetEntry.submission_day == get_ist_today()
         ).first()
         
         return existing_entry is not None
 
     @staticmethod
+    @timed_query
+    async def has_submitted_today_async(
+        db: AsyncSession,
+        user_id: str,
+        timesheet_type: str
+    ) -> bool:
+        """Async variant of has_submitted_today for request handlers."""
+        result = await db.execute(select(TimesheetEntry.id).where(
+            TimesheetEntry.user_id == user_id,
+            TimesheetEntry.timesheet_type == timesheet_type,
+            TimesheetEntry.submission_day == get_ist_today()
+        ).limit(1))
+        
+        return result.first() is not None
+
+    @staticmethod
+    @timed_query
     def create_entry(
         db: Session,
         user_id: str,
@@ -36,7 +59,12 @@ class TimesheetService:
         hours: float,
         timesheet_type: str = 'weekly'  # Add this parameter
     ) -> TimesheetEntry:
+        """Record a one-line submission; use create_entries for a whole timesheet."""
+        submission = TimesheetService._new_submission(user_id, username, channel_id, timesheet_type)
+        db.add(submission)
+        db.flush()
         entry = TimesheetEntry(
+            submission_id=submission.id,
             user_id=user_id,
             username=username,
             channel_id=channel_id,
@@ -44,19 +72,108 @@ class TimesheetService:
             hours=hours,
             timesheet_type=timesheet_type  # Add this field
         )
+        entry.set_submitted_at(submission.submission_date)
         db.add(entry)
         db.commit()
         db.refresh(entry)
         return entry
     
     @staticmethod
+    def _new_submission(user_id: str, username: str, channel_id: str, timesheet_type: str) -> TimesheetSubmission:
+        submission = TimesheetSubmission(
+            user_id=user_id,
+            username=username,
+            channel_id=channel_id,
+            timesheet_type=timesheet_type
+        )
+        submission.set_submitted_at(get_ist_now().replace(tzinfo=None))
+        return submission
+
+    @staticmethod
+    def _submission_insert(dialect, submission: TimesheetSubmission, entries: List[Dict[str, Any]]):
+        """One multi-row INSERT of a submission's lines, with RETURNING id where the backend supports it."""
+        # All lines of one submission share its timestamp and period
+        keys = submission_keys(submission.timesheet_type, submission.submission_date)
+        stmt = insert(TimesheetEntry).values([
+            {
+                'submission_id': submission.id,
+                'user_id': submission.user_id,
+                'username': submission.username,
+                'channel_id': submission.channel_id,
+                'client_name': entry['client_name'],
+                'hours': entry['hours'],
+                'timesheet_type': submission.timesheet_type,
+                'created_at': submission.submission_date,
+                **keys
+            }
+            for entry in entries
+        ])
+        return stmt.returning(TimesheetEntry.id) if dialect.insert_returning else stmt
+
+    @staticmethod
+    @timed_query
+    def create_entries(
+        db: Session,
+        user_id: str,
+        username: str,
+        channel_id: str,
+        entries: List[Dict[str, Any]],
+        timesheet_type: str = 'weekly'
+    ) -> List[int]:
+        """
+        Record a submission and every {'client_name', 'hours'} line of it in one transaction:
+        the submission row, then all lines in one statement, then one commit.
+        Returns the new entry IDs, or an empty list if the backend has no RETURNING.
+        Raises IntegrityError, with nothing written, if the user already submitted
+        a timesheet of this type today.
+        """
+        if not entries:
+            return []
+        dialect = db.bind.dialect
+        submission = TimesheetService._new_submission(user_id, username, channel_id, timesheet_type)
+        try:
+            db.add(submission)
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            raise
+        result = db.execute(TimesheetService._submission_insert(dialect, submission, entries))
+        entry_ids = list(result.scalars()) if dialect.insert_returning else []
+        db.commit()
+        return entry_ids
+
+    @staticmethod
+    @timed_query
+    async def create_entries_async(
+        db: AsyncSession,
+        user_id: str,
+        username: str,
+        channel_id: str,
+        entries: List[Dict[str, Any]],
+        timesheet_type: str = 'weekly'
+    ) -> List[int]:
+        """Async variant of create_entries for request handlers."""
+        if not entries:
+            return []
+        dialect = db.bind.dialect
+        submission = TimesheetService._new_submission(user_id, username, channel_id, timesheet_type)
+        try:
+            db.add(submission)
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        result = await db.execute(TimesheetService._submission_insert(dialect, submission, entries))
+        entry_ids = list(result.scalars()) if dialect.insert_returning else []
+        await db.commit()
+        return entry_ids
+    
+    @staticmethod
+    @timed_query
     def get_weekly_entries(db: Session) -> List[Dict[str, Any]]:
-        week_start = datetime.now() - timedelta(days=datetime.now().weekday())
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        
         entries = db.query(TimesheetEntry).filter(
-            TimesheetEntry.submission_date >= week_start,
-            TimesheetEntry.timesheet_type == 'weekly'  # Add this filter
+            TimesheetEntry.timesheet_type == 'weekly',
+            TimesheetEntry.period_start == TimesheetService.current_period_start('weekly')
         ).all()
         
         return [
@@ -70,13 +187,11 @@ class TimesheetService:
         ]
     
     @staticmethod
+    @timed_query
     def get_monthly_entries(db: Session) -> List[Dict[str, Any]]:
-        now = datetime.now()
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
         entries = db.query(TimesheetEntry).filter(
-            TimesheetEntry.submission_date >= month_start,
-            TimesheetEntry.timesheet_type == 'monthly'  # Add this filter
+            TimesheetEntry.timesheet_type == 'monthly',
+            TimesheetEntry.period_start == TimesheetService.current_period_start('monthly')
         ).all()
         
         return [
@@ -90,6 +205,7 @@ class TimesheetService:
         ]
     
     @staticmethod
+    @timed_query
     def get_user_entries(db: Session, user_id: str, days: int = 7, timesheet_type: str = None) -> List[TimesheetEntry]:
         cutoff_date = datetime.now() - timedelta(days=days)
         query = db.query(TimesheetEntry).filter(
@@ -104,17 +220,31 @@ class TimesheetService:
         return query.all()
 
     @staticmethod
+    @timed_query
+    async def get_user_entries_async(db: AsyncSession, user_id: str, days: int = 7,
+                                     timesheet_type: str = None) -> List[TimesheetEntry]:
+        cutoff_date = datetime.now() - timedelta(days=days)
+        query = select(TimesheetEntry).where(
+            TimesheetEntry.user_id == user_id,
+            TimesheetEntry.submission_date >= cutoff_date
+        )
+        
+        if timesheet_type:
+            query = query.where(TimesheetEntry.timesheet_type == timesheet_type)
+            
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    @timed_query
     def get_weekly_entries_grouped_by_user(db: Session) -> Dict[str, Dict[str, Any]]:
         """
         Get weekly entries grouped by user_id.
         Returns a dictionary where key is user_id and value contains username and entries list.
         """
-        week_start = datetime.now() - timedelta(days=datetime.now().weekday())
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        
         entries = db.query(TimesheetEntry).filter(
-            TimesheetEntry.submission_date >= week_start,
-            TimesheetEntry.timesheet_type == 'weekly'  # Add this filter
+            TimesheetEntry.timesheet_type == 'weekly',
+            TimesheetEntry.period_start == TimesheetService.current_period_start('weekly')
         ).order_by(TimesheetEntry.user_id, TimesheetEntry.submission_date).all()
         
         grouped = {}
@@ -135,17 +265,15 @@ class TimesheetService:
         return grouped
     
     @staticmethod
+    @timed_query
     def get_monthly_entries_grouped_by_user(db: Session) -> Dict[str, Dict[str, Any]]:
         """
         Get monthly entries grouped by user_id.
         Returns a dictionary where key is user_id and value contains username and entries list.
         """
-        now = datetime.now()
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
         entries = db.query(TimesheetEntry).filter(
-            TimesheetEntry.submission_date >= month_start,
-            TimesheetEntry.timesheet_type == 'monthly'  # Add this filter
+            TimesheetEntry.timesheet_type == 'monthly',
+            TimesheetEntry.period_start == TimesheetService.current_period_start('monthly')
         ).order_by(TimesheetEntry.user_id, TimesheetEntry.submission_date).all()
         
         grouped = {}
@@ -166,37 +294,39 @@ class TimesheetService:
         return grouped
     
     @staticmethod
-    def get_latest_timesheet_entries(db: Session, user_id: str) -> List[TimesheetEntry]:
-        """
-        Get all entries from the user's most recent timesheet submission.
-        Groups entries by submission date (YYYY-MM-DD) in IST and timesheet type.
-        """
-        from sqlalchemy import func, cast, Date
-
-        # Get the latest entry
-        latest_entry = db.query(TimesheetEntry).filter(
-            TimesheetEntry.user_id == user_id
-        ).order_by(desc(TimesheetEntry.submission_date)).first()
-
-        if not latest_entry:
-            return []
-
-        # Get the IST date of the latest entry
-        latest_ist_date = get_ist_date(latest_entry.submission_date)
+    def _latest_submission_entries(user_id: str):
+        """Lines of the user's most recent non-empty submission, as a single indexed query."""
+        latest_submission_id = (
+            select(TimesheetSubmission.id)
+            .where(
+                TimesheetSubmission.user_id == user_id,
+                TimesheetSubmission.entries.any()  # Skip submissions whose lines were all deleted
+            )
+            .order_by(desc(TimesheetSubmission.submission_date))
+            .limit(1)
+            .scalar_subquery()
+        )
+        return (
+            select(TimesheetEntry)
+            .where(TimesheetEntry.submission_id == latest_submission_id)
+            .order_by(TimesheetEntry.id)
+        )
 
-        # Get all entries submitted on the same IST date with the same type
-        entries = db.query(TimesheetEntry).filter(
-            TimesheetEntry.user_id == user_id,
-            TimesheetEntry.timesheet_type == latest_entry.timesheet_type
-        ).order_by(TimesheetEntry.submission_date).all()
+    @staticmethod
+    @timed_query
+    def get_latest_timesheet_entries(db: Session, user_id: str) -> List[TimesheetEntry]:
+        """Get all entries of the user's most recent timesheet submission, in line order."""
+        return list(db.execute(TimesheetService._latest_submission_entries(user_id)).scalars().all())
 
-        # Filter entries by IST date
-        return [
-            entry for entry in entries 
-            if get_ist_date(entry.submission_date) == latest_ist_date
-        ]
+    @staticmethod
+    @timed_query
+    async def get_latest_timesheet_entries_async(db: AsyncSession, user_id: str) -> List[TimesheetEntry]:
+        """Async variant of get_latest_timesheet_entries for request handlers."""
+        result = await db.execute(TimesheetService._latest_submission_entries(user_id))
+        return list(result.scalars().all())
 
     @staticmethod
+    @timed_query
     def update_timesheet_entry(
         db: Session,
         entry_id: int,
@@ -226,7 +356,7 @@ class TimesheetService:
         try:
             entry.client_name = client_name
             entry.hours = hours
-            entry.submission_date = get_ist_now().replace(tzinfo=None)  # Update submission time in IST
+            entry.set_submitted_at(get_ist_now().replace(tzinfo=None))  # Update submission time in IST
             if channel_id:  # Update channel_id if provided
                 entry.channel_id = channel_id
             db.commit()
@@ -239,6 +369,7 @@ class TimesheetService:
             return None
 
     @staticmethod
+    @timed_query
     def delete_timesheet_entry(
         db: Session,
         entry_id: int,
@@ -271,6 +402,130 @@ class TimesheetService:
             db.rollback()
             return False
 
+    @staticmethod
+    def _plan_edit(
+        stored: Dict[int, TimesheetEntry],
+        entry_ids: List[int],
+        rows: List[Optional[Dict[str, Any]]],
+        channel_id: Optional[str]
+    ) -> Tuple[List[Tuple[TimesheetEntry, Dict[str, Any]]], List[Dict[str, Any]], List[TimesheetEntry], int]:
+        """
+        Diff the edit form against the stored entries.
+        rows[i] edits entry_ids[i] (None leaves it untouched), rows past the stored
+        entries are new, and stored entries past the last row are deleted.
+        Returns (updates, inserts, deletes, unchanged_count).
+        """
+        updates, inserts, unchanged = [], [], 0
+        for i, row in enumerate(rows):
+            if row is None:
+                continue
+            if i >= len(entry_ids):
+                inserts.append(row)
+                continue
+            entry = stored[entry_ids[i]]
+            if (entry.client_name == row['client_name'] and entry.hours == row['hours']
+                    and (not channel_id or entry.channel_id == channel_id)):
+                unchanged += 1
+            else:
+                updates.append((entry, row))
+        deletes = [stored[entry_id] for entry_id in entry_ids[len(rows):]]
+        return updates, inserts, deletes, unchanged
+
+    @staticmethod
+    def _apply_updates(
+        submission: TimesheetSubmission,
+        kept: List[TimesheetEntry],
+        updates: List[Tuple[TimesheetEntry, Dict[str, Any]]],
+        channel_id: Optional[str]
+    ) -> None:
+        """
+        Apply the updated lines, then stamp the submission and every line it keeps
+        with the edit time, so the whole timesheet stays in one day and period.
+        """
+        now = get_ist_now().replace(tzinfo=None)
+        submission.set_submitted_at(now)
+        if channel_id:
+            submission.channel_id = channel_id
+        for entry, row in updates:
+            entry.client_name = row['client_name']
+            entry.hours = row['hours']
+            if channel_id:
+                entry.channel_id = channel_id
+        for entry in kept:
+            entry.set_submitted_at(now)  # Update submission time in IST
+
+    @staticmethod
+    def _edit_result(updates, inserts, deletes, unchanged) -> Dict[str, Any]:
+        return {
+            'updated': [
+                {'entry_id': entry.id, 'client_name': row['client_name'], 'hours': row['hours']}
+                for entry, row in updates
+            ],
+            'created': inserts,
+            'deleted': [entry.id for entry in deletes],
+            'unchanged': unchanged
+        }
+
+    @staticmethod
+    @timed_query
+    async def apply_edit_async(
+        db: AsyncSession,
+        user_id: str,
+        username: str,
+        channel_id: str,
+        entry_ids: List[int],
+        rows: List[Optional[Dict[str, Any]]],
+        timesheet_type: str = 'weekly'
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Bring a submission to the state of the edit form in one transaction: one
+        locked fetch of the stored entries, then every update, insert and delete
+        (new lines join the edited submission), then one commit. Returns {'updated', 'created', 'deleted', 'unchanged'},
+        or None (with nothing written) if an entry is missing or the write fails.
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+        
+        result = await db.execute(select(TimesheetEntry).where(
+            TimesheetEntry.id.in_(entry_ids),
+            TimesheetEntry.user_id == user_id  # Ensure user owns these entries
+        ).with_for_update())
+        stored = {entry.id: entry for entry in result.scalars()}
+        missing = [entry_id for entry_id in entry_ids if entry_id not in stored]
+        if missing:
+            logger.error(f"❌ Entries {missing} not found for user {user_id}")
+            await db.rollback()
+            return None
+        
+        updates, inserts, deletes, unchanged = TimesheetService._plan_edit(stored, entry_ids, rows, channel_id)
+        # Built before commit, while the entries' IDs are still loaded
+        edit_result = TimesheetService._edit_result(updates, inserts, deletes, unchanged)
+        try:
+            if updates or inserts or deletes:
+                submission_id = stored[entry_ids[0]].submission_id
+                submission = await db.get(TimesheetSubmission, submission_id) if submission_id else None
+                if submission is None:
+                    # Entries from before submissions were recorded get one now
+                    submission = TimesheetService._new_submission(user_id, username, channel_id, timesheet_type)
+                    db.add(submission)
+                    await db.flush()
+                    for entry in stored.values():
+                        entry.submission_id = submission.id
+                kept = [entry for entry in stored.values() if entry not in deletes]
+                TimesheetService._apply_updates(submission, kept, updates, channel_id)
+            for entry in deletes:
+                await db.delete(entry)
+            if inserts:
+                await db.execute(TimesheetService._submission_insert(db.bind.dialect, submission, inserts))
+            await db.commit()
+        except Exception as e:
+            logger.error(f"❌ Error applying edit for user {user_id}: {str(e)}")
+            await db.rollback()
+            return None
+        
+        logger.info(f"✅ Applied edit for {user_id}: {len(updates)} updated, {len(inserts)} created, {len(deletes)} deleted, {unchanged} unchanged")
+        return edit_result
+
     @staticmethod
     def format_entry_date(entries: List[TimesheetEntry]) -> str:
         """Format the submission date of entries for display in IST."""
@@ -279,6 +534,7 @@ class TimesheetService:
         return format_ist_date(entries[0].submission_date)
 
     @staticmethod
+    @timed_query
     def get_all_channels(db: Session) -> List[str]:
         """
         Get all distinct channel IDs from timesheet entries.
@@ -1,7 +1,97 @@
+from functools import lru_cache
 from typing import List, Dict, Any
+import json
+import re
+
+# Placeholder for a per-request value in a modal template; see ModalTemplate
+SLOT = "{{slot:%s}}"
+_SLOT_PATTERN = re.compile(r'"\{\{slot:(\w+)\}\}"')
+
+
+def build_modal_view(blocks: List[Dict[str, Any]], title: str, callback_id: str,
+                     private_metadata: str = None, emoji: bool = True) -> Dict[str, Any]:
+    """Wrap blocks in the modal view payload used by views.open / views.update."""
+    def plain_text(text: str) -> Dict[str, Any]:
+        return {"type": "plain_text", "text": text, "emoji": True} if emoji else {"type": "plain_text", "text": text}
+
+    view = {
+        "type": "modal",
+        "callback_id": callback_id,
+        "title": plain_text(title),
+        "submit": plain_text("Submit"),
+        "close": plain_text("Cancel"),
+        "blocks": blocks
+    }
+    if private_metadata:
+        view["private_metadata"] = private_metadata
+    return view
+
+
+class ModalTemplate:
+    """
+    A modal view serialized to JSON once. Per-request values are written into the view
+    as SLOT % name strings; render() splices their JSON encoding into the pre-rendered
+    text instead of rebuilding and re-serializing the whole view.
+    """
+
+    def __init__(self, view: Dict[str, Any]):
+        # Alternating literal JSON text and slot names: [text, name, text, name, ..., text]
+        self._parts = _SLOT_PATTERN.split(json.dumps(view, ensure_ascii=False, separators=(",", ":")))
+        self.slots = frozenset(self._parts[1::2])
+
+    def render(self, **values: Any) -> str:
+        missing = self.slots.difference(values)
+        if missing:
+            raise ValueError(f"Missing modal template values: {sorted(missing)}")
+        out = [self._parts[0]]
+        for i in range(1, len(self._parts), 2):
+            out.append(json.dumps(values[self._parts[i]], ensure_ascii=False))
+            out.append(self._parts[i + 1])
+        return "".join(out)
+
+
+@lru_cache(maxsize=None)
+def _modal_template(form: str, num_entries: int, timesheet_type: str) -> ModalTemplate:
+    if form == "weekly":
+        view = build_modal_view(BlockBuilder.build_weekly_form(), "Weekly Timesheet",
+                                "submit_weekly_timesheet", SLOT % "private_metadata")
+    elif form == "monthly":
+        view = build_modal_view(BlockBuilder.build_monthly_form(), "Monthly Timesheet",
+                                "submit_monthly_timesheet", SLOT % "private_metadata")
+    elif form == "entries":
+        # Entry count changes keep the modal's own callback_id and metadata
+        view = build_modal_view(BlockBuilder.build_entry_forms(num_entries), "Weekly Timesheet",
+                                SLOT % "callback_id", SLOT % "private_metadata", emoji=False)
+    elif form == "edit":
+        initial_values = [
+            {"client_name": SLOT % f"client_{i}", "hours": SLOT % f"hours_{i}"}
+            for i in range(num_entries)
+        ]
+        blocks = BlockBuilder.build_entry_forms(num_entries, timesheet_type, initial_values)
+        # Submission date goes in the first block rather than the (short) title
+        blocks[0:0] = [
+            {"type": "section", "text": {"type": "mrkdwn", "text": SLOT % "date_text"}},
+            {"type": "divider"}
+        ]
+        view = build_modal_view(blocks, f"Edit {timesheet_type.capitalize()}",
+                                "edit_timesheet_modal", SLOT % "private_metadata")
+    else:
+        raise ValueError(f"Unknown modal form: {form}")
+    return ModalTemplate(view)
 
 
 class BlockBuilder:
+    @staticmethod
+    def modal_template(form: str, num_entries: int = 1, timesheet_type: str = 'weekly') -> ModalTemplate:
+        """
+        Pre-rendered modal for one of the fixed form shapes, built once per
+        (form, num_entries, timesheet_type) and reused for every request:
+        - weekly / monthly: the slash command forms (slot: private_metadata)
+        - entries: the form after an entry count change (slots: callback_id, private_metadata)
+        - edit: the edit form (slots: date_text, private_metadata, client_<i>, hours_<i>)
+        """
+        return _modal_template(form, num_entries, timesheet_type)
+
     @staticmethod
     def build_initial_form() -> List[Dict[str, Any]]:
         blocks = [
@@ -290,7 +380,8 @@ class BlockBuilder:
     def build_user_grouped_report_blocks(
         grouped_entries: Dict[str, Dict[str, Any]], 
         title: str,
-        missing_user_ids: List[str] = None
+        missing_user_ids: List[str] = None,
+        missing_users_incomplete: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Build report blocks grouped by user showing:
@@ -298,7 +389,8 @@ class BlockBuilder:
         - Number of clients (total entries)
         - List of all clients with hours
         - Then next user
-        - At the end, tag users who haven't submitted
+        - At the end, tag users who haven't submitted, or say they could not be
+          determined when missing_users_incomplete is set
         """
         blocks = [
             {
@@ -371,5 +463,16 @@ class BlockBuilder:
                     "text": f"*⚠️ Users who haven't submitted timesheet:*\n{user_mentions}"
                 }
             })
+        elif missing_users_incomplete:
+            blocks.append({
+                "type": "divider"
+            })
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": "*⚠️ Users who haven't submitted timesheet:*\n_Could not be determined: Slack did not return the full channel member list. Run the report again later._"
+                }
+            })
         
         return blocks
\ No newline at end of file
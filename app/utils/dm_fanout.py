@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, AsyncIterable, Union, Set, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Delivery status returned by a successful send
+DELIVERED = "ok"
+
+
+class FanoutResult:
+    """Progress and outcome counters for one fan-out run."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.total = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.failed_user_ids: List[str] = []
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed
+
+    def summary(self) -> str:
+        rate = self.done / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"{self.label}: {self.sent} sent, {self.failed} failed, {self.retries} retries, "
+            f"{self.done}/{self.total} done in {self.elapsed:.1f}s ({rate:.1f}/s)"
+        )
+
+
+class DMFanout:
+    """
+    Deliver one message per user with at most `concurrency` deliveries in flight.
+
+    `deliver(user_id)` must return DELIVERED on success or a Slack error code
+    otherwise. Error codes listed in `permanent_errors` fail immediately; any
+    other failure (or exception) is retried up to `max_retries` times with
+    exponential backoff. Recipients may be an async iterable, so sending starts
+    while the recipient list is still being produced.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[str], Awaitable[str]],
+        concurrency: int,
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 1.0,
+        permanent_errors: Set[str] = frozenset(),
+        progress_every: int = 100,
+        label: str = "DM fan-out"
+    ):
+        self.deliver = deliver
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.permanent_errors = permanent_errors
+        self.progress_every = max(1, progress_every)
+        self.label = label
+
+    async def _deliver_with_retry(self, user_id: str, result: FanoutResult) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                status = await self.deliver(user_id)
+            except Exception as e:
+                status = f"exception: {str(e)}"
+
+            if status == DELIVERED:
+                result.sent += 1
+                logger.debug(f"✅ DM sent successfully to user {user_id}")
+                return
+
+            if status in self.permanent_errors or attempt == self.max_retries:
+                result.failed += 1
+                result.failed_user_ids.append(user_id)
+                logger.warning(f"❌ Failed to send DM to user {user_id}: {status}")
+                return
+
+            result.retries += 1
+            await asyncio.sleep(self.retry_backoff_seconds * (2 ** attempt))
+
+    async def _worker(self, queue: "asyncio.Queue", result: FanoutResult) -> None:
+        while True:
+            user_id = await queue.get()
+            try:
+                if user_id is None:
+                    return
+                await self._deliver_with_retry(user_id, result)
+                if result.done % self.progress_every == 0:
+                    logger.info(f"📨 {result.summary()}")
+            finally:
+                queue.task_done()
+
+    async def run(self, user_ids: Union[Iterable[str], AsyncIterable[str]],
+                  result: Optional[FanoutResult] = None) -> FanoutResult:
+        """Pass `result` to watch the counters while the run is in progress."""
+        result = result or FanoutResult(self.label)
+        # A small buffer keeps the producer only slightly ahead of the workers
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue, result)) for _ in range(self.concurrency)]
+
+        try:
+            if hasattr(user_ids, '__aiter__'):
+                async for user_id in user_ids:
+                    result.total += 1
+                    await queue.put(user_id)
+            else:
+                for user_id in user_ids:
+                    result.total += 1
+                    await queue.put(user_id)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        result.finished_at = time.monotonic()
+        logger.info(f"📊 {result.summary()}")
+        return result
@@ -0,0 +1,113 @@
+"""
+Sampled, budgeted logging of large dumps on the Slack request hot path.
+
+Payload, view and raw body dumps go through `hot_log.info` instead of f-strings
+on the logger. Per request, the route's sample rate decides once whether those
+dumps are written at all, and a byte budget caps how much one request may write.
+They log at INFO so sampling applies at the default log level; the rates are the
+knob, not the level. Arguments are formatted only for records that will actually
+be emitted, so unsampled requests never pay for json.dumps.
+"""
+import contextvars
+import json
+import logging
+import random
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class LazyJSON:
+    """Defers json.dumps until the log record is actually formatted."""
+
+    __slots__ = ("obj", "indent")
+
+    def __init__(self, obj: Any, indent: Optional[int] = None):
+        self.obj = obj
+        self.indent = indent
+
+    def __str__(self) -> str:
+        try:
+            return json.dumps(self.obj, indent=self.indent, default=str)
+        except (TypeError, ValueError):
+            return repr(self.obj)
+
+
+class LogBudget:
+    def __init__(self, route: str, sampled: bool, remaining_bytes: int):
+        self.route = route
+        self.sampled = sampled
+        self.remaining_bytes = remaining_bytes
+        self.exhausted = False
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "interactions:0.05,commands:0.1" into {route: rate}."""
+    rates = {}
+    for item in (spec or "").split(","):
+        route, _, rate = item.partition(":")
+        if route.strip() and rate.strip():
+            try:
+                rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                continue
+    return rates
+
+
+class HotPathLogger:
+    def __init__(self, sample_rates: Dict[str, float], default_rate: float, budget_bytes: int):
+        self.sample_rates = sample_rates
+        self.default_rate = default_rate
+        self.budget_bytes = budget_bytes
+        self._current: contextvars.ContextVar[Optional[LogBudget]] = contextvars.ContextVar("hot_log_budget", default=None)
+        self.sampled_requests = 0
+        self.dropped_records = 0
+
+    def _new_budget(self, route: str) -> LogBudget:
+        rate = self.sample_rates.get(route, self.default_rate)
+        sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+        if sampled:
+            self.sampled_requests += 1
+        return LogBudget(route, sampled, self.budget_bytes)
+
+    @contextmanager
+    def request(self, route: str):
+        """Make one sampling decision and one byte budget for everything logged inside this block."""
+        token = self._current.set(self._new_budget(route))
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+
+    def log(self, logger: logging.Logger, level: int, msg: str, *args: Any) -> None:
+        if not logger.isEnabledFor(level):
+            return
+        # Outside a request (scheduler jobs, background queue) every call samples on its own
+        budget = self._current.get() or self._new_budget("default")
+        if not budget.sampled or budget.exhausted:
+            self.dropped_records += 1
+            return
+
+        text = msg % args if args else msg
+        size = len(text.encode("utf-8", "replace"))
+        if size > budget.remaining_bytes:
+            text = text[:budget.remaining_bytes] + f"... [truncated, {self.budget_bytes}-byte log budget for {budget.route} exhausted]"
+            budget.exhausted = True
+        budget.remaining_bytes -= min(size, budget.remaining_bytes)
+        logger.log(level, text)
+
+    def debug(self, logger: logging.Logger, msg: str, *args: Any) -> None:
+        self.log(logger, logging.DEBUG, msg, *args)
+
+    def info(self, logger: logging.Logger, msg: str, *args: Any) -> None:
+        self.log(logger, logging.INFO, msg, *args)
+
+
+# Shared by the Slack middleware, routers, handlers and services
+hot_log = HotPathLogger(
+    sample_rates=parse_sample_rates(settings.hot_log_sample_rates),
+    default_rate=settings.hot_log_default_sample_rate,
+    budget_bytes=settings.hot_log_budget_bytes
+)
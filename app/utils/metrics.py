@@ -0,0 +1,140 @@
+"""
+Prometheus metrics for the bot, served at /metrics.
+
+Latency histograms are kept per FastAPI route, per Slack Web API method and per
+TimesheetService query; counters track DM deliveries and modal submissions.
+
+Metrics live in each process's memory. When uvicorn runs several workers, set
+PROMETHEUS_MULTIPROC_DIR to an empty directory (wiped before every start) so
+each worker writes its samples there and /metrics merges them; otherwise
+/metrics only reports the worker that answered the scrape.
+"""
+import functools
+import inspect
+import os
+import time
+from typing import Callable
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Slack expects an ack within 3 seconds, so resolution is concentrated below that
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "timesheet_http_request_duration_seconds",
+    "Time to serve an HTTP request, by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+SLACK_API_SECONDS = Histogram(
+    "timesheet_slack_api_call_duration_seconds",
+    "Slack Web API call latency including rate-limit waits and retries, by API method",
+    ["api_method", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "timesheet_db_query_duration_seconds",
+    "TimesheetService query latency, by query",
+    ["query"],
+    buckets=LATENCY_BUCKETS
+)
+DM_DELIVERIES = Counter(
+    "timesheet_dm_deliveries_total",
+    "DM delivery attempts, by outcome (sent or failed)",
+    ["outcome"]
+)
+MODAL_SUBMISSIONS = Counter(
+    "timesheet_modal_submissions_total",
+    "Modal submissions, by callback_id and outcome (accepted or rejected)",
+    ["callback_id", "outcome"]
+)
+WORK_QUEUE_DEPTH = Gauge(
+    "timesheet_work_queue_depth",
+    "Jobs waiting on the background work queue",
+    multiprocess_mode="livesum"  # Summed over the workers that are still running
+)
+
+
+def record_dm(sent: bool) -> None:
+    DM_DELIVERIES.labels(outcome="sent" if sent else "failed").inc()
+
+
+def record_modal_submission(callback_id: str, accepted: bool) -> None:
+    MODAL_SUBMISSIONS.labels(callback_id=callback_id or "unknown", outcome="accepted" if accepted else "rejected").inc()
+
+
+def record_work_queue_depth(depth: int) -> None:
+    # Set on every change rather than read at scrape time, which only reaches one worker
+    WORK_QUEUE_DEPTH.set(depth)
+
+
+def timed_query(func: Callable) -> Callable:
+    """Record a TimesheetService method's latency under its name; works for sync and async methods."""
+    histogram = DB_QUERY_SECONDS.labels(query=func.__name__)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request under its route template (e.g. /slack/interactions)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"], route=route, status=str(status["code"])
+            ).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> bytes:
+    if not MULTIPROCESS:
+        return generate_latest()
+    # Merge the samples every worker wrote to PROMETHEUS_MULTIPROC_DIR
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drop this process's live gauges from the merged metrics; call on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,111 @@
+"""
+Process-wide Slack Web API rate governor.
+
+Every Slack call reserves a token from the bucket for its method's tier before
+it is sent, and an HTTP 429 pushes that bucket back by the Retry-After delay.
+Reminders, reports and interactive handlers all draw from the same budget.
+See https://api.slack.com/apis/rate-limits for the tier definitions.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Requests per minute for each Slack rate limit tier
+TIER_RATES_PER_MINUTE = {
+    "tier1": 1,
+    "tier2": 20,
+    "tier3": 50,
+    "tier4": 100,
+    # chat.postMessage: roughly one message per second per channel
+    "per_channel": 60,
+}
+
+METHOD_TIERS = {
+    "auth.test": "tier4",
+    "chat.postMessage": "per_channel",
+    "chat.update": "tier3",
+    "conversations.members": "tier4",
+    "conversations.open": "tier3",
+    "files.info": "tier4",
+    "users.conversations": "tier3",
+    "users.info": "tier4",
+    "users.list": "tier2",
+    "views.open": "tier4",
+    "views.update": "tier4",
+}
+
+DEFAULT_TIER = "tier3"
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking while holding the lock."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, float(rate_per_minute))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return how many seconds the caller must wait before sending."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def penalize(self, now: float, retry_after: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateGovernor:
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.throttled_seconds = 0.0
+        self.rate_limited_responses = 0
+
+    @staticmethod
+    def _key(method: str, channel: Optional[str]) -> Tuple[str, Optional[str]]:
+        tier = METHOD_TIERS.get(method, DEFAULT_TIER)
+        # Only per-channel methods get a bucket per channel
+        return (method, channel if tier == "per_channel" else None)
+
+    def _bucket(self, key: Tuple[str, Optional[str]]) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tier = METHOD_TIERS.get(key[0], DEFAULT_TIER)
+            bucket = self._buckets[key] = TokenBucket(TIER_RATES_PER_MINUTE[tier])
+        return bucket
+
+    def _reserve(self, method: str, channel: Optional[str]) -> float:
+        with self._lock:
+            wait = self._bucket(self._key(method, channel)).reserve(time.monotonic())
+            if wait > 0:
+                self.throttled_seconds += wait
+            return wait
+
+    def acquire(self, method: str, channel: Optional[str] = None) -> None:
+        """Block the calling thread until a call to `method` is within budget."""
+        wait = self._reserve(method, channel)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, method: str, channel: Optional[str] = None) -> None:
+        """Wait (without blocking the event loop) until a call to `method` is within budget."""
+        wait = self._reserve(method, channel)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, method: str, channel: Optional[str], retry_after: float) -> None:
+        """Honour a Retry-After from Slack for every caller of this method."""
+        with self._lock:
+            self.rate_limited_responses += 1
+            self._bucket(self._key(method, channel)).penalize(time.monotonic(), retry_after)
+
+
+# Shared by every Slack client in the process
+rate_governor = RateGovernor()
@@ -1,24 +1,105 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
-from app.services.slack_service import SlackService
+from app.services.async_slack_service import AsyncSlackService, PERMANENT_DM_ERRORS, get_async_slack_service
+from app.services.slack_service import SlackListingIncomplete
 from app.services.timesheet_service import TimesheetService
 from app.services.exemption_service import get_all_exempted_users
+from app.services.roster_service import RosterService
+from app.services.idempotency_service import processed_interactions
 from app.database import SessionLocal
 from app.config import get_settings
+from app.services.leader_election import LeaderElector
+from app.utils.dm_fanout import DMFanout, FanoutResult
 from sqlalchemy import text
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from calendar import monthrange
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import functools
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+class JobRun:
+    """Progress of the latest run of one scheduled job, served at /scheduler/jobs."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "running"
+        self.phase = "starting"
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.fanout: Optional[FanoutResult] = None
+
+    def set_phase(self, phase: str) -> None:
+        self.phase = phase
+        logger.info(f"⏳ {self.name}: {phase}")
+
+    def finish(self, error: Optional[str] = None) -> None:
+        self.status = "failed" if error else "completed"
+        self.phase = "done"
+        self.error = error
+        self.finished_at = datetime.now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "status": self.status,
+            "phase": self.phase,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+        if self.fanout is not None:
+            data["dms"] = {
+                "total": self.fanout.total,
+                "sent": self.fanout.sent,
+                "failed": self.fanout.failed,
+                "retries": self.fanout.retries,
+                "elapsed_seconds": round(self.fanout.elapsed, 1),
+            }
+        return data
+
+
 class TaskScheduler:
-    def __init__(self):
+    """
+    Scheduled jobs run as coroutines on the event loop, so every blocking step
+    (SessionLocal queries, the exemption file, roster upserts) goes through
+    _blocking() onto a dedicated thread pool and never stalls request handling.
+    """
+
+    def __init__(self, slack_service: AsyncSlackService = None):
         self.scheduler = AsyncIOScheduler()
-        self.slack_service = SlackService()
+        self.slack_service = slack_service or get_async_slack_service()
+        self.db_executor = ThreadPoolExecutor(
+            max_workers=settings.scheduler_db_workers, thread_name_prefix="scheduler-db"
+        )
+        self.job_runs: Dict[str, JobRun] = {}
+    
+    async def _blocking(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking call on the scheduler's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db_executor, functools.partial(func, *args))
+    
+    def _begin_run(self, name: str) -> JobRun:
+        run = JobRun(name)
+        self.job_runs[name] = run
+        return run
+    
+    def job_status(self) -> Dict[str, Any]:
+        """Latest run of each job plus the next fire times."""
+        return {
+            "running": self.scheduler.running,
+            "runs": {name: run.to_dict() for name, run in self.job_runs.items()},
+            "next_runs": {
+                job.id: job.next_run_time.isoformat() if job.next_run_time else None
+                for job in self.scheduler.get_jobs()
+            },
+        }
     
     def start(self):
         # PRODUCTION MODE: Weekly reminder every Friday at 11 PM IST (17:30 UTC)
@@ -45,12 +126,39 @@ class TaskScheduler:
             id='monthly_reminder_check'
         )
         
+        # Nightly roster sync ahead of the 11 PM IST reminders (10:30 PM IST = 17:00 UTC)
+        self.scheduler.add_job(
+            self.sync_roster,
+            CronTrigger(hour=17, minute=0),
+            id='roster_sync'
+        )
+        
+        # Hourly cleanup of expired interaction idempotency keys
+        self.scheduler.add_job(
+            self.purge_processed_interactions,
+            CronTrigger(minute=15),
+            id='idempotency_purge'
+        )
+        
         self.scheduler.start()
         logger.info("Scheduler started - PRODUCTION MODE: Weekly reminder every Friday at 11 PM IST and monthly reminder on last working day at 11 PM IST")
     
+    def pause(self):
+        """Stop firing jobs without dropping them, e.g. after losing scheduler leadership."""
+        if self.scheduler.running:
+            self.scheduler.pause()
+            logger.info("Scheduler paused")
+    
+    def resume(self):
+        if self.scheduler.running:
+            self.scheduler.resume()
+            logger.info("Scheduler resumed")
+    
     def stop(self):
-        self.scheduler.shutdown()
-        logger.info("Scheduler stopped")
+        if self.scheduler.running:
+            self.scheduler.shutdown()
+            logger.info("Scheduler stopped")
+        self.db_executor.shutdown(wait=False)
     
     def get_last_working_day_of_month(self, year: int, month: int) -> datetime:
         """
@@ -75,7 +183,7 @@ class TaskScheduler:
             # It's a weekday, return the last day
             return last_date
 
-    def get_missing_users_per_channel(self, db, timesheet_type: str = 'weekly'):
+    async def get_missing_users_per_channel(self, db, timesheet_type: str = 'weekly'):
         """
         Get a dictionary of {channel_id: [missing_user_ids]}.
         Missing users are those who are in the channel but haven't submitted timesheet yet.
@@ -83,43 +191,34 @@ class TaskScheduler:
         try:
             missing_users_per_channel = {}
             
-            # Get ALL channels where bot is a member (not just channels with submissions)
-            try:
-                channels = self.slack_service.get_bot_channels()
-                logger.info(f"Checking ALL bot channels for missing users: {channels}")
-            except Exception as e:
-                logger.error(f"Error getting bot channels for missing users: {str(e)}")
-                # Fallback to channels from database
-                result = db.execute(text("SELECT DISTINCT channel_id FROM timesheet_entries WHERE channel_id != 'unknown'"))
-                channels = [row[0] for row in result]
-                logger.info(f"Fallback - checking channels from DB: {channels}")
+            await RosterService.refresh_if_stale_async(db, self.slack_service, settings.roster_max_age_seconds)
             
-            for channel_id in channels:
+            # Users who have submitted this timesheet type and users who are exempt
+            # are the same for every channel, so look them up once
+            if timesheet_type == 'weekly':
+                submitted_users = set(await self._blocking(self._get_weekly_submitters, db))
+            else:
+                submitted_users = set(await self._blocking(self._get_monthly_submitters, db))
+            
+            excluded_users = await self._blocking(self._get_excluded_users)
+            
+            # Stream ALL channels where bot is a member (not just channels with submissions)
+            async for channel_id in self._iter_bot_channels_with_fallback(db):
                 try:
-                    # Get all users in this channel (excluding bots)
-                    all_users = self.slack_service.get_all_users_from_channels([channel_id])
-                    
-                    if not all_users:
-                        continue
-                    
-                    # Get users who have submitted this timesheet type
-                    if timesheet_type == 'weekly':
-                        submitted_users = self._get_weekly_submitters(db)
-                    else:
-                        submitted_users = self._get_monthly_submitters(db)
-                    
-                    # Filter out excluded users (who don't need to fill timesheets)
-                    # Combine users from .env and JSON file
-                    env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
-                    excluded_users = get_all_exempted_users(env_excluded)
-                    
-                    # Calculate missing users (excluding both submitted users and excluded users)
-                    missing = [uid for uid in all_users if uid not in submitted_users and uid not in excluded_users]
+                    # Users in this channel (excluding bots), minus submitted and excluded users
+                    missing = [
+                        uid async for uid in self.slack_service.iter_users_from_channels([channel_id], db=db)
+                        if uid not in submitted_users and uid not in excluded_users
+                    ]
                     
                     if missing:
                         missing_users_per_channel[channel_id] = missing
                         logger.info(f"Channel {channel_id}: {len(missing)} missing users for {timesheet_type} timesheet (excluded {len(excluded_users)} users)")
                 
+                except SlackListingIncomplete as e:
+                    # Posting part of the channel's missing users would pass for the full list
+                    logger.error(f"Skipping channel {channel_id}, its member listing is incomplete: {str(e)}")
+                    continue
                 except Exception as e:
                     logger.warning(f"Error processing channel {channel_id}: {str(e)}")
                     continue
@@ -130,17 +229,42 @@ class TaskScheduler:
             logger.error(f"Error getting missing users per channel: {str(e)}")
             return {}
 
+    async def _iter_bot_channels_with_fallback(self, db):
+        """Stream bot channels; if Slack returns none, fall back to channels with DB history."""
+        found = False
+        async for channel_id in self.slack_service.iter_bot_channels():
+            found = True
+            yield channel_id
+        
+        if not found:
+            channels = await self._blocking(self._get_history_channels, db)
+            logger.info(f"Fallback - checking channels from DB: {channels}")
+            for channel_id in channels:
+                yield channel_id
+
+    def _get_history_channels(self, db):
+        """Channels where timesheets have been submitted."""
+        result = db.execute(text("SELECT DISTINCT channel_id FROM timesheet_entries WHERE channel_id != 'unknown'"))
+        return [row[0] for row in result]
+
+    def _get_excluded_users(self):
+        """Users who don't need to fill timesheets, from .env and the exemption JSON file."""
+        env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
+        return set(get_all_exempted_users(env_excluded))
+
+    async def _iter_reminder_recipients(self, channels, db, excluded_users):
+        """Stream reminder recipients from the given channels, skipping excluded users."""
+        async for user_id in self.slack_service.iter_users_from_channels(channels, db=db):
+            if user_id not in excluded_users:
+                yield user_id
+
     def _get_weekly_submitters(self, db):
         """Get user IDs who have submitted weekly timesheet this week."""
         try:
-            from datetime import datetime, timedelta
-            week_start = datetime.now() - timedelta(days=datetime.now().weekday())
-            week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-            
             result = db.execute(text("""
                 SELECT DISTINCT user_id FROM timesheet_entries 
-                WHERE timesheet_type = 'weekly' AND submission_date >= :week_start
-            """), {"week_start": week_start})
+                WHERE timesheet_type = 'weekly' AND period_start = :period_start
+            """), {"period_start": TimesheetService.current_period_start('weekly')})
             
             submitters = [row[0] for row in result]
             logger.info(f"📊 Weekly submitters from DB: {submitters}")
@@ -152,14 +276,10 @@ class TaskScheduler:
     def _get_monthly_submitters(self, db):
         """Get user IDs who have submitted monthly timesheet this month."""
         try:
-            from datetime import datetime
-            now = datetime.now()
-            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
             result = db.execute(text("""
                 SELECT DISTINCT user_id FROM timesheet_entries 
-                WHERE timesheet_type = 'monthly' AND submission_date >= :month_start
-            """), {"month_start": month_start})
+                WHERE timesheet_type = 'monthly' AND period_start = :period_start
+            """), {"period_start": TimesheetService.current_period_start('monthly')})
             
             submitters = [row[0] for row in result]
             logger.info(f"📊 Monthly submitters from DB: {submitters}")
@@ -168,7 +288,7 @@ class TaskScheduler:
             logger.error(f"Error getting monthly submitters: {str(e)}")
             return []
     
-    def _post_missing_users_to_channel(self, channel_id: str, missing_user_ids: list, timesheet_type: str = 'weekly'):
+    async def _post_missing_users_to_channel(self, channel_id: str, missing_user_ids: list, timesheet_type: str = 'weekly'):
         """Post the missing users list to a specific channel."""
         try:
             if not missing_user_ids:
@@ -188,7 +308,7 @@ class TaskScheduler:
                 }
             ]
             
-            success = self.slack_service.post_message(
+            success = await self.slack_service.post_message(
                 channel_id,
                 blocks,
                 f"Missing {timesheet_type} timesheet submissions"
@@ -207,20 +327,41 @@ class TaskScheduler:
         Post the list of missing users to each channel.
         This is called after the configured delay from the initial reminder.
         """
+        run = self._begin_run(f"{timesheet_type}_followup")
         try:
             db = SessionLocal()
             
-            missing_users_per_channel = self.get_missing_users_per_channel(db, timesheet_type)
+            run.set_phase("collecting missing users")
+            missing_users_per_channel = await self.get_missing_users_per_channel(db, timesheet_type)
             
+            run.set_phase(f"posting to {len(missing_users_per_channel)} channels")
             for channel_id, missing_users in missing_users_per_channel.items():
-                self._post_missing_users_to_channel(channel_id, missing_users, timesheet_type)
+                await self._post_missing_users_to_channel(channel_id, missing_users, timesheet_type)
             
-            db.close()
+            await self._blocking(db.close)
+            run.finish()
             logger.info(f"Completed posting missing users for {timesheet_type} timesheet to {len(missing_users_per_channel)} channels")
         
         except Exception as e:
+            run.finish(error=str(e))
             logger.error(f"Error in post_missing_users_to_channels: {str(e)}")
     
+    async def sync_roster(self):
+        """Refresh the local slack_users roster from users.list."""
+        run = self._begin_run("roster_sync")
+        try:
+            db = SessionLocal()
+            await RosterService.sync_roster_async(db, self.slack_service)
+            await self._blocking(db.close)
+            run.finish()
+        except Exception as e:
+            run.finish(error=str(e))
+            logger.error(f"Error syncing roster: {str(e)}")
+    
+    async def purge_processed_interactions(self):
+        """Drop interaction idempotency keys older than the retention window."""
+        await self._blocking(processed_interactions.purge, settings.idempotency_retention_seconds)
+    
     async def check_and_send_monthly_reminder(self):
         """
         Check if today is the last working day of the month and send reminder if so.
@@ -242,50 +383,28 @@ class TaskScheduler:
     async def send_weekly_reminder(self):
         logger.info("=== STARTING WEEKLY REMINDER PROCESS ===")
         start_time = datetime.now()
+        run = self._begin_run("weekly_reminder")
         
         try:
             db = SessionLocal()
             
+            # Make sure bot/deleted checks below can be answered from the local roster
+            run.set_phase("refreshing roster")
+            await RosterService.refresh_if_stale_async(db, self.slack_service, settings.roster_max_age_seconds)
+            
             # Get all channels where timesheets have been submitted
-            result = db.execute(text("SELECT DISTINCT channel_id FROM timesheet_entries WHERE channel_id != 'unknown'"))
-            channels = [row[0] for row in result]
+            channels = await self._blocking(self._get_history_channels, db)
             logger.info(f"Found {len(channels)} channels with timesheet history: {channels}")
             
-            # If no channels found in database (first time), get channels where bot is a member
+            # If no channels found in database (first time), stream channels where bot is a member
             if not channels:
                 logger.info("No channels found in database. Getting channels where bot is a member...")
-                try:
-                    bot_channels = self.slack_service.get_bot_channels()
-                    channels = bot_channels
-                    logger.info(f"Found {len(channels)} channels where bot is a member: {channels}")
-                except Exception as e:
-                    logger.error(f"Error getting bot channels: {str(e)}")
-                    channels = []
-            
-            # Get all users from all channels (this is who should get reminders)
-            all_user_ids = set()
-            channel_user_counts = {}
-            
-            for channel_id in channels:
-                try:
-                    channel_users = self.slack_service.get_all_users_from_channels([channel_id])
-                    channel_user_counts[channel_id] = len(channel_users)
-                    all_user_ids.update(channel_users)
-                    logger.debug(f"Channel {channel_id}: {len(channel_users)} users")
-                except Exception as e:
-                    logger.warning(f"Error getting users from channel {channel_id}: {str(e)}")
-                    continue
+                channels = self.slack_service.iter_bot_channels()
             
             # Filter out excluded users (who don't need to fill timesheets)
-            # Combine users from .env and JSON file
-            env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
-            excluded_users = get_all_exempted_users(env_excluded)
+            excluded_users = await self._blocking(self._get_excluded_users)
             if excluded_users:
-                logger.info(f"Excluded users (won't receive reminders): {excluded_users}")
-                all_user_ids = all_user_ids - set(excluded_users)
-            
-            logger.info(f"Total unique users to notify: {len(all_user_ids)}")
-            logger.info(f"Channel user breakdown: {channel_user_counts}")
+                logger.info(f"Excluded users (won't receive reminders): {list(excluded_users)}")
             
             reminder_blocks = [
                 {
@@ -297,29 +416,22 @@ class TaskScheduler:
                 }
             ]
             
-            # Send DM to ALL users in channels (not just those who submitted before)
-            successful_dms = 0
-            failed_dms = 0
-            
-            for user_id in all_user_ids:
-                try:
-                    success = self.slack_service.send_dm(
-                        user_id,
-                        reminder_blocks,
-                        "Weekly Timesheet Reminder"
-                    )
-                    if success:
-                        successful_dms += 1
-                        logger.debug(f"✅ DM sent successfully to user {user_id}")
-                    else:
-                        failed_dms += 1
-                        logger.warning(f"❌ Failed to send DM to user {user_id}")
-                except Exception as e:
-                    failed_dms += 1
-                    logger.warning(f"❌ Exception sending DM to user {user_id}: {str(e)}")
-                    continue
+            # Send DM to ALL users in channels (not just those who submitted before).
+            # Users are streamed page by page into a bounded-concurrency fan-out,
+            # so DMs start before every channel has been listed.
+            fanout = DMFanout(
+                lambda user_id: self.slack_service.deliver_dm(user_id, reminder_blocks, "Weekly Timesheet Reminder"),
+                concurrency=settings.reminder_dm_concurrency,
+                max_retries=settings.reminder_dm_max_retries,
+                retry_backoff_seconds=settings.reminder_dm_retry_backoff_seconds,
+                permanent_errors=PERMANENT_DM_ERRORS,
+                label="Weekly reminder"
+            )
+            run.set_phase("sending DMs")
+            run.fanout = FanoutResult(fanout.label)
+            dm_result = await fanout.run(self._iter_reminder_recipients(channels, db, excluded_users), result=run.fanout)
             
-            logger.info(f"📊 Weekly reminder results: {successful_dms} successful, {failed_dms} failed out of {len(all_user_ids)} total users")
+            logger.info(f"📊 Weekly reminder results: {dm_result.sent} successful, {dm_result.failed} failed out of {dm_result.total} total users")
             
             # Schedule follow-up: post missing users to channels after configured delay
             delay_seconds = settings.reminder_post_delay_seconds  # PRODUCTION: 1 hour delay
@@ -337,62 +449,42 @@ class TaskScheduler:
             
             logger.info(f"⏰ Scheduled weekly follow-up job '{job_id}' to run at {run_time.strftime('%Y-%m-%d %H:%M:%S')} ({delay_seconds} seconds from now)")
             
-            db.close()
+            await self._blocking(db.close)
+            run.finish()
             
             execution_time = (datetime.now() - start_time).total_seconds()
             logger.info(f"=== WEEKLY REMINDER PROCESS COMPLETED in {execution_time:.2f} seconds ===")
         
         except Exception as e:
+            run.finish(error=str(e))
             execution_time = (datetime.now() - start_time).total_seconds()
             logger.error(f"💥 CRITICAL ERROR in weekly reminder after {execution_time:.2f} seconds: {str(e)}", exc_info=True)
     
     async def send_monthly_reminder(self):
         logger.info("=== STARTING MONTHLY REMINDER PROCESS ===")
         start_time = datetime.now()
+        run = self._begin_run("monthly_reminder")
         
         try:
             db = SessionLocal()
             
+            # Make sure bot/deleted checks below can be answered from the local roster
+            run.set_phase("refreshing roster")
+            await RosterService.refresh_if_stale_async(db, self.slack_service, settings.roster_max_age_seconds)
+            
             # Get all channels where timesheets have been submitted
-            result = db.execute(text("SELECT DISTINCT channel_id FROM timesheet_entries WHERE channel_id != 'unknown'"))
-            channels = [row[0] for row in result]
+            channels = await self._blocking(self._get_history_channels, db)
             logger.info(f"Found {len(channels)} channels with timesheet history: {channels}")
             
-            # If no channels found in database (first time), get channels where bot is a member
+            # If no channels found in database (first time), stream channels where bot is a member
             if not channels:
                 logger.info("No channels found in database. Getting channels where bot is a member...")
-                try:
-                    bot_channels = self.slack_service.get_bot_channels()
-                    channels = bot_channels
-                    logger.info(f"Found {len(channels)} channels where bot is a member: {channels}")
-                except Exception as e:
-                    logger.error(f"Error getting bot channels: {str(e)}")
-                    channels = []
-            
-            # Get all users from all channels (this is who should get reminders)
-            all_user_ids = set()
-            channel_user_counts = {}
-            
-            for channel_id in channels:
-                try:
-                    channel_users = self.slack_service.get_all_users_from_channels([channel_id])
-                    channel_user_counts[channel_id] = len(channel_users)
-                    all_user_ids.update(channel_users)
-                    logger.debug(f"Channel {channel_id}: {len(channel_users)} users")
-                except Exception as e:
-                    logger.warning(f"Error getting users from channel {channel_id}: {str(e)}")
-                    continue
+                channels = self.slack_service.iter_bot_channels()
             
             # Filter out excluded users (who don't need to fill timesheets)
-            # Combine users from .env and JSON file
-            env_excluded = [u.strip() for u in (settings.excluded_user_ids or "").split(',') if u.strip()]
-            excluded_users = get_all_exempted_users(env_excluded)
+            excluded_users = await self._blocking(self._get_excluded_users)
             if excluded_users:
-                logger.info(f"Excluded users (won't receive reminders): {excluded_users}")
-                all_user_ids = all_user_ids - set(excluded_users)
-            
-            logger.info(f"Total unique users to notify: {len(all_user_ids)}")
-            logger.info(f"Channel user breakdown: {channel_user_counts}")
+                logger.info(f"Excluded users (won't receive reminders): {list(excluded_users)}")
             
             reminder_blocks = [
                 {
@@ -404,29 +496,22 @@ class TaskScheduler:
                 }
             ]
             
-            # Send DM to ALL users in channels (not just those who submitted before)
-            successful_dms = 0
-            failed_dms = 0
-            
-            for user_id in all_user_ids:
-                try:
-                    success = self.slack_service.send_dm(
-                        user_id,
-                        reminder_blocks,
-                        "Monthly Timesheet Reminder"
-                    )
-                    if success:
-                        successful_dms += 1
-                        logger.debug(f"✅ DM sent successfully to user {user_id}")
-                    else:
-                        failed_dms += 1
-                        logger.warning(f"❌ Failed to send DM to user {user_id}")
-                except Exception as e:
-                    failed_dms += 1
-                    logger.warning(f"❌ Exception sending DM to user {user_id}: {str(e)}")
-                    continue
+            # Send DM to ALL users in channels (not just those who submitted before).
+            # Users are streamed page by page into a bounded-concurrency fan-out,
+            # so DMs start before every channel has been listed.
+            fanout = DMFanout(
+                lambda user_id: self.slack_service.deliver_dm(user_id, reminder_blocks, "Monthly Timesheet Reminder"),
+                concurrency=settings.reminder_dm_concurrency,
+                max_retries=settings.reminder_dm_max_retries,
+                retry_backoff_seconds=settings.reminder_dm_retry_backoff_seconds,
+                permanent_errors=PERMANENT_DM_ERRORS,
+                label="Monthly reminder"
+            )
+            run.set_phase("sending DMs")
+            run.fanout = FanoutResult(fanout.label)
+            dm_result = await fanout.run(self._iter_reminder_recipients(channels, db, excluded_users), result=run.fanout)
             
-            logger.info(f"📊 Monthly reminder results: {successful_dms} successful, {failed_dms} failed out of {len(all_user_ids)} total users")
+            logger.info(f"📊 Monthly reminder results: {dm_result.sent} successful, {dm_result.failed} failed out of {dm_result.total} total users")
             
             # Schedule follow-up: post missing users to channels after configured delay
             delay_seconds = settings.reminder_post_delay_seconds  # PRODUCTION: 1 hour delay
@@ -444,12 +529,14 @@ class TaskScheduler:
             
             logger.info(f"⏰ Scheduled monthly follow-up job '{job_id}' to run at {run_time.strftime('%Y-%m-%d %H:%M:%S')} ({delay_seconds} seconds from now)")
             
-            db.close()
+            await self._blocking(db.close)
+            run.finish()
             
             execution_time = (datetime.now() - start_time).total_seconds()
             logger.info(f"=== MONTHLY REMINDER PROCESS COMPLETED in {execution_time:.2f} seconds ===")
         
         except Exception as e:
+            run.finish(error=str(e))
             execution_time = (datetime.now() - start_time).total_seconds()
             logger.error(f"💥 CRITICAL ERROR in monthly reminder after {execution_time:.2f} seconds: {str(e)}", exc_info=True)
     
@@ -458,30 +545,51 @@ class TaskScheduler:
         Keep the old monthly summary method for backward compatibility if needed.
         This can be removed or kept for admin reports.
         """
+        db = SessionLocal()
         try:
             from app.services.timesheet_service import TimesheetService
             from app.utils.block_builder import BlockBuilder
             from app.config import get_settings
             
             settings = get_settings()
-            db = SessionLocal()
             
             # Get monthly entries
-            entries = TimesheetService.get_monthly_entries(db)
+            entries = await self._blocking(TimesheetService.get_monthly_entries, db)
             blocks = BlockBuilder.build_report_blocks(
                 entries,
                 "📊 Monthly Timesheet Summary"
             )
             
             # Send to manager
-            self.slack_service.send_dm(
+            await self.slack_service.send_dm(
                 settings.slack_manager_user_id,
                 blocks,
                 "Monthly Timesheet Summary"
             )
             
-            db.close()
             logger.info("Monthly summary sent to manager")
         
         except Exception as e:
-            logger.error(f"Error sending monthly summary: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error sending monthly summary: {str(e)}")
+        finally:
+            await self._blocking(db.close)
+
+
+def create_leader_elector(task_scheduler: TaskScheduler) -> LeaderElector:
+    """Elector that starts (or resumes) the scheduler's jobs while this process leads and pauses them otherwise."""
+    async def on_elected():
+        if task_scheduler.scheduler.running:
+            task_scheduler.resume()
+        else:
+            task_scheduler.start()
+
+    async def on_demoted():
+        task_scheduler.pause()
+
+    return LeaderElector(
+        "timesheet-scheduler",
+        lease_seconds=settings.scheduler_lease_seconds,
+        renew_seconds=settings.scheduler_lease_renew_seconds,
+        on_elected=on_elected,
+        on_demoted=on_demoted
+    )
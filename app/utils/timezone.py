@@ -1,10 +1,20 @@
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
 
 def get_ist_now() -> datetime:
     """Get current datetime in IST."""
     return datetime.now(ZoneInfo("Asia/Kolkata"))
 
+def get_ist_today() -> date:
+    """Get the current calendar day in IST."""
+    return get_ist_now().date()
+
+def get_period_start(timesheet_type: str, day: date) -> date:
+    """First day of the timesheet period containing day: Monday for weekly, the 1st for monthly."""
+    if timesheet_type == 'monthly':
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
 def utc_to_ist(utc_dt: datetime) -> datetime:
     """Convert UTC datetime to IST."""
     if utc_dt.tzinfo is None:  # if it's naive, assume it's UTC
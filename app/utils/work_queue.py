@@ -0,0 +1,142 @@
+"""
+Bounded in-process work queue for side effects that should not hold up a Slack ack.
+
+Handlers reply to Slack first and submit follow-up work (confirmation DMs,
+message and view updates, manager reports) here. The queue is bounded: when it
+is full, submit() waits up to the enqueue timeout and then refuses the job, so
+callers can fall back to running it inline instead of piling up unbounded work.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.utils.metrics import record_work_queue_depth
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class WorkQueue:
+    def __init__(self, name: str, max_size: int, workers: int, enqueue_timeout_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.workers = workers
+        self.enqueue_timeout_seconds = enqueue_timeout_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the worker tasks; must be called from the running event loop."""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Work queue '{self.name}' started ({self.workers} workers, max {self.max_size} jobs)")
+
+    async def stop(self, drain_timeout_seconds: float = 10.0) -> None:
+        """Give queued jobs a chance to finish, then cancel the workers."""
+        if not self.is_running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Work queue '{self.name}' stopped with {self.depth} jobs still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Work queue '{self.name}' stopped")
+
+    async def submit(self, job_name: str, func: Callable, *args: Any) -> bool:
+        """
+        Queue `func(*args)` to run in the background. Coroutine functions are awaited,
+        plain callables run in a thread. Returns False if the queue is not running or
+        stays full for longer than the enqueue timeout; the caller should then run the job itself.
+        """
+        if not self.is_running:
+            return False
+
+        job: Tuple[str, Callable, tuple, float] = (job_name, func, args, time.monotonic())
+        try:
+            await asyncio.wait_for(self._queue.put(job), timeout=self.enqueue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"⚠️ Work queue '{self.name}' full ({self.depth} jobs), rejected {job_name}")
+            return False
+
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        record_work_queue_depth(self.depth)
+        return True
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_name, func, args, queued_at = await self._queue.get()
+            record_work_queue_depth(self.depth)
+            started_at = time.monotonic()
+            self.total_wait_seconds += started_at - queued_at
+            self.in_flight += 1
+            try:
+                if inspect.iscoroutinefunction(func):
+                    await func(*args)
+                else:
+                    await asyncio.to_thread(func, *args)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Background job {job_name} failed: {str(e)}", exc_info=True)
+            finally:
+                self.in_flight -= 1
+                self.total_run_seconds += time.monotonic() - started_at
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "running": self.is_running,
+            "workers": self.workers,
+            "max_size": self.max_size,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.total_wait_seconds / finished, 4) if finished else 0.0,
+            "avg_run_seconds": round(self.total_run_seconds / finished, 4) if finished else 0.0,
+        }
+
+
+# Shared by the interaction and command handlers of this process
+background_jobs = WorkQueue(
+    "background",
+    max_size=settings.work_queue_max_size,
+    workers=settings.work_queue_workers,
+    enqueue_timeout_seconds=settings.work_queue_enqueue_timeout_seconds
+)
@@ -0,0 +1,66 @@
+"""
+Standalone scheduler worker: runs TaskScheduler without the HTTP app.
+
+    python -m app.worker
+
+Deploy it alongside web instances started with RUN_SCHEDULER_IN_WEB=false, so
+reminder fan-outs never share an event loop with /slack/* requests. Several
+workers can run at once; leader election keeps exactly one of them firing jobs.
+"""
+import asyncio
+import logging
+import signal
+from app.database import init_db, async_engine
+from app.services.slack_clients import slack_transport
+from app.utils.scheduler import TaskScheduler, create_leader_elector
+from app.utils.logging_config import setup_logging
+from app.config import get_settings
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+async def run_worker():
+    logger.info("Starting scheduler worker...")
+    init_db()
+    scheduler = TaskScheduler()
+    elector = create_leader_elector(scheduler)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt
+            pass
+
+    if settings.scheduler_leader_election:
+        elector.start()
+    else:
+        scheduler.start()
+    logger.info("Scheduler worker started")
+
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Shutting down scheduler worker...")
+        if settings.scheduler_leader_election:
+            await elector.stop()
+        scheduler.stop()
+        await slack_transport.aclose()
+        await async_engine.dispose()
+        logger.info("Scheduler worker stopped")
+
+
+def main():
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()